@@ -0,0 +1,7 @@
+def check_connection(connection) -> None:
+    # Pool health check (OPTIONS["pool"]["check"]): one cheap round trip before a
+    # pooled connection is handed out, so one the server dropped is replaced instead
+    # of failing the request. Imported lazily: settings load without the pool extra.
+    from psycopg_pool import ConnectionPool
+
+    ConnectionPool.check_connection(connection)
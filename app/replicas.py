@@ -0,0 +1,83 @@
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS
+
+# Set by a user's successful write; while it lives their reads stay on the primary,
+# so they never see a replica that has not caught up with their own change.
+PIN_COOKIE = "db_primary"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS", "TRACE")
+
+# True while a request that may read from the replica is being handled.
+_replica_reads: ContextVar[bool] = ContextVar("replica_reads", default=False)
+
+
+class ReplicaRouter:
+    # Reads go to settings.DATABASE_REPLICA only inside ReplicaMiddleware's window;
+    # everything else (writes, commands, POST handlers) uses the primary.
+    def db_for_read(self, model, **hints):
+        if settings.DATABASE_REPLICA and _replica_reads.get():
+            return settings.DATABASE_REPLICA
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        # Explicit: otherwise an instance loaded from the replica would be saved there.
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if {obj1._state.db, obj2._state.db} <= {DEFAULT_DB_ALIAS, settings.DATABASE_REPLICA}:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaMiddleware:
+    # Safe-method requests read from the replica unless the user is pinned; a
+    # successful write pins them to the primary for REPLICA_PIN_SECONDS.
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICA:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self._acall(request)
+        token = _replica_reads.set(_may_read_replica(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            _replica_reads.reset(token)
+        return _pin(request, response)
+
+    async def _acall(self, request):
+        token = _replica_reads.set(_may_read_replica(request))
+        try:
+            response = await self.get_response(request)
+        finally:
+            _replica_reads.reset(token)
+        return _pin(request, response)
+
+
+def _may_read_replica(request) -> bool:
+    return request.method in SAFE_METHODS and PIN_COOKIE not in request.COOKIES
+
+
+def _pin(request, response):
+    if request.method not in SAFE_METHODS and response.status_code < 400:
+        response.set_cookie(
+            PIN_COOKIE,
+            "1",
+            max_age=settings.REPLICA_PIN_SECONDS,
+            httponly=True,
+            samesite="Lax",
+        )
+    return response
@@ -13,6 +13,8 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 import os
 from pathlib import Path
 
+from app.db import check_connection
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -55,6 +57,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    # Before sessions/auth, so their lookups can use the replica too.
+    "app.replicas.ReplicaMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -65,19 +69,37 @@ MIDDLEWARE = [
     "django_htmx.middleware.HtmxMiddleware",
 ]
 
+# Opt-in request profiling (main/profiling.py): Server-Timing headers on HTMX
+# responses and rolling per-URL percentiles for staff at /profiling/.
+PROFILING = os.getenv("DJANGO_PROFILING", "0") == "1"
+PROFILING_WINDOW = int(os.getenv("DJANGO_PROFILING_WINDOW", "1000"))
+if PROFILING:
+    MIDDLEWARE.insert(0, "main.profiling.ProfilingMiddleware")
+
 ROOT_URLCONF = "app.urls"
 
 TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
         "DIRS": [BASE_DIR / "templates"],
-        "APP_DIRS": True,
         "OPTIONS": {
             "context_processors": [
                 "django.template.context_processors.request",
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
             ],
+            # Compiled templates are kept in memory with DEBUG on as well, so local
+            # timings match production; the dev autoreloader still resets the cache
+            # when a template file changes.
+            "loaders": [
+                (
+                    "django.template.loaders.cached.Loader",
+                    [
+                        "django.template.loaders.filesystem.Loader",
+                        "django.template.loaders.app_directories.Loader",
+                    ],
+                ),
+            ],
         },
     }
 ]
@@ -96,9 +118,72 @@ DATABASES = {
         "PASSWORD": os.getenv("DB_PASSWORD", "task"),
         "HOST": os.getenv("DB_HOST", "localhost"),
         "PORT": os.getenv("DB_PORT", "5432"),
+        "OPTIONS": {"connect_timeout": int(os.getenv("DB_CONNECT_TIMEOUT", "5"))},
     }
 }
 
+# Connections. DB_POOL=1: each process keeps a psycopg 3 pool and a request borrows
+# a connection instead of opening one (size it to cover the server's worker threads).
+# DB_POOL=0: a connection per request, or persistent ones with DB_CONN_MAX_AGE.
+DB_POOL = os.getenv("DB_POOL", "1") == "1"
+if DB_POOL:
+    DATABASES["default"]["OPTIONS"]["pool"] = {
+        "min_size": int(os.getenv("DB_POOL_MIN_SIZE", "2")),
+        "max_size": int(os.getenv("DB_POOL_MAX_SIZE", "10")),
+        # Seconds a request waits for a free connection before failing.
+        "timeout": float(os.getenv("DB_POOL_TIMEOUT", "10")),
+        "max_idle": float(os.getenv("DB_POOL_MAX_IDLE", "300")),
+        "max_lifetime": float(os.getenv("DB_POOL_MAX_LIFETIME", "3600")),
+        "check": check_connection,
+    }
+else:
+    DATABASES["default"]["CONN_MAX_AGE"] = int(os.getenv("DB_CONN_MAX_AGE", "0"))
+    DATABASES["default"]["CONN_HEALTH_CHECKS"] = True
+
+# Read replica (app/replicas.py): GET/HEAD requests read from it, writes and a user's
+# reads for REPLICA_PIN_SECONDS after their last write stay on the primary.
+DATABASE_REPLICA = "replica" if os.getenv("DB_REPLICA_HOST") else None
+if DATABASE_REPLICA:
+    DATABASES[DATABASE_REPLICA] = {
+        **DATABASES["default"],
+        "HOST": os.getenv("DB_REPLICA_HOST"),
+        "PORT": os.getenv("DB_REPLICA_PORT", DATABASES["default"]["PORT"]),
+        "OPTIONS": dict(DATABASES["default"]["OPTIONS"]),
+        # Tests run against the primary only.
+        "TEST": {"MIRROR": "default"},
+    }
+DATABASE_ROUTERS = ["app.replicas.ReplicaRouter"]
+REPLICA_PIN_SECONDS = int(os.getenv("REPLICA_PIN_SECONDS", "10"))
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+# The per-user data versions behind conditional GETs (service/caching.py) live in
+# the default cache, so every worker process must see the same one. With more than
+# one (WEB_CONCURRENCY, which uvicorn and gunicorn read) set CACHE_URL to a Redis
+# server; a per-process LocMemCache then turns conditional GETs off.
+CACHE_URL = os.getenv("CACHE_URL", "")
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+if CACHE_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": CACHE_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "OPTIONS": {"MAX_ENTRIES": 10000},
+        }
+    }
+
+# Rendered task rows / project headers (see service/caching.py)
+FRAGMENT_CACHE_ALIAS = "default"
+FRAGMENT_CACHE_TIMEOUT = 60 * 60 * 24
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -159,3 +244,43 @@ ACCOUNT_LOGOUT_ON_GET = False
 
 LOGIN_REDIRECT_URL = "/"
 ACCOUNT_LOGOUT_REDIRECT_URL = "/accounts/login/"
+
+
+# Live sync (service/events.py): one SSE stream per tab, fed by a pub/sub broker.
+# PostgresBroker (LISTEN/NOTIFY) shares events between processes; InMemoryBroker
+# only reaches tabs served by the same process. Empty picks by database vendor.
+EVENTS_DATABASE = "default"
+EVENTS_BROKER = os.getenv("EVENTS_BROKER", "")
+EVENTS_QUEUE_SIZE = int(os.getenv("EVENTS_QUEUE_SIZE", "100"))
+EVENTS_STREAM_SECONDS = int(os.getenv("EVENTS_STREAM_SECONDS", "300"))
+EVENTS_HEARTBEAT_SECONDS = 15
+
+# Route the project/task write views to their async twins (service/async_views.py).
+# Only worth it under an ASGI server (uvicorn app.asgi:application); under WSGI each
+# async view pays for its own event loop.
+SERVICE_ASYNC_VIEWS = os.getenv("SERVICE_ASYNC_VIEWS", "0") == "1"
+
+# Dashboard windows (projects per page, tasks per project card)
+DASHBOARD_PROJECT_PAGE_SIZE = int(os.getenv("DASHBOARD_PROJECT_PAGE_SIZE", "20"))
+DASHBOARD_TASK_PAGE_SIZE = int(os.getenv("DASHBOARD_TASK_PAGE_SIZE", "20"))
+
+# Rows per page of the JSON API's lists (service/api.py).
+API_PAGE_SIZE = int(os.getenv("API_PAGE_SIZE", "100"))
+
+# Delta sync (/api/v1/sync/): rows per stream per response, how far back a finished
+# stream resumes (covers transactions that commit late), and how long tombstones are
+# kept (older cursors must resync from scratch; `prune_tombstones` drops the rest).
+SYNC_PAGE_SIZE = int(os.getenv("SYNC_PAGE_SIZE", "500"))
+SYNC_GRACE_SECONDS = int(os.getenv("SYNC_GRACE_SECONDS", "5"))
+SYNC_TOMBSTONE_DAYS = int(os.getenv("SYNC_TOMBSTONE_DAYS", "30"))
+
+# Tasks done for longer than this are moved to TaskArchive by `archive_tasks`.
+TASK_ARCHIVE_AFTER_DAYS = int(os.getenv("TASK_ARCHIVE_AFTER_DAYS", "30"))
+
+# How ProjectDeleteView removes a project's tasks (service/cleanup.py): "chunked"
+# deletes them PROJECT_DELETE_BATCH_SIZE per transaction before the project row;
+# "detach" leaves them to Task.project's SET_NULL (one UPDATE) for `reap_orphans`.
+# Chunked deletion still runs inside the request, so a project with very many tasks
+# holds its worker for every batch; where that matters, use "detach".
+PROJECT_DELETE_MODE = os.getenv("PROJECT_DELETE_MODE", "chunked")
+PROJECT_DELETE_BATCH_SIZE = int(os.getenv("PROJECT_DELETE_BATCH_SIZE", "1000"))
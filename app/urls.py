@@ -19,5 +19,6 @@ from django.urls import include, path
 urlpatterns = [
     path("", include("main.urls"), name="main"),
     path("service/", include("service.urls", namespace="service")),
+    path("api/v1/", include("service.api_urls")),
     path("accounts/", include("allauth.urls")),
 ]
@@ -0,0 +1,151 @@
+import threading
+from collections import defaultdict, deque
+from contextlib import ExitStack
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from time import perf_counter
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.template.base import Template
+
+# Sample of the request being handled on this thread/task, None outside profiling.
+_active: ContextVar["Sample | None"] = ContextVar("profiling_sample", default=None)
+_installed = False
+
+
+@dataclass
+class Sample:
+    total_ms: float = 0.0
+    queries: int = 0
+    sql_ms: float = 0.0
+    template_ms: float = 0.0
+    size: int = 0
+    # Inclusive render time per template name (a partial counts inside its parent).
+    templates: dict = field(default_factory=lambda: defaultdict(float))
+    depth: int = 0
+
+    def time_sql(self, execute, sql, params, many, context):
+        started = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.sql_ms += (perf_counter() - started) * 1000
+
+    def server_timing(self) -> str:
+        metrics = [
+            f"total;dur={self.total_ms:.1f}",
+            f'sql;dur={self.sql_ms:.1f};desc="{self.queries} queries"',
+            f"tpl;dur={self.template_ms:.1f}",
+        ]
+        slowest = sorted(self.templates.items(), key=lambda item: item[1], reverse=True)
+        metrics.extend(f'partial;dur={ms:.1f};desc="{name}"' for name, ms in slowest[:5])
+        return ", ".join(metrics)
+
+
+class Registry:
+    # Rolling window of samples per URL name; percentiles are computed on read.
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples = {}
+
+    def record(self, name: str, sample: Sample) -> None:
+        with self._lock:
+            window = self._samples.get(name)
+            if window is None:
+                window = self._samples[name] = deque(maxlen=settings.PROFILING_WINDOW)
+            window.append(sample)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._samples.clear()
+
+    def summary(self) -> dict:
+        with self._lock:
+            windows = {name: list(samples) for name, samples in self._samples.items()}
+        summary = {}
+        for name, samples in sorted(windows.items()):
+            partials = defaultdict(list)
+            for sample in samples:
+                for template, ms in sample.templates.items():
+                    partials[template].append(ms)
+            summary[name] = {
+                "count": len(samples),
+                "total_ms": _percentiles(sample.total_ms for sample in samples),
+                "sql_ms": _percentiles(sample.sql_ms for sample in samples),
+                "queries": _percentiles(sample.queries for sample in samples),
+                "template_ms": _percentiles(sample.template_ms for sample in samples),
+                "bytes": _percentiles(sample.size for sample in samples),
+                "templates": {
+                    template: _percentiles(values) for template, values in sorted(partials.items())
+                },
+            }
+        return summary
+
+
+registry = Registry()
+
+
+class ProfilingMiddleware:
+    # Opt-in (settings.PROFILING); put it first in MIDDLEWARE so it times the whole stack.
+    def __init__(self, get_response):
+        if not settings.PROFILING:
+            raise MiddlewareNotUsed
+        _install_template_timer()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        sample = Sample()
+        token = _active.set(sample)
+        started = perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(sample.time_sql))
+                response = self.get_response(request)
+        finally:
+            _active.reset(token)
+        sample.total_ms = (perf_counter() - started) * 1000
+        if not response.streaming:
+            sample.size = len(response.content)
+        match = request.resolver_match
+        registry.record(match.view_name if match else "<unresolved>", sample)
+        if getattr(request, "htmx", False):
+            response["Server-Timing"] = sample.server_timing()
+        return response
+
+
+def _install_template_timer() -> None:
+    # Wraps Template.render once per process; it is a plain pass-through when no
+    # request is being profiled. Includes and render_to_string() both go through it.
+    global _installed
+    if _installed:
+        return
+    render = Template.render
+
+    def timed_render(self, context):
+        sample = _active.get()
+        if sample is None:
+            return render(self, context)
+        sample.depth += 1
+        started = perf_counter()
+        try:
+            return render(self, context)
+        finally:
+            elapsed = (perf_counter() - started) * 1000
+            sample.depth -= 1
+            sample.templates[self.name or "<string>"] += elapsed
+            if sample.depth == 0:
+                sample.template_ms += elapsed
+
+    Template.render = timed_render
+    _installed = True
+
+
+def _percentiles(values) -> dict:
+    values = sorted(values)
+    if not values:
+        return {}
+    return {f"p{q}": round(values[-(-len(values) * q // 100) - 1], 2) for q in (50, 95, 99)}
@@ -1,7 +1,26 @@
+from asgiref.sync import async_to_sync
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.cache import caches
+from django.core.checks import Tags, run_checks
+from django.db import connection, router
+from django.http import HttpResponse
+from django.test import (
+    AsyncRequestFactory,
+    RequestFactory,
+    SimpleTestCase,
+    TestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
+from app.replicas import PIN_COOKIE, ReplicaMiddleware
+from service.conditional import conditional_get
+from service.models import Project, Task
+
+from .profiling import registry
+
 
 class DashboardAccessTests(TestCase):
     def setUp(self):
@@ -20,3 +39,143 @@ class DashboardAccessTests(TestCase):
         response = self.client.get(reverse("main:dashboard"))
         self.assertEqual(response.status_code, 200)
         self.assertContains(response, "Task manager")
+
+    @override_settings(DASHBOARD_PROJECT_PAGE_SIZE=1, DASHBOARD_TASK_PAGE_SIZE=2)
+    def test_dashboard_renders_first_window_only(self):
+        self.client.force_login(self.user)
+        older = Project.objects.create(owner=self.user, name="Older")
+        newer = Project.objects.create(owner=self.user, name="Newer")
+        Task.objects.create(project=older, name="Hidden task")
+        for priority in range(1, 4):
+            Task.objects.create(project=newer, name=f"Task {priority}", priority=priority)
+        with self.assertNumQueries(5):
+            response = self.client.get(reverse("main:dashboard"))
+        self.assertContains(response, "Newer")
+        self.assertNotContains(response, "Older")
+        self.assertContains(response, "Task 2")
+        self.assertNotContains(response, "Task 3")
+        self.assertContains(response, "Show more tasks")
+        self.assertContains(response, "Loading more lists")
+
+
+    def test_dashboard_revalidates_without_task_queries(self):
+        caches["default"].clear()
+        self.client.force_login(self.user)
+        project = Project.objects.create(owner=self.user, name="Inbox")
+        task = Task.objects.create(project=project, name="Task")
+        # The first page load issues the CSRF cookie and carries no validators.
+        self.assertNotIn("ETag", self.client.get(reverse("main:dashboard")))
+        response = self.client.get(reverse("main:dashboard"))
+        etag = response["ETag"]
+        self.assertIn("Last-Modified", response)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("main:dashboard"), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertFalse([q for q in queries if "service_" in q["sql"]])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("service:task_toggle_done", args=[task.id]))
+        response = self.client.get(reverse("main:dashboard"), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    @override_settings(WEB_CONCURRENCY=4)
+    def test_per_process_cache_with_several_workers_skips_validators(self):
+        self.client.force_login(self.user)
+        self.client.get(reverse("main:dashboard"))
+        self.assertNotIn("ETag", self.client.get(reverse("main:dashboard")))
+        warnings = [message.id for message in run_checks(tags=[Tags.caches])]
+        self.assertIn("service.W001", warnings)
+
+
+@override_settings(
+    PROFILING=True,
+    MIDDLEWARE=["main.profiling.ProfilingMiddleware", *settings.MIDDLEWARE],
+)
+class ProfilingTests(TestCase):
+    def setUp(self):
+        registry.reset()
+        caches["default"].clear()
+        self.user = get_user_model().objects.create_user(
+            username="user1",
+            password="pass12345",
+        )
+        self.client.force_login(self.user)
+        project = Project.objects.create(owner=self.user, name="Inbox")
+        Task.objects.create(project=project, name="Task")
+
+    def test_htmx_response_carries_server_timing(self):
+        response = self.client.get(reverse("main:dashboard"), HTTP_HX_REQUEST="true")
+        timing = response["Server-Timing"]
+        self.assertIn("sql;dur=", timing)
+        self.assertIn("partial;dur=", timing)
+        self.assertIn('desc="partials/project_card.html"', timing)
+        self.assertNotIn("Server-Timing", self.client.get(reverse("main:dashboard")))
+
+    def test_registry_is_staff_only(self):
+        self.client.get(reverse("main:dashboard"))
+        self.assertEqual(self.client.get(reverse("main:profiling")).status_code, 403)
+
+        self.user.is_staff = True
+        self.user.save()
+        data = self.client.get(reverse("main:profiling")).json()
+        dashboard = data["endpoints"]["main:dashboard"]
+        self.assertEqual(dashboard["count"], 1)
+        self.assertGreater(dashboard["queries"]["p50"], 0)
+        self.assertIn("partials/task_row.html", dashboard["templates"])
+
+
+@override_settings(DATABASE_REPLICA="replica", REPLICA_PIN_SECONDS=10)
+class ReplicaRoutingTests(SimpleTestCase):
+    def route(self, method, status=200, cookies=None):
+        seen = {}
+
+        def view(request):
+            seen["read"] = router.db_for_read(Task)
+            seen["write"] = router.db_for_write(Task)
+            return HttpResponse(status=status)
+
+        request = getattr(RequestFactory(), method)("/")
+        request.COOKIES.update(cookies or {})
+        response = ReplicaMiddleware(view)(request)
+        return seen, response
+
+    def test_safe_reads_use_replica_and_writes_pin_the_primary(self):
+        seen, response = self.route("get")
+        self.assertEqual(seen, {"read": "replica", "write": "default"})
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+        self.assertEqual(router.db_for_read(Task), "default")
+
+        seen, response = self.route("post")
+        self.assertEqual(seen["read"], "default")
+        self.assertEqual(response.cookies[PIN_COOKIE]["max-age"], 10)
+        self.assertNotIn(PIN_COOKIE, self.route("post", status=400)[1].cookies)
+
+        seen, _ = self.route("get", cookies={PIN_COOKIE: "1"})
+        self.assertEqual(seen["read"], "default")
+
+    def test_async_requests_are_routed_too(self):
+        seen = {}
+
+        async def view(request):
+            seen["read"] = router.db_for_read(Task)
+            return HttpResponse()
+
+        async_to_sync(ReplicaMiddleware(view))(AsyncRequestFactory().get("/"))
+        self.assertEqual(seen["read"], "replica")
+
+    def test_replica_reads_get_no_validators(self):
+        view = conditional_get(lambda request: HttpResponse("ok"))
+
+        def get(cookies):
+            request = RequestFactory().get("/")
+            request.user = get_user_model()(id=1)
+            request.META["CSRF_COOKIE"] = "token"
+            request.COOKIES.update(cookies)
+            return ReplicaMiddleware(view)(request)
+
+        response = get({})
+        self.assertNotIn("ETag", response)
+        self.assertNotIn("Last-Modified", response)
+        self.assertIn("ETag", get({PIN_COOKIE: "1"}))
@@ -1,9 +1,10 @@
 from django.urls import path
 
-from .views import DashboardView
+from .views import DashboardView, ProfilingView
 
 app_name = "main"
 
 urlpatterns = [
     path("", DashboardView.as_view(), name="dashboard"),
+    path("profiling/", ProfilingView.as_view(), name="profiling"),
 ]
@@ -1,27 +1,53 @@
-from django.contrib.auth.mixins import LoginRequiredMixin
+from django.conf import settings
+from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
+from django.http import JsonResponse
 from django.utils import timezone
+from django.utils.decorators import method_decorator
+from django.views import View
 from django.views.generic import TemplateView
 
+from service.conditional import conditional_get
+from service.counters import due_soon_cutoff
 from service.forms import ProjectForm, TaskForm
-from service.models import Project
+from service.pagination import due_window, project_window
 
+from .profiling import registry
 
+
+@method_decorator(conditional_get, name="get")
 class DashboardView(LoginRequiredMixin, TemplateView):
     template_name = "main/dashboard.html"
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        projects = (
-            Project.objects.filter(owner=self.request.user)
-            .prefetch_related("tasks")
-            .order_by("-created_at")
-        )
+        # First page only; further projects/tasks are streamed by service:*_page.
+        projects, projects_more = project_window(self.request.user)
+        due_tasks, due_more = due_window(self.request.user)
         context.update(
             {
                 "projects": projects,
+                "projects_more": projects_more,
                 "project_form": ProjectForm(owner=self.request.user),
                 "task_form": TaskForm(),
-                "due_soon_cutoff": timezone.localdate() + timezone.timedelta(days=1),
+                "due_soon_cutoff": due_soon_cutoff(),
+                "due_tasks": due_tasks,
+                "due_more": due_more,
+                "today": timezone.localdate(),
             }
         )
         return context
+
+
+class ProfilingView(LoginRequiredMixin, UserPassesTestMixin, View):
+    # Rolling per-URL percentiles of this process (empty unless PROFILING is on).
+    def test_func(self):
+        return self.request.user.is_staff
+
+    def get(self, request):
+        return JsonResponse(
+            {
+                "enabled": settings.PROFILING,
+                "window": settings.PROFILING_WINDOW,
+                "endpoints": registry.summary(),
+            }
+        )
@@ -0,0 +1,26 @@
+from django.core.exceptions import BadRequest
+
+from .models import Project, Task
+
+# Ownership scoping shared by the HTML views, their async twins and the JSON API.
+# Anything outside these querysets is a 404, so ids of other users' rows never leak.
+MAX_ID = 2**63 - 1  # BigAutoField
+
+
+def user_projects(user):
+    return Project.objects.filter(owner=user)
+
+
+def user_tasks(user):
+    return Task.objects.filter(project__owner=user)
+
+
+def parse_id(value, message: str = "Invalid id") -> int:
+    # A client-supplied id (string or JSON number) as an int, or BadRequest. Only
+    # ASCII digits ("²".isdigit() is true, int() then fails) and only the column's
+    # range, so a bad value is a 400 rather than a ValueError or overflow in a query.
+    if isinstance(value, str) and value.isascii() and value.isdigit() and len(value) <= 19:
+        value = int(value)
+    if isinstance(value, bool) or not isinstance(value, int) or not 0 < value <= MAX_ID:
+        raise BadRequest(message)
+    return value
@@ -0,0 +1,261 @@
+import json
+
+from django.conf import settings
+from django.core.exceptions import BadRequest
+from django.db import transaction
+from django.http import Http404, JsonResponse, QueryDict
+from django.shortcuts import get_object_or_404
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.gzip import gzip_page
+
+from . import counters, events, sync
+from .access import parse_id, user_projects, user_tasks
+from .bulk import apply as apply_bulk
+from .bulk import toggle_done, update_task
+from .conditional import DataVersionMixin, conditional_get
+from .forms import ProjectForm, TaskBulkForm, TaskForm
+from .models import Task
+from .ordering import move, next_priority
+from .pagination import PROJECT_ORDERING, TASK_ORDERING, window
+
+# JSON twin of the HTML endpoints for clients that want data, not markup. Reads
+# project the requested columns with values(), so no model instances are built;
+# ownership uses the same querysets as the HTML views (service.access).
+PROJECT_FIELDS = ("id", "name", "created_at", "open_count", "done_count", "due_soon_count")
+TASK_FIELDS = ("id", "project", "name", "is_done", "priority", "deadline", "created_at", "done_at")
+# values("project") yields the id; on an instance it lives in project_id.
+_ATTRIBUTES = {"project": "project_id"}
+MAX_MOVE_STEPS = 1000
+
+
+@method_decorator(gzip_page, name="dispatch")
+class ApiView(DataVersionMixin, View):
+    def dispatch(self, request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return _error(401, "Authentication required.")
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        except Http404:
+            return _error(404, "Not found.")
+        except BadRequest as error:
+            return _error(400, str(error) or "Bad request.")
+
+
+@method_decorator(conditional_get, name="get")
+class ProjectListView(ApiView):
+    def get(self, request):
+        fields = _fields(request, PROJECT_FIELDS)
+        return _page(request, user_projects(request.user), PROJECT_ORDERING, fields)
+
+    def post(self, request):
+        form = ProjectForm(_payload(request), owner=request.user)
+        if not form.is_valid():
+            return _invalid(form)
+        project = form.save(commit=False)
+        project.owner = request.user
+        project.save()
+        events.publish(request)
+        return _row(request, project, PROJECT_FIELDS, status=201)
+
+
+@method_decorator(conditional_get, name="get")
+class ProjectDetailView(ApiView):
+    def get(self, request, project_id: int):
+        fields = _fields(request, PROJECT_FIELDS)
+        return JsonResponse(_get(user_projects(request.user).values(*fields), project_id))
+
+    def post(self, request, project_id: int):
+        project = get_object_or_404(user_projects(request.user), id=project_id)
+        form = ProjectForm(_payload(request), instance=project, owner=request.user)
+        if not form.is_valid():
+            return _invalid(form)
+        form.save()
+        events.publish(request)
+        return _row(request, project, PROJECT_FIELDS)
+
+
+@method_decorator(conditional_get, name="get")
+class TaskListView(ApiView):
+    def get(self, request, project_id: int):
+        fields = _fields(request, TASK_FIELDS)
+        if not user_projects(request.user).filter(id=project_id).exists():
+            raise Http404
+        # Ownership checked once above, so the page itself needs no join.
+        tasks = Task.objects.filter(project_id=project_id)
+        return _page(request, tasks, TASK_ORDERING, fields)
+
+    def post(self, request, project_id: int):
+        project = get_object_or_404(user_projects(request.user), id=project_id)
+        form = TaskForm(_payload(request))
+        if not form.is_valid():
+            return _invalid(form)
+        task = form.save(commit=False)
+        task.project = project
+        task.priority = next_priority(project.id)
+        with transaction.atomic():
+            task.save()
+            counters.apply((None, counters.snapshot(task)))
+        events.publish(request)
+        return _row(request, task, TASK_FIELDS, status=201)
+
+
+@method_decorator(conditional_get, name="get")
+class TaskDetailView(ApiView):
+    def get(self, request, task_id: int):
+        fields = _fields(request, TASK_FIELDS)
+        return JsonResponse(_get(user_tasks(request.user).values(*fields), task_id))
+
+    def post(self, request, task_id: int):
+        # Partial update: fields missing from the payload keep their value (and an
+        # overdue deadline is not re-validated by a rename).
+        task = get_object_or_404(user_tasks(request.user), id=task_id)
+        payload = _payload(request)
+        form = TaskForm(payload, instance=task)
+        for name in list(form.fields):
+            if name not in payload:
+                del form.fields[name]
+        if not form.is_valid():
+            return _invalid(form)
+        task = update_task(request.user, task_id, form.cleaned_data)
+        events.publish(request)
+        return _row(request, task, TASK_FIELDS)
+
+
+class TaskToggleView(ApiView):
+    def post(self, request, task_id: int):
+        task = toggle_done(request.user, task_id)
+        events.publish(request)
+        return _row(request, task, TASK_FIELDS)
+
+
+class TaskMoveView(ApiView):
+    def post(self, request, task_id: int):
+        payload = _payload(request)
+        direction = payload.get("direction")
+        steps = payload.get("steps", "1")
+        if direction not in {"up", "down"} or not (steps.isascii() and steps.isdigit()):
+            raise BadRequest("Expected direction 'up' or 'down' and a positive steps.")
+        # Checked by length first: int() of a long digit string is itself costly.
+        if len(steps) > len(str(MAX_MOVE_STEPS)) or not 1 <= int(steps) <= MAX_MOVE_STEPS:
+            raise BadRequest(f"steps must be between 1 and {MAX_MOVE_STEPS}.")
+        task = get_object_or_404(user_tasks(request.user), id=task_id)
+        if move(task, direction, int(steps)) is not None:
+            events.publish(request)
+        return _row(request, task, TASK_FIELDS)
+
+
+class TaskBulkView(ApiView):
+    def post(self, request):
+        payload = _payload(request)
+        ids = _ids(payload.getlist("ids"))
+        form = TaskBulkForm(payload, owner=request.user)
+        if not ids:
+            raise BadRequest("No task ids.")
+        if not form.is_valid():
+            return _invalid(form)
+        result = apply_bulk(
+            request.user,
+            ids,
+            form.cleaned_data["action"],
+            deadline=form.cleaned_data["deadline"],
+            target=form.cleaned_data["project"],
+        )
+        events.publish(request)
+        fields = _fields(request, TASK_FIELDS)
+        return JsonResponse(
+            {
+                "updated": [_values(task, fields) for task in result.updated + result.moved],
+                "removed": sorted(set(result.removed) - {task.id for task in result.moved}),
+                "projects": [
+                    _values(project, ("id", *counters.COUNTER_FIELDS))
+                    for project in result.counts
+                ],
+            }
+        )
+
+
+class SyncView(ApiView):
+    # ?since=<cursor from the previous response>; none for a first, full sync.
+    # Keep calling with the new cursor while "more" is true.
+    def get(self, request):
+        try:
+            delta = sync.changes(request.user, request.GET.get("since"))
+        except sync.CursorExpired:
+            return _error(410, "Cursor expired; sync again without `since`.")
+        return JsonResponse(delta)
+
+
+def _fields(request, allowed) -> tuple:
+    # ?fields=name,is_done narrows the columns read and sent; "id" is always included.
+    requested = [name for name in request.GET.get("fields", "").split(",") if name]
+    if not requested:
+        return allowed
+    unknown = set(requested) - set(allowed)
+    if unknown:
+        raise BadRequest(f"Unknown fields: {', '.join(sorted(unknown))}.")
+    return ("id", *(name for name in requested if name != "id"))
+
+
+def _page(request, queryset, ordering, fields):
+    # Keyset page: `next` is the `after` for the following page, null on the last one.
+    after = request.GET.get("after")
+    if after is not None:
+        after = parse_id(after, "Invalid cursor.")
+        names = [field.lstrip("-") for field in ordering]
+        after = _get(queryset.values(*names), after)
+    rows, more = window(queryset.values(*fields), ordering, settings.API_PAGE_SIZE, after)
+    return JsonResponse({"results": rows, "next": rows[-1]["id"] if more else None})
+
+
+def _get(queryset, pk) -> dict:
+    row = queryset.filter(id=pk).first()
+    if row is None:
+        raise Http404
+    return row
+
+
+def _row(request, instance, allowed, status: int = 200):
+    return JsonResponse(_values(instance, _fields(request, allowed)), status=status)
+
+
+def _values(instance, fields) -> dict:
+    return {name: getattr(instance, _ATTRIBUTES.get(name, name)) for name in fields}
+
+
+def _payload(request) -> QueryDict:
+    # Form-encoded bodies as they are; a JSON object becomes the same QueryDict so
+    # the HTML views' forms validate it unchanged.
+    if request.content_type != "application/json":
+        return request.POST
+    try:
+        data = json.loads(request.body or b"{}")
+    except ValueError:
+        raise BadRequest("Invalid JSON.") from None
+    if not isinstance(data, dict):
+        raise BadRequest("Expected a JSON object.")
+    payload = QueryDict(mutable=True)
+    for key, value in data.items():
+        values = value if isinstance(value, list) else [value]
+        payload.setlist(key, [_form_value(item) for item in values])
+    return payload
+
+
+def _form_value(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+
+def _ids(values) -> list[int]:
+    return [parse_id(value, "Invalid task id.") for value in values]
+
+
+def _invalid(form):
+    return JsonResponse({"errors": form.errors.get_json_data()}, status=400)
+
+
+def _error(status: int, message: str):
+    return JsonResponse({"error": message}, status=status)
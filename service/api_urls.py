@@ -0,0 +1,17 @@
+from django.urls import path
+
+from . import api
+
+app_name = "api"
+
+# Mounted at /api/v1/ (app/urls.py).
+urlpatterns = [
+    path("projects/", api.ProjectListView.as_view(), name="projects"),
+    path("projects/<int:project_id>/", api.ProjectDetailView.as_view(), name="project"),
+    path("projects/<int:project_id>/tasks/", api.TaskListView.as_view(), name="tasks"),
+    path("tasks/bulk/", api.TaskBulkView.as_view(), name="task_bulk"),
+    path("tasks/<int:task_id>/", api.TaskDetailView.as_view(), name="task"),
+    path("tasks/<int:task_id>/toggle/", api.TaskToggleView.as_view(), name="task_toggle"),
+    path("tasks/<int:task_id>/move/", api.TaskMoveView.as_view(), name="task_move"),
+    path("sync/", api.SyncView.as_view(), name="sync"),
+]
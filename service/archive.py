@@ -0,0 +1,59 @@
+from django.db import transaction
+from django.shortcuts import get_object_or_404
+
+from . import counters, sync
+from .caching import bump_user_version
+from .models import Project, Task, TaskArchive, Tombstone
+from .ordering import next_priority
+
+_COPIED = ("project_id", "name", "deadline", "created_at", "done_at")
+
+
+def archive_done(before, batch_size: int = 500, limit: int | None = None) -> int:
+    # Moves tasks done before `before` to TaskArchive, one short transaction per
+    # batch so the hot table is never locked for long. Returns the number moved.
+    moved = 0
+    while limit is None or moved < limit:
+        size = batch_size if limit is None else min(batch_size, limit - moved)
+        with transaction.atomic():
+            tasks = list(
+                Task.objects.select_for_update(skip_locked=True)
+                .filter(is_done=True, done_at__lt=before, project__isnull=False)
+                .order_by("id")[:size]
+            )
+            if not tasks:
+                break
+            TaskArchive.objects.bulk_create(
+                TaskArchive(id=task.id, **{name: getattr(task, name) for name in _COPIED})
+                for task in tasks
+            )
+            Task.objects.filter(id__in=[task.id for task in tasks]).delete()
+            counters.apply(*((counters.snapshot(task), None) for task in tasks))
+            project_ids = {task.project_id for task in tasks}
+            owners = dict(Project.objects.filter(id__in=project_ids).values_list("id", "owner_id"))
+            # To a syncing client an archived task is a deleted one (restore re-adds it).
+            sync.bury(Tombstone.TASK, [(owners[task.project_id], task.id) for task in tasks])
+            bump_user_version(*set(owners.values()))
+        moved += len(tasks)
+    return moved
+
+
+def restore(owner, archived_id: int) -> Task:
+    # Brings an archived task back (still done) at the end of its project's list.
+    with transaction.atomic():
+        archived = get_object_or_404(
+            TaskArchive.objects.select_for_update(), id=archived_id, project__owner=owner
+        )
+        task = Task(
+            id=archived.id,
+            is_done=True,
+            priority=next_priority(archived.project_id),
+            **{name: getattr(archived, name) for name in _COPIED},
+        )
+        task.save(force_insert=True)
+        # created_at is auto_now_add, so the original value is written back separately.
+        Task.objects.filter(id=task.id).update(created_at=archived.created_at)
+        task.created_at = archived.created_at
+        archived.delete()
+        counters.apply((None, counters.snapshot(task)))
+    return task
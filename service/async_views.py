@@ -0,0 +1,242 @@
+from asgiref.sync import sync_to_async
+from django.contrib.auth.views import redirect_to_login
+from django.db import transaction
+from django.http import HttpResponse, HttpResponseBadRequest
+from django.shortcuts import aget_object_or_404, redirect, render
+from django.utils.decorators import method_decorator
+from django.views import View
+
+from . import cleanup, counters, events
+from .access import user_projects, user_tasks
+from .bulk import delete_task, toggle_done, update_task
+from .conditional import DataVersionMixin, conditional_get
+from .counters import due_soon_cutoff
+from .forms import ProjectForm, TaskForm
+from .models import Project
+from .ordering import move, next_priority
+
+# Async twins of the write-heavy views in views.py, routed when SERVICE_ASYNC_VIEWS
+# is on. Plain lookups use the async ORM; anything that needs a transaction, row
+# locks or raw SQL runs through the same sync helpers in one sync_to_async hop.
+
+
+class AsyncLoginRequiredMixin:
+    # LoginRequiredMixin reads request.user synchronously; resolve it with auser()
+    # and pin it on the request so later code (forms, ETags) never hits the DB for it.
+    async def dispatch(self, request, *args, **kwargs):
+        user = await request.auser()
+        if not user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        request.user = user
+        return await super().dispatch(request, *args, **kwargs)
+
+
+class ProjectCreateView(AsyncLoginRequiredMixin, DataVersionMixin, View):
+    async def get(self, request):
+        if not getattr(request, "htmx", False):
+            return redirect("main:dashboard")
+        form = ProjectForm(owner=request.user)
+        return render(request, "partials/project_card_new.html", {"form": form})
+
+    async def post(self, request):
+        form = ProjectForm(request.POST or None, owner=request.user)
+        # clean_name() checks for a duplicate name with a query.
+        if await sync_to_async(form.is_valid)():
+            project = form.save(commit=False)
+            project.owner = request.user
+            await project.asave()
+            await sync_to_async(events.publish)(request)
+            if not getattr(request, "htmx", False):
+                return redirect("main:dashboard")
+            return render(
+                request,
+                "partials/project_card.html",
+                {
+                    "project": project,
+                    "task_form": TaskForm(),
+                    "due_soon_cutoff": due_soon_cutoff(),
+                },
+            )
+
+        if not getattr(request, "htmx", False):
+            return redirect("main:dashboard")
+        return render(request, "partials/project_form.html", {"form": form})
+
+
+@method_decorator(conditional_get, name="get")
+class ProjectUpdateView(AsyncLoginRequiredMixin, DataVersionMixin, View):
+    async def get(self, request, project_id: int):
+        if not getattr(request, "htmx", False):
+            return redirect("main:dashboard")
+        project = await aget_object_or_404(user_projects(request.user), id=project_id)
+        if request.GET.get("mode") == "view":
+            return render(request, "partials/project_header.html", {"project": project})
+        form = ProjectForm(instance=project, owner=request.user)
+        return render(
+            request,
+            "partials/project_header_form.html",
+            {"form": form, "project": project},
+        )
+
+    async def post(self, request, project_id: int):
+        project = await aget_object_or_404(user_projects(request.user), id=project_id)
+        form = ProjectForm(request.POST, instance=project, owner=request.user)
+        if await sync_to_async(form.is_valid)():
+            project = form.save(commit=False)
+            await project.asave()
+            await sync_to_async(events.publish)(request)
+            if not getattr(request, "htmx", False):
+                return redirect("main:dashboard")
+            return render(request, "partials/project_header.html", {"project": project})
+        if not getattr(request, "htmx", False):
+            return redirect("main:dashboard")
+        return render(
+            request,
+            "partials/project_header_form.html",
+            {"form": form, "project": project},
+        )
+
+
+class ProjectDeleteView(AsyncLoginRequiredMixin, DataVersionMixin, View):
+    async def post(self, request, project_id: int):
+        project = await aget_object_or_404(user_projects(request.user), id=project_id)
+        # Chunked deletion runs several transactions, so it stays sync.
+        await sync_to_async(cleanup.delete_project)(project)
+        await sync_to_async(events.publish)(request)
+        if not getattr(request, "htmx", False):
+            return redirect("main:dashboard")
+        if not await user_projects(request.user).aexists():
+            return render(request, "partials/project_empty.html")
+        return HttpResponse("")
+
+
+class TaskCreateView(AsyncLoginRequiredMixin, DataVersionMixin, View):
+    async def post(self, request, project_id: int):
+        project = await aget_object_or_404(user_projects(request.user), id=project_id)
+        form = TaskForm(request.POST or None)
+        if form.is_valid():
+            task = form.save(commit=False)
+            task.project = project
+            task.priority = await sync_to_async(next_priority)(project.id)
+            await _save_counted(task, None)
+            if not getattr(request, "htmx", False):
+                await sync_to_async(events.publish)(request)
+                return redirect("main:dashboard")
+            context = {
+                "task": task,
+                "counts": await _counts(project.id),
+                "due_soon_cutoff": due_soon_cutoff(),
+            }
+            await _publish(request, "partials/task_event.html", {**context, "kind": "created"})
+            return render(request, "partials/task_created.html", context)
+
+        if not getattr(request, "htmx", False):
+            return redirect("main:dashboard")
+        return render(request, "partials/task_form.html", {"form": form, "project": project})
+
+
+@method_decorator(conditional_get, name="get")
+class TaskUpdateView(AsyncLoginRequiredMixin, DataVersionMixin, View):
+    async def get(self, request, task_id: int):
+        if not getattr(request, "htmx", False):
+            return redirect("main:dashboard")
+        task = await aget_object_or_404(user_tasks(request.user), id=task_id)
+        form = TaskForm(instance=task)
+        return render(request, "partials/task_form.html", {"form": form, "task": task})
+
+    async def post(self, request, task_id: int):
+        task = await aget_object_or_404(user_tasks(request.user), id=task_id)
+        form = TaskForm(request.POST, instance=task)
+        if form.is_valid():
+            # Re-reads the task under a row lock for its counters delta.
+            task = await sync_to_async(update_task)(request.user, task_id, form.cleaned_data)
+            if not getattr(request, "htmx", False):
+                await sync_to_async(events.publish)(request)
+                return redirect("main:dashboard")
+            context = {
+                "task": task,
+                "counts": await _counts(task.project_id),
+                "due_soon_cutoff": due_soon_cutoff(),
+            }
+            await _publish(request, "partials/task_event.html", {**context, "kind": "updated"})
+            return render(request, "partials/task_updated.html", context)
+        if not getattr(request, "htmx", False):
+            return redirect("main:dashboard")
+        return render(request, "partials/task_form.html", {"form": form, "task": task})
+
+
+class TaskDeleteView(AsyncLoginRequiredMixin, DataVersionMixin, View):
+    async def post(self, request, task_id: int):
+        project = (await sync_to_async(delete_task)(request.user, task_id)).project
+        deleted_id = task_id
+        if not getattr(request, "htmx", False):
+            await sync_to_async(events.publish)(request)
+            return redirect("main:dashboard")
+        context = {
+            "project": project,
+            "empty": not await project.tasks.aexists(),
+            "counts": await _counts(project.id),
+        }
+        await _publish(
+            request,
+            "partials/task_event.html",
+            {**context, "kind": "deleted", "task_id": deleted_id},
+        )
+        return render(request, "partials/task_deleted.html", context)
+
+
+class TaskToggleDoneView(AsyncLoginRequiredMixin, DataVersionMixin, View):
+    async def post(self, request, task_id: int):
+        # Locks the task row for its counters delta, so it stays a sync transaction.
+        task = await sync_to_async(toggle_done)(request.user, task_id)
+        if not getattr(request, "htmx", False):
+            await sync_to_async(events.publish)(request)
+            return redirect("main:dashboard")
+        context = {
+            "task": task,
+            "counts": await _counts(task.project_id),
+            "due_soon_cutoff": due_soon_cutoff(),
+        }
+        await _publish(request, "partials/task_event.html", {**context, "kind": "updated"})
+        return render(request, "partials/task_updated.html", context)
+
+
+class TaskMoveView(AsyncLoginRequiredMixin, DataVersionMixin, View):
+    async def post(self, request, task_id: int, direction: str):
+        if direction not in {"up", "down"}:
+            return HttpResponseBadRequest("Invalid direction")
+
+        task = await aget_object_or_404(user_tasks(request.user), id=task_id)
+        # Locks the task and its neighbours, so it stays a sync transaction.
+        neighbour = await sync_to_async(move)(task, direction)
+
+        if not getattr(request, "htmx", False):
+            if neighbour is not None:
+                await sync_to_async(events.publish)(request)
+            return redirect("main:dashboard")
+        if neighbour is None:
+            return HttpResponse("")
+        context = {
+            "task": task,
+            "neighbour": neighbour,
+            "direction": direction,
+            "due_soon_cutoff": due_soon_cutoff(),
+        }
+        await _publish(request, "partials/task_moved.html", context)
+        return render(request, "partials/task_moved.html", context)
+
+
+@sync_to_async
+def _save_counted(task, before, **kwargs) -> None:
+    with transaction.atomic():
+        task.save(**kwargs)
+        counters.apply((before, counters.snapshot(task)))
+
+
+async def _publish(request, template_name: str, context: dict) -> None:
+    # publish() registers an on-commit hook (and may NOTIFY), so it runs sync.
+    await sync_to_async(events.publish)(request, template_name, context)
+
+
+async def _counts(project_id: int) -> Project:
+    return await Project.objects.only("id", *counters.COUNTER_FIELDS).aget(id=project_id)
@@ -0,0 +1,128 @@
+import json
+from collections import Counter
+from dataclasses import dataclass, field
+
+from django.core.exceptions import BadRequest
+from django.db import transaction
+from django.utils import timezone
+
+from . import counters
+from .access import parse_id
+from .bulk import append_to_end, owned_tasks
+from .models import Project, Task
+from .ordering import move, previous
+
+BATCH_MAX_OPS = 200
+NAME_MAX_LENGTH = Task._meta.get_field("name").max_length
+
+
+@dataclass
+class Op:
+    kind: str  # "toggle", "move" or "rename"
+    task_id: int
+    direction: str = ""
+    name: str = ""
+
+
+@dataclass
+class Plan:
+    task_ids: list = field(default_factory=list)  # every task the batch names, first-seen order
+    toggles: list = field(default_factory=list)  # tasks whose done flag flips once
+    moves: dict = field(default_factory=dict)  # task id -> net steps, negative is up
+    renames: dict = field(default_factory=dict)  # task id -> final name
+
+
+@dataclass
+class BatchResult:
+    updated: list = field(default_factory=list)  # rows to re-render in place
+    placed: list = field(default_factory=list)  # (task, row above it) in list order
+    counts: list = field(default_factory=list)  # refreshed counters of touched projects
+
+
+def parse(raw) -> list[Op]:
+    # `raw` is a JSON list of {"op": ..., "task": id, "direction"/"name": ...}.
+    try:
+        items = json.loads(raw or "")
+    except json.JSONDecodeError as error:
+        raise BadRequest("Invalid batch") from error
+    if not isinstance(items, list) or not 0 < len(items) <= BATCH_MAX_OPS:
+        raise BadRequest("Invalid batch")
+    ops = []
+    for item in items:
+        if not isinstance(item, dict):
+            raise BadRequest("Invalid batch")
+        kind, task_id = item.get("op"), parse_id(item.get("task"), "Invalid task id")
+        if kind == "toggle":
+            ops.append(Op(kind, task_id))
+        elif kind == "move" and item.get("direction") in {"up", "down"}:
+            ops.append(Op(kind, task_id, direction=item["direction"]))
+        elif kind == "rename" and isinstance(item.get("name"), str):
+            name = item["name"].strip()
+            if not name or len(name) > NAME_MAX_LENGTH:
+                raise BadRequest("Invalid task name")
+            ops.append(Op(kind, task_id, name=name))
+        else:
+            raise BadRequest("Invalid batch operation")
+    return ops
+
+
+def coalesce(ops) -> Plan:
+    # Toggles cancel in pairs. A surviving toggle re-appends the task to the other
+    # list, so only moves made after it count; with no surviving toggle only moves
+    # made while the task sat in its original list do. Moves net out, last rename wins.
+    flips = Counter(op.task_id for op in ops if op.kind == "toggle")
+    seen = Counter()
+    plan = Plan(task_ids=list(dict.fromkeys(op.task_id for op in ops)))
+    for op in ops:
+        if op.kind == "toggle":
+            seen[op.task_id] += 1
+        elif op.kind == "move":
+            total, so_far = flips[op.task_id], seen[op.task_id]
+            if so_far == total if total % 2 else so_far % 2 == 0:
+                step = -1 if op.direction == "up" else 1
+                plan.moves[op.task_id] = plan.moves.get(op.task_id, 0) + step
+        else:
+            plan.renames[op.task_id] = op.name
+    plan.toggles = [task_id for task_id, total in flips.items() if total % 2]
+    plan.moves = {task_id: steps for task_id, steps in plan.moves.items() if steps}
+    return plan
+
+
+def apply(owner, plan: Plan) -> BatchResult:
+    # One transaction for the whole batch: toggles go first (one UPDATE per list),
+    # then the net moves, then renames in one bulk UPDATE.
+    moved = []
+    with transaction.atomic():
+        tasks = {task.id: task for task in owned_tasks(owner, plan.task_ids)}
+        before = {task_id: counters.snapshot(task) for task_id, task in tasks.items()}
+        toggled = [tasks[task_id] for task_id in plan.toggles]
+        # Split before either UPDATE: append_to_end() flips is_done on the instances.
+        reopen = [task for task in toggled if task.is_done]
+        finish = [task for task in toggled if not task.is_done]
+        append_to_end(reopen, False)
+        append_to_end(finish, True)
+        for task_id, steps in plan.moves.items():
+            task = tasks[task_id]
+            if move(task, "down" if steps > 0 else "up", abs(steps)) is not None:
+                moved.append(task)
+        renamed = [tasks[task_id] for task_id in plan.renames]
+        now = timezone.now()
+        for task in renamed:
+            task.name = plan.renames[task.id]
+            task.updated_at = now
+        Task.objects.bulk_update(renamed, ["name", "updated_at"])
+        counters.apply(*((before[task.id], counters.snapshot(task)) for task in toggled))
+
+    # In list order, so each moved row's anchor is already in place when it lands.
+    moved.sort(
+        key=lambda task: (task.is_done, task.priority, -task.created_at.timestamp(), -task.id)
+    )
+    return BatchResult(
+        updated=[task for task in tasks.values() if task not in moved],
+        placed=[(task, previous(task)) for task in moved],
+        counts=list(
+            Project.objects.filter(id__in={task.project_id for task in toggled}).only(
+                "id", *counters.COUNTER_FIELDS
+            )
+        ),
+    )
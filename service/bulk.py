@@ -0,0 +1,180 @@
+from collections import Counter
+from dataclasses import dataclass, field
+
+from django.db import transaction
+from django.db.models import BigIntegerField, Case, F, Value, When
+from django.http import Http404
+from django.utils import timezone
+
+from . import counters, sync
+from .access import user_tasks
+from .models import Project, Task, Tombstone
+from .ordering import PRIORITY_GAP, next_priority
+
+
+@dataclass
+class BulkResult:
+    updated: list = field(default_factory=list)  # rows to re-render in place
+    removed: list = field(default_factory=list)  # ids that left their list
+    moved: list = field(default_factory=list)  # rows appended to `target`
+    emptied: list = field(default_factory=list)  # projects left without tasks
+    target: Project | None = None
+    counts: list = field(default_factory=list)  # refreshed counters of touched projects
+
+
+# Every write that feeds counters.apply() reads its rows here, inside its transaction
+# and under FOR UPDATE, and takes `before` from them: concurrent writes to one task
+# then run one after the other instead of both applying a delta from the same stale
+# snapshot. Task rows are locked (in id order) before next_priority() locks a project.
+
+
+def owned_tasks(owner, ids) -> list[Task]:
+    # One query; any foreign or missing id fails the whole batch. Inside atomic().
+    tasks = list(
+        user_tasks(owner).select_for_update(of=("self",)).filter(id__in=ids).order_by("id")
+    )
+    if len(tasks) != len(set(ids)):
+        raise Http404("No Task matches the given query.")
+    return tasks
+
+
+def locked_task(owner, task_id: int) -> Task:
+    # Inside atomic(); the project comes along for the callers' responses.
+    task = (
+        user_tasks(owner)
+        .select_related("project")
+        .select_for_update(of=("self",))
+        .filter(id=task_id)
+        .first()
+    )
+    if task is None:
+        raise Http404("No Task matches the given query.")
+    return task
+
+
+def toggle_done(owner, task_id: int) -> Task:
+    with transaction.atomic():
+        task = locked_task(owner, task_id)
+        before = counters.snapshot(task)
+        task.is_done = not task.is_done
+        task.priority = next_priority(task.project_id)
+        task.save(update_fields=["is_done", "priority"])
+        counters.apply((before, counters.snapshot(task)))
+    return task
+
+
+def update_task(owner, task_id: int, values: dict) -> Task:
+    # `values` are a validated form's cleaned_data; only those columns are written.
+    with transaction.atomic():
+        task = locked_task(owner, task_id)
+        before = counters.snapshot(task)
+        for name, value in values.items():
+            setattr(task, name, value)
+        task.save(update_fields=list(values))
+        counters.apply((before, counters.snapshot(task)))
+    return task
+
+
+def delete_task(owner, task_id: int) -> Task:
+    with transaction.atomic():
+        task = locked_task(owner, task_id)
+        before = counters.snapshot(task)
+        task.delete()
+        counters.apply((before, None))
+        sync.bury(Tombstone.TASK, [(owner.id, task_id)])
+    return task
+
+
+def apply(owner, ids, action: str, deadline=None, target: Project | None = None) -> BulkResult:
+    result = BulkResult(target=target)
+    with transaction.atomic():
+        tasks = owned_tasks(owner, ids)
+        project_ids = {task.project_id for task in tasks}
+        before = {task.id: counters.snapshot(task) for task in tasks}
+        if action in {"done", "undone"}:
+            is_done = action == "done"
+            changed = [task for task in tasks if task.is_done != is_done]
+            append_to_end(changed, is_done)
+            result.updated = tasks
+        elif action == "deadline":
+            now = timezone.now()
+            Task.objects.filter(id__in=[task.id for task in tasks]).update(
+                deadline=deadline, updated_at=now
+            )
+            for task in tasks:
+                task.deadline = deadline
+                task.updated_at = now
+            result.updated = tasks
+        elif action == "delete":
+            Task.objects.filter(id__in=[task.id for task in tasks]).delete()
+            result.removed = [task.id for task in tasks]
+            sync.bury(Tombstone.TASK, [(owner.id, task.id) for task in tasks])
+        elif action == "move":
+            moving = [task for task in tasks if task.project_id != target.id]
+            for is_done in (False, True):
+                bucket = [task for task in moving if task.is_done == is_done]
+                append_to_end(bucket, is_done, project_id=target.id)
+            result.removed = [task.id for task in moving]
+            result.moved = moving
+            project_ids.add(target.id)
+        else:
+            raise ValueError(f"Unknown bulk action: {action}")
+
+        if result.removed:
+            sources = {task.project_id for task in tasks} - {getattr(target, "id", None)}
+            remaining = set(
+                Task.objects.filter(project_id__in=sources)
+                .order_by()
+                .values_list("project_id", flat=True)
+                .distinct()
+            )
+            result.emptied = list(Project.objects.filter(id__in=sources - remaining))
+        deleted = action == "delete"
+        counters.apply(
+            *((before[task.id], None if deleted else counters.snapshot(task)) for task in tasks)
+        )
+    result.counts = list(
+        Project.objects.filter(id__in=project_ids).only("id", *counters.COUNTER_FIELDS)
+    )
+    return result
+
+
+def append_to_end(tasks, is_done: bool, project_id: int | None = None) -> None:
+    # Appends `tasks` to the end of the `is_done` bucket of their own (or `project_id`'s)
+    # project in one UPDATE, keeping their current relative order.
+    if not tasks:
+        return
+    tasks = sorted(tasks, key=lambda task: (task.priority, -task.created_at.timestamp(), -task.id))
+    destination = {task.id: project_id or task.project_id for task in tasks}
+    # Lock the rows before next_priority() locks the destination projects.
+    list(Task.objects.select_for_update().filter(id__in=destination).values_list("id"))
+    slots = {
+        project: next_priority(project, count)
+        for project, count in Counter(destination.values()).items()
+    }
+    ranks = {}
+    for task in tasks:
+        ranks[task.id] = slots[destination[task.id]]
+        slots[destination[task.id]] += PRIORITY_GAP
+    now = timezone.now()
+    changes = {"is_done": is_done}
+    if project_id is not None:
+        changes["project_id"] = project_id
+    Task.objects.filter(id__in=ranks).update(
+        priority=Case(
+            *(When(id=task_id, then=Value(rank)) for task_id, rank in ranks.items()),
+            output_field=BigIntegerField(),
+        ),
+        # Tasks already in the target state keep their done_at (Task.save() rules).
+        done_at=Case(When(is_done=True, then=F("done_at")), default=Value(now))
+        if is_done
+        else None,
+        updated_at=now,
+        **changes,
+    )
+    for task in tasks:
+        task.priority = ranks[task.id]
+        task.done_at = (task.done_at or now) if is_done else None
+        task.updated_at = now
+        for name, value in changes.items():
+            setattr(task, name, value)
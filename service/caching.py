@@ -0,0 +1,147 @@
+import functools
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.template.loader import render_to_string
+from django.urls import get_script_prefix, reverse
+
+# Per-row links of task_row.html, reversed once and filled in with the task id:
+# five reverse() calls per row were most of a cold render.
+TASK_ROW_URLS = {
+    "toggle": ("service:task_toggle_done",),
+    "move_up": ("service:task_move", "up"),
+    "move_down": ("service:task_move", "down"),
+    "update": ("service:task_update",),
+    "delete": ("service:task_delete",),
+}
+_URL_MARK = "2147483647"  # stands in for the task id; matches the int converter
+
+_stats = {"hits": 0, "misses": 0}
+_stats_lock = threading.Lock()
+
+
+def stats() -> dict:
+    with _stats_lock:
+        return dict(_stats)
+
+
+def reset_stats() -> None:
+    with _stats_lock:
+        for key in _stats:
+            _stats[key] = 0
+
+
+def versions_shared() -> bool:
+    # False when several workers each keep their own LocMemCache: a write bumps the
+    # versions of one process only, so the others would keep serving stale data.
+    return settings.WEB_CONCURRENCY <= 1 or not isinstance(_cache(), LocMemCache)
+
+
+def user_version(user_id: int) -> int:
+    # Nanosecond timestamp of the user's last write; doubles as Last-Modified.
+    cache = _cache()
+    key = _user_version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_user_version(*user_ids: int) -> None:
+    def bump():
+        cache = _cache()
+        for user_id in user_ids:
+            key = _user_version_key(user_id)
+            cache.set(key, max(time.time_ns(), (cache.get(key) or 0) + 1), None)
+
+    transaction.on_commit(bump)
+
+
+def touch_listener(user_id: int, seconds: int) -> None:
+    # Presence of an open event stream for the user, in any process.
+    _cache().set(_listener_key(user_id), True, seconds)
+
+
+def has_listener(user_id: int) -> bool:
+    return _cache().get(_listener_key(user_id)) is not None
+
+
+def task_version(task) -> str:
+    # Digest of every field task_row.html renders; priority is deliberately left out.
+    return _digest(task.project_id, task.name, task.is_done, task.deadline)
+
+
+def render_task_row(task, due_soon_cutoff, oob: bool = False) -> str:
+    key = f"task-row:{task.id}:{task_version(task)}:{due_soon_cutoff}:{int(oob)}"
+    return _render(key, "partials/task_row.html", task_row_context(task, due_soon_cutoff, oob))
+
+
+def task_row_context(task, due_soon_cutoff, oob: bool = False) -> dict:
+    task_id = str(task.id)
+    urls = {
+        name: pattern.replace(_URL_MARK, task_id)
+        for name, pattern in _task_url_patterns(get_script_prefix()).items()
+    }
+    return {"task": task, "due_soon_cutoff": due_soon_cutoff, "oob": oob, "urls": urls}
+
+
+def project_header_version(project) -> str:
+    # Keyed by what the header shows, so a header cached before a write is never
+    # served after it.
+    return _digest(
+        project.name, project.open_count, project.done_count, project.due_soon_count
+    )
+
+
+def render_project_header(project) -> str:
+    key = f"project-header:{project.id}:{project_header_version(project)}"
+    return _render(key, "partials/project_header.html", {"project": project})
+
+
+def _render(key: str, template_name: str, context: dict) -> str:
+    cache = _cache()
+    html = cache.get(key)
+    if html is not None:
+        _count("hits")
+        return html
+    _count("misses")
+    html = render_to_string(template_name, context)
+    cache.set(key, html, settings.FRAGMENT_CACHE_TIMEOUT)
+    return html
+
+
+@functools.lru_cache(maxsize=8)
+def _task_url_patterns(script_prefix: str) -> dict:
+    # Keyed by the script prefix, which reverse() bakes into every URL.
+    return {
+        name: reverse(route, args=[_URL_MARK, *args])
+        for name, (route, *args) in TASK_ROW_URLS.items()
+    }
+
+
+def _count(name: str) -> None:
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def _digest(*values) -> str:
+    state = "\x1f".join(str(value) for value in values)
+    return hashlib.blake2b(state.encode(), digest_size=8).hexdigest()
+
+
+def _user_version_key(user_id: int) -> str:
+    return f"user-version:{user_id}"
+
+
+def _listener_key(user_id: int) -> str:
+    return f"events-listener:{user_id}"
+
+
+def _cache():
+    return caches[settings.FRAGMENT_CACHE_ALIAS]
@@ -0,0 +1,17 @@
+from django.core.checks import Tags, Warning, register
+
+from .caching import versions_shared
+
+
+@register(Tags.caches)
+def check_shared_versions(app_configs, **kwargs):
+    if versions_shared():
+        return []
+    return [
+        Warning(
+            "WEB_CONCURRENCY > 1 with a per-process LocMemCache: conditional GETs "
+            "(ETag/304) are turned off.",
+            hint="Set CACHE_URL to a Redis server shared by all workers.",
+            id="service.W001",
+        )
+    ]
@@ -0,0 +1,114 @@
+import time
+
+from django.conf import settings
+from django.db import connections, router, transaction
+
+from . import counters, sync
+from .bulk import append_to_end
+from .caching import bump_user_version
+from .models import Project, Task, TaskArchive, Tombstone
+
+
+def delete_project(project) -> None:
+    # "detach" is Task.project's SET_NULL: one UPDATE over all the project's tasks,
+    # leaving them as orphans for `reap_orphans`. "chunked" deletes the tasks first,
+    # PROJECT_DELETE_BATCH_SIZE per transaction, so no lock is held for long and
+    # (bar tasks added meanwhile) nothing is orphaned; the project row goes last.
+    if settings.PROJECT_DELETE_MODE == "chunked":
+        batch_size = settings.PROJECT_DELETE_BATCH_SIZE
+        for model in (Task, TaskArchive):
+            # A short chunk was the last one.
+            while _delete_chunk(model, project, batch_size) == batch_size:
+                pass
+    project_id = project.id
+    with transaction.atomic():
+        # The SET_NULL, done here so each orphan remembers whose it was.
+        Task.objects.filter(project=project).update(
+            project=None, orphan_owner_id=project.owner_id
+        )
+        project.delete()
+        # Also stands for any tasks the delete orphaned.
+        sync.bury(Tombstone.PROJECT, [(project.owner_id, project_id)])
+
+
+def orphans():
+    return Task.objects.filter(project__isnull=True)
+
+
+def purge_orphans(batch_size: int) -> int:
+    # One batch of ownerless tasks (then archived ones) deleted; returns how many.
+    for model in (Task, TaskArchive):
+        with transaction.atomic():
+            ids = list(
+                model.objects.select_for_update(skip_locked=True)
+                .filter(project__isnull=True)
+                .order_by("id")
+                .values_list("id", flat=True)[:batch_size]
+            )
+            if ids:
+                _delete_ids(model, ids)
+                return len(ids)
+    return 0
+
+
+def rehome_orphans(target: Project, batch_size: int) -> int:
+    # One batch of the target owner's orphans appended to `target`, keeping their
+    # order and done state; returns how many. Other users' orphans (and those
+    # detached before orphan_owner existed) are never moved, only purged.
+    with transaction.atomic():
+        tasks = list(
+            orphans()
+            .filter(orphan_owner=target.owner_id)
+            .select_for_update(skip_locked=True)
+            .order_by("id")[:batch_size]
+        )
+        if not tasks:
+            return 0
+        for is_done in (False, True):
+            append_to_end([task for task in tasks if task.is_done == is_done], is_done, target.id)
+        Task.objects.filter(id__in=[task.id for task in tasks]).update(orphan_owner=None)
+        counters.apply(*((None, counters.snapshot(task)) for task in tasks))
+        bump_user_version(target.owner_id)
+    return len(tasks)
+
+
+def drain(step, batch_size: int, limit: int | None = None, pause: float = 0.0, progress=None):
+    # Runs `step(batch_size)` until it returns 0 or `limit` rows were handled,
+    # sleeping `pause` seconds between batches to leave room for live traffic.
+    done = 0
+    while limit is None or done < limit:
+        size = batch_size if limit is None else min(batch_size, limit - done)
+        count = step(size)
+        if not count:
+            break
+        done += count
+        if progress is not None:
+            progress(done)
+        if pause:
+            time.sleep(pause)
+    return done
+
+
+def _delete_chunk(model, project, batch_size: int) -> int:
+    with transaction.atomic():
+        ids = list(
+            model.objects.filter(project=project)
+            .order_by("id")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        if not ids:
+            return 0
+        _delete_ids(model, ids)
+        if model is Task:
+            sync.bury(Tombstone.TASK, [(project.owner_id, task_id) for task_id in ids])
+    return len(ids)
+
+
+def _delete_ids(model, ids) -> None:
+    # One DELETE per batch, whatever receivers get attached to the model later:
+    # nothing references either table, so there is nothing for the collector to do.
+    db = router.db_for_write(model)
+    table = connections[db].ops.quote_name(model._meta.db_table)
+    placeholders = ", ".join(["%s"] * len(ids))
+    with connections[db].cursor() as cursor:
+        cursor.execute(f"DELETE FROM {table} WHERE id IN ({placeholders})", list(ids))
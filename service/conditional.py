@@ -0,0 +1,109 @@
+import hashlib
+from datetime import UTC, datetime
+from functools import wraps
+from inspect import isawaitable
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.db import DEFAULT_DB_ALIAS, router
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.decorators.http import condition
+
+from .caching import bump_user_version, user_version, versions_shared
+from .counters import due_soon_cutoff
+from .models import Task
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS", "TRACE")
+
+
+class DataVersionMixin:
+    # Any successful write bumps the user's data version, so every ETag handed out
+    # by conditional_get() for that user stops matching.
+    def dispatch(self, request, *args, **kwargs):
+        response = super().dispatch(request, *args, **kwargs)
+        if isawaitable(response):
+            return self._abump(request, response)
+        if _wrote(request, response):
+            bump_user_version(request.user.id)
+        return response
+
+    async def _abump(self, request, response):
+        response = await response
+        if _wrote(request, response):
+            await sync_to_async(bump_user_version)(request.user.id)
+        return response
+
+
+def conditional_get(view):
+    # ETag / Last-Modified from the user's data version: a repeat GET with nothing
+    # changed costs one cache lookup and returns 304 before the view touches the DB.
+    conditional = condition(etag_func=_etag, last_modified_func=_last_modified)(view)
+
+    if iscoroutinefunction(view):
+
+        @wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            return _finish(await conditional(request, *args, **kwargs))
+
+        return async_wrapper
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        return _finish(conditional(request, *args, **kwargs))
+
+    return wrapper
+
+
+def _finish(response):
+    if response.status_code not in (200, 304):
+        del response["ETag"]
+        del response["Last-Modified"]
+        return response
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ("Cookie", "HX-Request"))
+    return response
+
+
+def _wrote(request, response) -> bool:
+    return (
+        request.method not in SAFE_METHODS
+        and response.status_code < 400
+        and request.user.is_authenticated
+    )
+
+
+def _etag(request, *args, **kwargs):
+    if not _cacheable(request):
+        return None
+    # The CSRF secret is embedded in the page (base.html hx-headers), so a rotated
+    # token must not be answered from an old copy.
+    state = "\x1f".join(
+        str(value)
+        for value in (
+            request.user.id,
+            user_version(request.user.id),
+            due_soon_cutoff(),
+            request.get_full_path(),
+            request.headers.get("HX-Request", ""),
+            request.META.get("CSRF_COOKIE", ""),
+        )
+    )
+    return hashlib.blake2b(state.encode(), digest_size=16).hexdigest()
+
+
+def _last_modified(request, *args, **kwargs):
+    if not _cacheable(request):
+        return None
+    return datetime.fromtimestamp(user_version(request.user.id) / 1e9, tz=UTC)
+
+
+def _cacheable(request) -> bool:
+    # Without a CSRF cookie this response is about to issue one, and a 304 would
+    # leave the browser with a page whose token does not match the new cookie.
+    # A replica read may lag the user version it would be tagged with, and that
+    # ETag would then pin the stale copy; only primary reads are validated.
+    return (
+        request.user.is_authenticated
+        and "CSRF_COOKIE" in request.META
+        and versions_shared()
+        and router.db_for_read(Task) == DEFAULT_DB_ALIAS
+    )
@@ -0,0 +1,77 @@
+from collections import Counter, defaultdict
+
+from django.db.models import Count, F, Q, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .caching import bump_user_version
+from .models import Project
+
+COUNTER_FIELDS = ("open_count", "done_count", "due_soon_count")
+
+
+def due_soon_cutoff():
+    # Date threshold for "due soon" (today + 1 day).
+    return timezone.localdate() + timezone.timedelta(days=1)
+
+
+def snapshot(task):
+    # The task fields the counters depend on; None for "no task".
+    if task is None:
+        return None
+    return task.project_id, task.is_done, task.deadline
+
+
+def apply(*changes) -> None:
+    # `changes` are (before, after) snapshot pairs; deltas are folded per project
+    # and written with one F() UPDATE each. Call inside the write's transaction.
+    deltas = defaultdict(Counter)
+    cutoff = due_soon_cutoff()
+    for before, after in changes:
+        for state, sign in ((before, -1), (after, 1)):
+            if state is None or state[0] is None:
+                continue
+            for name in _counted(state, cutoff):
+                deltas[state[0]][name] += sign
+    for project_id, delta in deltas.items():
+        # Clamped at zero: drift must never fail a user's write (repair_counters fixes it).
+        updates = {
+            name: Greatest(F(name) + value, Value(0)) for name, value in delta.items() if value
+        }
+        if updates:
+            Project.objects.filter(id=project_id).update(**updates)
+
+
+def actual_counts(projects):
+    # The counters recomputed from Task rows (used by repair_counters).
+    cutoff = due_soon_cutoff()
+    return projects.annotate(
+        actual_open=Count("tasks", filter=Q(tasks__is_done=False)),
+        actual_done=Count("tasks", filter=Q(tasks__is_done=True)),
+        actual_due_soon=Count(
+            "tasks", filter=Q(tasks__is_done=False, tasks__deadline__lte=cutoff)
+        ),
+    )
+
+
+def repair(projects) -> list[Project]:
+    # Rewrites drifted counters for `projects` (a queryset); returns the fixed rows.
+    drifted = []
+    for project in actual_counts(projects):
+        actual = (project.actual_open, project.actual_done, project.actual_due_soon)
+        if actual != tuple(getattr(project, name) for name in COUNTER_FIELDS):
+            project.open_count, project.done_count, project.due_soon_count = actual
+            drifted.append(project)
+    Project.objects.bulk_update(drifted, COUNTER_FIELDS)
+    if drifted:
+        bump_user_version(*{project.owner_id for project in drifted})
+    return drifted
+
+
+def _counted(state, cutoff):
+    _project_id, is_done, deadline = state
+    if is_done:
+        return ["done_count"]
+    if deadline and deadline <= cutoff:
+        return ["open_count", "due_soon_count"]
+    return ["open_count"]
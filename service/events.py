@@ -0,0 +1,244 @@
+import asyncio
+import json
+import threading
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connections, transaction
+from django.template.loader import render_to_string
+from django.utils.module_loading import import_string
+
+from .caching import has_listener, touch_listener, user_version, versions_shared
+
+# Event (and data, since SSE drops events without data) that makes a tab refetch its grid.
+RELOAD = "reload"
+# PostgreSQL rejects NOTIFY payloads of 8000 bytes or more.
+NOTIFY_LIMIT = 7900
+
+_brokers = {}
+_brokers_lock = threading.Lock()
+
+
+def broker():
+    path = settings.EVENTS_BROKER
+    if not path:
+        vendor = connections[settings.EVENTS_DATABASE].vendor
+        path = f"service.events.{'Postgres' if vendor == 'postgresql' else 'InMemory'}Broker"
+    with _brokers_lock:
+        if path not in _brokers:
+            _brokers[path] = import_string(path)()
+        return _brokers[path]
+
+
+def publish(request, template_name: str | None = None, context: dict | None = None) -> None:
+    # Fans a write out to the user's other tabs after commit: an OOB fragment when
+    # `template_name` is given, otherwise a "reload" event that refetches the grid.
+    user_id = request.user.id
+    if not broker().listening(user_id):
+        return
+    message = {
+        "event": "task" if template_name else RELOAD,
+        "data": render_to_string(template_name, context) if template_name else RELOAD,
+        "origin": request.headers.get("X-Client-Id", ""),
+    }
+    transaction.on_commit(lambda: broker().publish(user_id, message))
+
+
+async def stream(user_id: int, client_id: str, last_event_id: str | None = None):
+    # SSE body for one tab. Frames carry the user's data version as their id, so a
+    # reconnect that missed writes (Last-Event-ID is stale) is told to reload.
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.EVENTS_STREAM_SECONDS
+    async with broker().subscribe(user_id, client_id) as subscription:
+        # Refreshed about once a heartbeat, busy or not, so publishers keep seeing us.
+        await sync_to_async(subscription.broker.touch)(user_id)
+        touched = loop.time()
+        version = await sync_to_async(user_version)(user_id)
+        yield "retry: 3000\n\n"
+        if last_event_id and last_event_id != str(version):
+            yield _frame(RELOAD, RELOAD, version)
+        while (remaining := deadline - loop.time()) > 0:
+            if loop.time() - touched >= settings.EVENTS_HEARTBEAT_SECONDS:
+                await sync_to_async(subscription.broker.touch)(user_id)
+                touched = loop.time()
+            timeout = min(settings.EVENTS_HEARTBEAT_SECONDS, remaining)
+            try:
+                message = await asyncio.wait_for(subscription.get(), timeout)
+            except TimeoutError:
+                version = await sync_to_async(user_version)(user_id)
+                yield f"id: {version}\n: ping\n\n"
+                continue
+            version = await sync_to_async(user_version)(user_id)
+            yield _frame(message["event"], message["data"], version)
+
+
+class Subscription:
+    # One tab's bounded queue; registered with its broker for the `async with` body.
+    def __init__(self, broker, user_id: int, client_id: str):
+        self.broker = broker
+        self.user_id = user_id
+        self.client_id = client_id
+        self.overflowed = False
+
+    async def __aenter__(self):
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=settings.EVENTS_QUEUE_SIZE)
+        self.broker._add(self)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.broker._remove(self)
+
+    def offer(self, message: dict) -> None:
+        # Runs on the subscriber's loop. A tab never gets its own writes back.
+        if self.client_id and message.get("origin") == self.client_id:
+            return
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # Backpressure: a reader this far behind drops its backlog and resyncs
+            # once, instead of the process buffering fragments for it.
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait({"event": RELOAD, "data": RELOAD})
+            self.overflowed = True
+
+    async def get(self) -> dict:
+        message = await self.queue.get()
+        if message["event"] == RELOAD:
+            self.overflowed = False
+        return message
+
+
+class InMemoryBroker:
+    # Single-process pub/sub; publishers may run on any thread.
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = defaultdict(set)
+
+    def listening(self, user_id: int) -> bool:
+        with self._lock:
+            return bool(self._subscriptions.get(user_id))
+
+    def touch(self, user_id: int) -> None:
+        # Local subscriptions are their own presence.
+        pass
+
+    def publish(self, user_id: int, message: dict) -> None:
+        self._deliver(user_id, message)
+
+    def subscribe(self, user_id: int, client_id: str = "") -> Subscription:
+        return Subscription(self, user_id, client_id)
+
+    def _add(self, subscription: Subscription) -> None:
+        with self._lock:
+            self._subscriptions[subscription.user_id].add(subscription)
+
+    def _remove(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscriptions = self._subscriptions[subscription.user_id]
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._subscriptions[subscription.user_id]
+
+    def _deliver(self, user_id: int, message: dict, loop=None) -> None:
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(user_id, ()))
+        for subscription in subscriptions:
+            if loop is not None and subscription.loop is not loop:
+                continue
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.offer, message)
+            except RuntimeError:
+                # The subscriber's loop is already closed; its __aexit__ cleans up.
+                pass
+
+
+class PostgresBroker(InMemoryBroker):
+    # Cross-process fan-out over LISTEN/NOTIFY: publish() is a pg_notify() on the
+    # regular connection, and one listening connection per event loop delivers to
+    # that loop's local subscribers while it has any.
+    channel = "service_events"
+
+    def __init__(self):
+        super().__init__()
+        self._listeners = {}
+
+    def listening(self, user_id: int) -> bool:
+        # Subscribers may live in other processes, so each open stream keeps a
+        # presence key alive in the shared cache. Per-process caches cannot see the
+        # other processes' keys; there every write is still published.
+        return not versions_shared() or has_listener(user_id)
+
+    def touch(self, user_id: int) -> None:
+        # Outlives a couple of missed heartbeats, not a closed tab by much.
+        touch_listener(user_id, 3 * settings.EVENTS_HEARTBEAT_SECONDS)
+
+    def publish(self, user_id: int, message: dict) -> None:
+        payload = json.dumps({"user": user_id, **message})
+        if len(payload.encode()) > NOTIFY_LIMIT:
+            payload = json.dumps(
+                {"user": user_id, "event": RELOAD, "data": RELOAD, "origin": message["origin"]}
+            )
+        with connections[settings.EVENTS_DATABASE].cursor() as cursor:
+            cursor.execute("SELECT pg_notify(%s, %s)", [self.channel, payload])
+
+    def _add(self, subscription: Subscription) -> None:
+        super()._add(subscription)
+        loop = subscription.loop
+        with self._lock:
+            listener = self._listeners.get(loop)
+            if listener is None or listener.done():
+                self._listeners[loop] = loop.create_task(self._listen(loop))
+
+    def _remove(self, subscription: Subscription) -> None:
+        super()._remove(subscription)
+        loop = subscription.loop
+        with self._lock:
+            if any(
+                other.loop is loop
+                for subscriptions in self._subscriptions.values()
+                for other in subscriptions
+            ):
+                return
+            listener = self._listeners.pop(loop, None)
+        if listener is not None:
+            listener.cancel()
+
+    async def _listen(self, loop) -> None:
+        import psycopg
+
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(
+                    **_connection_kwargs(), autocommit=True
+                ) as connection:
+                    await connection.execute(f"LISTEN {self.channel}")
+                    async for notify in connection.notifies():
+                        message = json.loads(notify.payload)
+                        self._deliver(message.pop("user"), message, loop)
+            except psycopg.OperationalError:
+                # Lost the listening connection: back off and listen again.
+                await asyncio.sleep(1)
+
+
+def _connection_kwargs() -> dict:
+    database = settings.DATABASES[settings.EVENTS_DATABASE]
+    kwargs = {
+        "dbname": database["NAME"],
+        "user": database.get("USER"),
+        "password": database.get("PASSWORD"),
+        "host": database.get("HOST"),
+        "port": database.get("PORT"),
+    }
+    return {key: value for key, value in kwargs.items() if value}
+
+
+def _frame(event: str, data: str, event_id=None) -> str:
+    lines = [] if event_id is None else [f"id: {event_id}"]
+    lines.append(f"event: {event}")
+    lines.extend(f"data: {line}" for line in data.splitlines())
+    return "\n".join(lines) + "\n\n"
@@ -3,6 +3,7 @@ from __future__ import annotations
 from django import forms
 from django.utils import timezone
 
+from .access import user_projects
 from .models import Project, Task
 
 
@@ -27,9 +28,7 @@ class ProjectForm(forms.ModelForm):
         self.owner = owner
 
     def clean_name(self):
-        name = (self.cleaned_data.get("name") or "").strip()
-        if not name:
-            raise forms.ValidationError("Project name is required.")
+        name = validate_project_name(self.cleaned_data.get("name"))
         if (
             self.owner
             and Project.objects.filter(owner=self.owner, name=name)
@@ -70,17 +69,63 @@ class TaskForm(forms.ModelForm):
         }
 
     def clean_name(self) -> str:
-        name = (self.cleaned_data.get("name") or "").strip()
-        if not name:
-            raise forms.ValidationError("Task name is required.")
-        return name
+        return validate_task_name(self.cleaned_data.get("name"))
+
+    def clean_deadline(self):
+        return validate_deadline(self.cleaned_data.get("deadline"))
+
+
+class TaskBulkForm(forms.Form):
+    action = forms.ChoiceField(
+        choices=[
+            ("done", "Mark done"),
+            ("undone", "Mark not done"),
+            ("delete", "Delete"),
+            ("deadline", "Set deadline"),
+            ("move", "Move to project"),
+        ]
+    )
+    deadline = forms.DateField(required=False)
+    project = forms.ModelChoiceField(queryset=Project.objects.none(), required=False)
+
+    def __init__(self, *args, owner=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields["project"].queryset = user_projects(owner)
 
     def clean_deadline(self):
-        deadline = self.cleaned_data.get("deadline")
-        if not deadline:
-            return deadline
+        return validate_deadline(self.cleaned_data.get("deadline"))
 
-        today = timezone.localdate()
-        if deadline < today:
-            raise forms.ValidationError("Deadline cannot be in the past.")
+    def clean(self):
+        cleaned_data = super().clean()
+        if cleaned_data.get("action") == "move" and not cleaned_data.get("project"):
+            self.add_error("project", "Choose a project to move the tasks to.")
+        return cleaned_data
+
+
+def validate_deadline(deadline):
+    if not deadline:
         return deadline
+
+    today = timezone.localdate()
+    if deadline < today:
+        raise forms.ValidationError("Deadline cannot be in the past.")
+    return deadline
+
+
+# Shared with the importer (service/transfer.py), which validates rows without forms.
+def validate_project_name(name) -> str:
+    name = (name or "").strip()
+    if not name:
+        raise forms.ValidationError("Project name is required.")
+    if len(name) > Project._meta.get_field("name").max_length:
+        raise forms.ValidationError("Project name is too long.")
+    return name
+
+
+def validate_task_name(name) -> str:
+    name = (name or "").strip()
+    if not name:
+        raise forms.ValidationError("Task name is required.")
+    if len(name) > Task._meta.get_field("name").max_length:
+        raise forms.ValidationError("Task name is too long.")
+    return name
@@ -0,0 +1,34 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from service.archive import archive_done
+from service.models import Task
+
+
+class Command(BaseCommand):
+    help = (
+        "Move tasks done for longer than --days into TaskArchive, one short transaction "
+        "per batch. Run daily to keep the hot Task table small."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=settings.TASK_ARCHIVE_AFTER_DAYS)
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--limit", type=int, default=None, help="Stop after this many tasks.")
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, days, batch_size, limit, dry_run, **options):
+        before = timezone.now() - timedelta(days=days)
+        if dry_run:
+            due = Task.objects.filter(
+                is_done=True, done_at__lt=before, project__isnull=False
+            ).count()
+            self.stdout.write(
+                f"{due} task(s) done before {before:%Y-%m-%d %H:%M} would be archived"
+            )
+            return
+        moved = archive_done(before, batch_size=batch_size, limit=limit)
+        self.stdout.write(self.style.SUCCESS(f"{moved} task(s) archived"))
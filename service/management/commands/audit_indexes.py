@@ -0,0 +1,91 @@
+import random
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from .replay_load import _plan, _read_mix
+
+DEFAULT_MIX = Path(settings.BASE_DIR) / "benchmarks" / "index_audit.jsonl"
+# Plan lines that mean "read the whole table" or "sort outside an index".
+FULL_SCAN = re.compile(r"Seq Scan on service_\w+|SCAN service_\w+$")
+SORT = re.compile(
+    r"(^|->\s+)(Incremental )?Sort\s+\(|USE TEMP B-TREE FOR (RIGHT PART OF )?ORDER BY"
+)
+EXPLAIN = {"postgresql": "EXPLAIN (ANALYZE, BUFFERS) ", "sqlite": "EXPLAIN QUERY PLAN "}
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay each request of a JSONL mix once as a seed_load user, then EXPLAIN every "
+        "query it sent to the service tables (EXPLAIN ANALYZE on PostgreSQL). Writes are "
+        "rolled back. Flags full table scans and sorts the indexes do not cover."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("mix", nargs="?", default=str(DEFAULT_MIX))
+        parser.add_argument("--prefix", default="load", help="Username prefix of seeded users.")
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument("--output", help="Also write the report here.")
+
+    def handle(self, *args, mix, prefix, seed, output, **options):
+        user = (
+            get_user_model().objects.filter(username__startswith=f"{prefix}-").order_by("id").first()
+        )
+        if user is None:
+            raise CommandError(f"No '{prefix}-*' users, run seed_load first.")
+        rng = random.Random(seed)
+        lines = [f"# vendor: {connection.vendor}"]
+        flagged = 0
+        for entry in _read_mix(mix):
+            name, method, path, data, headers = _plan(user, [entry], 1, rng)[0]
+            queries, status = _capture(user, method, path, data, headers)
+            lines += ["", f"== {name}: {method.upper()} {path} -> {status}"]
+            for sql, plan in queries:
+                issues = [
+                    line.strip()
+                    for line in plan
+                    if FULL_SCAN.search(line.strip()) or SORT.search(line.strip())
+                ]
+                flagged += bool(issues)
+                lines += ["", f"-- {sql}", *(f"   {line}" for line in plan)]
+                lines += [f"   !! {issue}" for issue in issues]
+        report = "\n".join(lines) + "\n"
+        self.stdout.write(report)
+        if output:
+            Path(output).write_text(report, encoding="utf-8")
+        self.stdout.write(self.style.SUCCESS(f"{flagged} query plan(s) flagged"))
+
+
+def _capture(user, method, path, data, headers):
+    # One request and its plans inside a transaction that is always rolled back,
+    # so writes are measured against the same data and leave nothing behind.
+    client = Client(raise_request_exception=False)
+    client.force_login(user)
+    with transaction.atomic():
+        with CaptureQueriesContext(connection) as captured:
+            response = getattr(client, method)(path, data, headers=headers)
+        plans = [
+            (query["sql"], _explain(query["sql"]))
+            for query in captured.captured_queries
+            if '"service_' in query["sql"] and not query["sql"].startswith(("SAVEPOINT", "RELEASE"))
+        ]
+        transaction.set_rollback(True)
+    return plans, response.status_code
+
+
+def _explain(sql):
+    prefix = EXPLAIN.get(connection.vendor, "EXPLAIN ")
+    try:
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(prefix + sql)
+            rows = cursor.fetchall()
+    except DatabaseError as error:
+        return [f"(not explained: {error})"]
+    # SQLite returns (id, parent, notused, detail); the others one text column.
+    return [row[-1] for row in rows]
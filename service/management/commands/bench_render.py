@@ -0,0 +1,60 @@
+import random
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+from django.template.loader import render_to_string
+
+from service.caching import task_row_context
+from service.models import Project, Task
+
+
+class Command(BaseCommand):
+    help = (
+        "Render partials/task_row.html for N unsaved tasks, bypassing the fragment cache "
+        "(the cost of a cold cache or a changed row), and report rows rendered per second. "
+        "Needs no database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tasks", type=int, nargs="+", default=[1000, 10000])
+        parser.add_argument("--repeat", type=int, default=3, help="Best of this many runs.")
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument("--output", help="Also write the report here.")
+
+    def handle(self, *args, tasks, repeat, seed, output, **options):
+        rng = random.Random(seed)
+        project = Project(id=1, name="Bench")
+        today = date.today()
+        cutoff = today + timedelta(days=1)
+        lines = [f"# repeat: best of {repeat}"]
+        for count in tasks:
+            rows = [_task(project, number, today, rng) for number in range(1, count + 1)]
+            context = {"project": project, "tasks": rows, "due_soon_cutoff": cutoff}
+            best = min(_time(context) for _ in range(repeat))
+            lines.append(f"{count} rows: {best * 1000:.1f} ms, {count / best:,.0f} rows/s")
+        report = "\n".join(lines) + "\n"
+        self.stdout.write(report)
+        if output:
+            Path(output).write_text(report, encoding="utf-8")
+
+
+def _task(project, number, today, rng):
+    deadline = today + timedelta(days=rng.randint(-3, 10)) if rng.random() < 0.3 else None
+    return Task(
+        id=number,
+        project=project,
+        name=f"Task {number}",
+        is_done=rng.random() < 0.3,
+        deadline=deadline,
+    )
+
+
+def _time(context):
+    started = time.perf_counter()
+    for task in context["tasks"]:
+        render_to_string(
+            "partials/task_row.html", task_row_context(task, context["due_soon_cutoff"])
+        )
+    return time.perf_counter() - started
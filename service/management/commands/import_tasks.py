@@ -0,0 +1,38 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from service.transfer import FORMATS, IMPORT_BATCH_SIZE, guess_format, import_records, read_records
+
+
+class Command(BaseCommand):
+    help = (
+        "Import tasks for one user from a CSV or NDJSON file in the export format. The file "
+        "is streamed; invalid rows are skipped and reported with their line numbers."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--user", required=True, help="Username that will own the tasks.")
+        parser.add_argument("--format", choices=sorted(FORMATS), help="Default: from the suffix.")
+        parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+
+    def handle(self, *args, path, user, format, batch_size, **options):
+        owner = get_user_model().objects.filter(username=user).first()
+        if owner is None:
+            raise CommandError(f"No user '{user}'.")
+        try:
+            stream = open(path, "rb")
+        except OSError as error:
+            raise CommandError(str(error)) from error
+        with stream:
+            records = read_records(stream, format or guess_format(path))
+            result = import_records(owner, records, batch_size=batch_size)
+        for line, message in result.errors:
+            self.stderr.write(f"line {line}: {message}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{result.tasks} task(s) imported from {result.rows} row(s), "
+                f"{result.projects} new project(s), {result.skipped} skipped "
+                f"in {result.seconds:.2f}s ({result.rows_per_second:.0f} rows/s)"
+            )
+        )
@@ -0,0 +1,21 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from service.sync import prune
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete sync tombstones older than --days. Clients whose cursor is older get "
+        "410 from /api/v1/sync/ and resync from scratch. Run daily."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=settings.SYNC_TOMBSTONE_DAYS)
+
+    def handle(self, *args, days, **options):
+        removed = prune(timezone.now() - timedelta(days=days))
+        self.stdout.write(self.style.SUCCESS(f"{removed} tombstone(s) pruned"))
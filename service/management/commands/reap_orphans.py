@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from service.cleanup import drain, orphans, purge_orphans, rehome_orphans
+from service.models import Project, TaskArchive
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete tasks left without a project (or, with --rehome-to, move the ones its "
+        "owner lost into that project), one short transaction per batch, sleeping "
+        "--sleep seconds in between. Safe to stop and rerun."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rehome-to", type=int, default=None, help="Move them into this project instead."
+        )
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--sleep", type=float, default=0.1, help="Pause between batches.")
+        parser.add_argument("--limit", type=int, default=None, help="Stop after this many tasks.")
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, rehome_to, batch_size, sleep, limit, dry_run, **options):
+        target = None
+        if rehome_to is not None:
+            target = Project.objects.filter(id=rehome_to).first()
+            if target is None:
+                raise CommandError(f"Project {rehome_to} does not exist.")
+        verb = "purged" if target is None else "re-homed"
+        if dry_run:
+            if target is None:
+                due = orphans().count()
+                due += TaskArchive.objects.filter(project__isnull=True).count()
+            else:
+                due = orphans().filter(orphan_owner=target.owner_id).count()
+            self.stdout.write(f"{due} orphaned task(s) would be {verb}")
+            return
+        if target is None:
+            step = purge_orphans
+        else:
+            # Only the target owner's orphans; archived ones stay put, as archive_tasks
+            # leaves them out as well.
+            def step(size):
+                return rehome_orphans(target, size)
+
+        done = drain(
+            step,
+            batch_size,
+            limit=limit,
+            pause=sleep,
+            progress=lambda count: self.stdout.write(f"{count} task(s) {verb} so far"),
+        )
+        self.stdout.write(self.style.SUCCESS(f"{done} orphaned task(s) {verb}"))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from service.ordering import PRIORITY_GAP, crowded_buckets, rebalance
+
+
+class Command(BaseCommand):
+    help = "Respace task priorities in buckets whose rank gaps are nearly exhausted."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--min-gap",
+            type=int,
+            default=PRIORITY_GAP // 32,
+            help="Rebalance buckets with two neighbours closer than this (default: %(default)s).",
+        )
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, min_gap, dry_run, **options):
+        buckets = list(crowded_buckets(min_gap))
+        for project_id, is_done in buckets:
+            label = f"project {project_id} ({'done' if is_done else 'open'})"
+            if dry_run:
+                self.stdout.write(f"would rebalance {label}")
+                continue
+            count = rebalance(project_id, is_done)
+            self.stdout.write(f"rebalanced {label}: {count} tasks")
+        self.stdout.write(self.style.SUCCESS(f"{len(buckets)} bucket(s) crowded"))
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from service.counters import repair
+from service.models import Project
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute Project.open_count/done_count/due_soon_count in batches and fix drift. "
+        "Run daily: due_soon_count also drifts as deadlines enter the due-soon window."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, batch_size, **options):
+        last_id = 0
+        checked = fixed = 0
+        while True:
+            ids = list(
+                Project.objects.filter(id__gt=last_id)
+                .order_by("id")
+                .values_list("id", flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            last_id = ids[-1]
+            drifted = repair(Project.objects.filter(id__in=ids))
+            checked += len(ids)
+            fixed += len(drifted)
+            for project in drifted:
+                self.stdout.write(f"fixed project {project.id}")
+        self.stdout.write(self.style.SUCCESS(f"{checked} project(s) checked, {fixed} fixed"))
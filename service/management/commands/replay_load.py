@@ -0,0 +1,253 @@
+import asyncio
+import json
+import random
+import threading
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connections
+from django.test import AsyncClient, Client
+
+from service.models import Task
+
+DEFAULT_MIX = Path(settings.BASE_DIR) / "benchmarks" / "request_mix.jsonl"
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay a weighted JSONL request mix against the app in-process, as users created "
+        "by seed_load, and report throughput and p50/p95/p99 latency per request kind. "
+        "--asgi drives the ASGI handler with one coroutine per worker instead of threads."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("mix", nargs="?", default=str(DEFAULT_MIX))
+        parser.add_argument("--requests", type=int, default=1000, help="Total requests.")
+        parser.add_argument("--concurrency", type=int, default=4, help="Worker threads.")
+        parser.add_argument("--prefix", default="load", help="Username prefix of seeded users.")
+        parser.add_argument("--seed", type=int)
+        parser.add_argument("--json", dest="json_path", help="Also write the report here.")
+        parser.add_argument(
+            "--asgi",
+            action="store_true",
+            help="Go through the ASGI handler (AsyncClient) instead of WSGI (Client).",
+        )
+        parser.add_argument(
+            "--close-connections",
+            action="store_true",
+            help=(
+                "End every request like the real handlers do (close_old_connections), so "
+                "the timings include connecting, or borrowing from the DB_POOL pool."
+            ),
+        )
+
+    def handle(
+        self,
+        *args,
+        mix,
+        requests,
+        concurrency,
+        prefix,
+        seed,
+        json_path,
+        asgi,
+        close_connections,
+        **options,
+    ):
+        entries = _read_mix(mix)
+        users = list(
+            get_user_model().objects.filter(username__startswith=f"{prefix}-").order_by("id")
+        )
+        if not users:
+            raise CommandError(f"No '{prefix}-*' users, run seed_load first.")
+        concurrency = max(1, concurrency)
+        rng = random.Random(seed)
+        seeds = [rng.random() for _ in range(concurrency)]
+        shares = [
+            requests // concurrency + (index < requests % concurrency)
+            for index in range(concurrency)
+        ]
+        workers = [users[index % len(users)] for index in range(concurrency)]
+        plans = [
+            _plan(user, entries, shares[index], random.Random(seeds[index]), index)
+            for index, user in enumerate(workers)
+        ]
+        results = []
+        lock = threading.Lock()
+
+        def worker(index):
+            try:
+                samples = _replay(workers[index], plans[index], close_connections)
+                with lock:
+                    results.extend(samples)
+            finally:
+                if concurrency > 1:
+                    connections.close_all()
+
+        async def coroutines():
+            samples = await asyncio.gather(
+                *(
+                    _areplay(user, plan, close_connections)
+                    for user, plan in zip(workers, plans, strict=True)
+                )
+            )
+            results.extend(sample for worker_samples in samples for sample in worker_samples)
+
+        started = time.perf_counter()
+        if asgi:
+            async_to_sync(coroutines)()
+        elif concurrency == 1:
+            worker(0)
+        else:
+            threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        elapsed = time.perf_counter() - started
+
+        report = _report(results, elapsed)
+        for name, row in report["endpoints"].items():
+            self.stdout.write(
+                f"{name:<20} {row['count']:>6} req  {row['errors']:>4} err  "
+                f"p50 {row['p50']:>7.1f}ms  p95 {row['p95']:>7.1f}ms  p99 {row['p99']:>7.1f}ms"
+            )
+        report["handler"] = "asgi" if asgi else "wsgi"
+        report["async_views"] = settings.SERVICE_ASYNC_VIEWS
+        report["connections"] = _connection_mode(close_connections)
+        if json_path:
+            Path(json_path).write_text(json.dumps(report, indent=2), encoding="utf-8")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{report['handler'].upper()}: "
+                f"{report['requests']} request(s) in {elapsed:.2f}s, "
+                f"{report['throughput']:.1f} req/s, p95 {report['p95']:.1f}ms"
+            )
+        )
+
+
+def _read_mix(path):
+    try:
+        lines = Path(path).read_text(encoding="utf-8").splitlines()
+    except OSError as error:
+        raise CommandError(f"Cannot read request mix: {error}") from error
+    entries = []
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            entry = json.loads(line)
+        except json.JSONDecodeError as error:
+            raise CommandError(f"{path}:{number}: {error}") from error
+        if entry.get("method", "GET").upper() not in ("GET", "POST") or "path" not in entry:
+            raise CommandError(f"{path}:{number}: needs a path and a GET or POST method.")
+        entries.append(entry)
+    if not entries:
+        raise CommandError(f"{path} has no requests.")
+    return entries
+
+
+def _plan(user, entries, count, rng, worker=0):
+    # Draws a worker's requests up front, so both handlers replay the same sequence.
+    # Placeholders: {project} / {task} pick one of the user's rows, {n} is a serial.
+    ids = Task.objects.filter(project__owner=user).values_list("project_id", "id")
+    projects = sorted({project_id for project_id, _ in ids})
+    tasks = [task_id for _, task_id in ids]
+    weights = [entry.get("weight", 1) for entry in entries]
+    plan = []
+    for serial in range(count):
+        entry = rng.choices(entries, weights)[0]
+
+        def fill(value, serial=serial):
+            if isinstance(value, list):
+                return [fill(item) for item in value]
+            if not isinstance(value, str):
+                return value
+            if "{project}" in value and projects:
+                value = value.replace("{project}", str(rng.choice(projects)))
+            if "{task}" in value and tasks:
+                value = value.replace("{task}", str(rng.choice(tasks)))
+            return value.replace("{n}", f"{worker}-{serial}")
+
+        method = entry.get("method", "GET").lower()
+        data = {key: fill(value) for key, value in entry.get("data", {}).items()}
+        headers = {"HX-Request": "true"} if entry.get("htmx") else {}
+        name = entry.get("name") or f"{method.upper()} {entry['path']}"
+        plan.append((name, method, fill(entry["path"]), data, headers))
+    return plan
+
+
+def _replay(user, plan, close_connections=False):
+    client = Client(raise_request_exception=False)
+    client.force_login(user)
+    samples = []
+    for name, method, path, data, headers in plan:
+        started = time.perf_counter()
+        response = getattr(client, method)(path, data, headers=headers)
+        if close_connections:
+            close_old_connections()
+        samples.append((name, response.status_code, (time.perf_counter() - started) * 1000))
+    return samples
+
+
+async def _areplay(user, plan, close_connections=False):
+    client = AsyncClient(raise_request_exception=False)
+    await client.aforce_login(user)
+    samples = []
+    for name, method, path, data, headers in plan:
+        started = time.perf_counter()
+        response = await getattr(client, method)(path, data, headers=headers)
+        if close_connections:
+            await sync_to_async(close_old_connections)()
+        samples.append((name, response.status_code, (time.perf_counter() - started) * 1000))
+    return samples
+
+
+def _report(samples, elapsed):
+    by_name = defaultdict(list)
+    statuses = Counter()
+    for name, status, ms in samples:
+        by_name[name].append((status, ms))
+        statuses[status] += 1
+    endpoints = {}
+    for name, rows in sorted(by_name.items()):
+        times = sorted(ms for _, ms in rows)
+        endpoints[name] = {
+            "count": len(rows),
+            "errors": sum(1 for status, _ in rows if status >= 400),
+            **{f"p{q}": _percentile(times, q) for q in (50, 95, 99)},
+        }
+    times = sorted(ms for _, _, ms in samples)
+    return {
+        "requests": len(samples),
+        "seconds": round(elapsed, 3),
+        "throughput": len(samples) / elapsed if elapsed else 0.0,
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+        **{f"p{q}": _percentile(times, q) for q in (50, 95, 99)},
+        "endpoints": endpoints,
+    }
+
+
+def _connection_mode(close_connections):
+    # The test client keeps one connection open across requests unless asked not to.
+    database = connections["default"].settings_dict
+    if not close_connections:
+        return "kept open"
+    if database["OPTIONS"].get("pool"):
+        return "pool"
+    if database["CONN_MAX_AGE"]:
+        return f"persistent {database['CONN_MAX_AGE']}s"
+    return "per request"
+
+
+def _percentile(values, q):
+    # Nearest-rank percentile of an already sorted list.
+    if not values:
+        return 0.0
+    rank = max(1, -(-len(values) * q // 100))
+    return values[int(rank) - 1]
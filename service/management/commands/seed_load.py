@@ -0,0 +1,62 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from service.seeding import seed_projects, seed_users
+
+
+class Command(BaseCommand):
+    help = "Bulk-insert synthetic users, projects and tasks for load testing."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=10)
+        parser.add_argument("--projects", type=int, default=20, help="Projects per user.")
+        parser.add_argument("--tasks", type=int, default=50, help="Tasks per project.")
+        parser.add_argument("--done-ratio", type=float, default=0.3)
+        parser.add_argument(
+            "--deadline-ratio",
+            type=float,
+            default=0.5,
+            help="Share of tasks with a deadline (default: %(default)s).",
+        )
+        parser.add_argument(
+            "--deadline-days",
+            type=int,
+            default=14,
+            help="Deadlines spread from two days overdue to this many days ahead.",
+        )
+        parser.add_argument("--prefix", default="load", help="Username prefix.")
+        parser.add_argument("--password", default="load12345")
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--seed", type=int, help="Random seed for reproducible data.")
+
+    def handle(self, *args, **options):
+        for ratio in ("done_ratio", "deadline_ratio"):
+            if not 0 <= options[ratio] <= 1:
+                raise CommandError(f"--{ratio.replace('_', '-')} must be between 0 and 1.")
+        rng = random.Random(options["seed"])
+        started = time.perf_counter()
+        users = seed_users(
+            options["prefix"], options["users"], options["password"], options["batch_size"]
+        )
+        for user in users:
+            seed_projects(
+                user,
+                options["projects"],
+                options["tasks"],
+                done_ratio=options["done_ratio"],
+                deadline_ratio=options["deadline_ratio"],
+                deadline_days=options["deadline_days"],
+                batch_size=options["batch_size"],
+                rng=rng,
+            )
+            self.stdout.write(f"seeded {user.username}")
+        elapsed = time.perf_counter() - started
+        tasks = len(users) * options["projects"] * options["tasks"]
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{len(users)} user(s), {len(users) * options['projects']} project(s), "
+                f"{tasks} task(s) in {elapsed:.1f}s"
+            )
+        )
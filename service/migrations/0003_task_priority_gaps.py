@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:50
+
+from django.db import migrations, models
+from django.db.models import F
+
+PRIORITY_GAP = 1024
+
+
+def spread_priorities(apps, schema_editor):
+    Task = apps.get_model('service', 'Task')
+    Task.objects.update(priority=F('priority') * PRIORITY_GAP)
+
+
+def squash_priorities(apps, schema_editor):
+    Task = apps.get_model('service', 'Task')
+    Task.objects.update(priority=F('priority') / PRIORITY_GAP)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('service', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='task',
+            name='priority',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.RunPython(spread_priorities, squash_priorities),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['project', 'is_done', 'priority'], name='service_tas_project_c228a0_idx'),
+        ),
+    ]
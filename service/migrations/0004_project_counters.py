@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:55
+
+import datetime
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+
+def backfill_counters(apps, schema_editor):
+    Project = apps.get_model('service', 'Project')
+    Task = apps.get_model('service', 'Task')
+    cutoff = timezone.localdate() + datetime.timedelta(days=1)
+
+    def count(**filters):
+        tasks = (
+            Task.objects.filter(project=OuterRef('pk'), **filters)
+            .order_by()
+            .values('project')
+            .annotate(n=Count('id'))
+            .values('n')
+        )
+        return Coalesce(Subquery(tasks), 0)
+
+    Project.objects.update(
+        open_count=count(is_done=False),
+        done_count=count(is_done=True),
+        due_soon_count=count(is_done=False, deadline__lte=cutoff),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('service', '0003_task_priority_gaps'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='done_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='due_soon_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='open_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
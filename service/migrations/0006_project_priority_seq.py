@@ -0,0 +1,32 @@
+from django.db import migrations, models
+from django.db.models import Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_priority_seq(apps, schema_editor):
+    Project = apps.get_model('service', 'Project')
+    Task = apps.get_model('service', 'Task')
+    top = (
+        Task.objects.filter(project=OuterRef('pk'))
+        .order_by()
+        .values('project')
+        .annotate(top=Max('priority'))
+        .values('top')
+    )
+    Project.objects.update(priority_seq=Coalesce(Subquery(top), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('service', '0005_task_name_trigram'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='priority_seq',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_priority_seq, migrations.RunPython.noop),
+    ]
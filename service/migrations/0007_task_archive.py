@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def backfill_done_at(apps, schema_editor):
+    # The real completion time was never stored. Starting the clock now means nothing
+    # is archived until it has been done for the full archive age after this deploy.
+    Task = apps.get_model('service', 'Task')
+    Task.objects.filter(is_done=True, done_at__isnull=True).update(done_at=timezone.now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('service', '0006_project_priority_seq'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskArchive',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=255)),
+                ('deadline', models.DateField(blank=True, null=True)),
+                ('created_at', models.DateTimeField()),
+                ('done_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='done_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_done_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('is_done', True)), fields=['done_at'], name='service_task_done_at_idx'),
+        ),
+        migrations.AddField(
+            model_name='taskarchive',
+            name='project',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_tasks', to='service.project'),
+        ),
+        migrations.AddIndex(
+            model_name='taskarchive',
+            index=models.Index(fields=['project', '-done_at', '-id'], name='service_archive_project_idx'),
+        ),
+    ]
@@ -0,0 +1,64 @@
+from django.conf import settings
+from django.db import migrations, models
+
+# New indexes are built before the ones they replace are dropped, so the task list
+# is never left without an index. (project, is_done) and (project, is_done, priority)
+# are both prefixes of service_task_list_idx.
+ADDED = [
+    ('project', models.Index(fields=['owner', '-created_at', '-id'], name='service_project_owner_idx')),
+    ('task', models.Index(fields=['project', 'is_done', 'priority', '-created_at', '-id'], name='service_task_list_idx')),
+    ('task', models.Index(condition=models.Q(('deadline__isnull', False), ('is_done', False)), fields=['project', 'deadline'], name='service_task_open_deadline_idx')),
+]
+REMOVED = [
+    ('task', models.Index(fields=['project', 'is_done'], name='service_tas_project_a88fde_idx')),
+    ('task', models.Index(fields=['project', 'is_done', 'priority'], name='service_tas_project_c228a0_idx')),
+]
+
+
+def _create(apps, schema_editor, indexes):
+    for model_name, index in indexes:
+        model = apps.get_model('service', model_name)
+        if schema_editor.connection.vendor == 'postgresql':
+            # CONCURRENTLY keeps the table writable while a large index builds.
+            schema_editor.execute(index.create_sql(model, schema_editor, concurrently=True))
+        else:
+            schema_editor.add_index(model, index)
+
+
+def _drop(apps, schema_editor, indexes):
+    for model_name, index in indexes:
+        model = apps.get_model('service', model_name)
+        if schema_editor.connection.vendor == 'postgresql':
+            schema_editor.execute(index.remove_sql(model, schema_editor, concurrently=True))
+        else:
+            schema_editor.remove_index(model, index)
+
+
+def forwards(apps, schema_editor):
+    _create(apps, schema_editor, ADDED)
+    _drop(apps, schema_editor, REMOVED)
+
+
+def backwards(apps, schema_editor):
+    _create(apps, schema_editor, REMOVED)
+    _drop(apps, schema_editor, ADDED)
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction.
+    atomic = False
+
+    dependencies = [
+        ('service', '0007_task_archive'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[migrations.RunPython(forwards, backwards)],
+            state_operations=[
+                *(migrations.AddIndex(model_name=model_name, index=index) for model_name, index in ADDED),
+                *(migrations.RemoveIndex(model_name=model_name, name=index.name) for model_name, index in REMOVED),
+            ],
+        ),
+    ]
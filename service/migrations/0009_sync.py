@@ -0,0 +1,75 @@
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+# Existing rows get the migration time as updated_at (the schema editor's one-off
+# default for auto_now), so a client's first sync after the deploy receives them all.
+# The indexes on the two large tables are built CONCURRENTLY on PostgreSQL, as in 0008.
+ADDED = [
+    ('project', models.Index(fields=['owner', 'updated_at', 'id'], name='service_project_sync_idx')),
+    ('task', models.Index(fields=['project', 'updated_at', 'id'], name='service_task_sync_idx')),
+]
+
+
+def forwards(apps, schema_editor):
+    for model_name, index in ADDED:
+        model = apps.get_model('service', model_name)
+        if schema_editor.connection.vendor == 'postgresql':
+            schema_editor.execute(index.create_sql(model, schema_editor, concurrently=True))
+        else:
+            schema_editor.add_index(model, index)
+
+
+def backwards(apps, schema_editor):
+    for model_name, index in ADDED:
+        model = apps.get_model('service', model_name)
+        if schema_editor.connection.vendor == 'postgresql':
+            schema_editor.execute(index.remove_sql(model, schema_editor, concurrently=True))
+        else:
+            schema_editor.remove_index(model, index)
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction.
+    atomic = False
+
+    dependencies = [
+        ('service', '0008_dashboard_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('project', 'Project'), ('task', 'Task')], max_length=10)),
+                ('object_id', models.BigIntegerField()),
+                ('deleted_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [
+                    models.Index(fields=['owner', 'deleted_at', 'id'], name='service_tombstone_sync_idx'),
+                    models.Index(fields=['deleted_at'], name='service_tombstone_age_idx'),
+                ],
+            },
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.SeparateDatabaseAndState(
+            database_operations=[migrations.RunPython(forwards, backwards)],
+            state_operations=[
+                migrations.AddIndex(model_name=model_name, index=index) for model_name, index in ADDED
+            ],
+        ),
+    ]
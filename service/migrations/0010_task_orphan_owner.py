@@ -0,0 +1,49 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# The column is nullable with no default, so adding it does not rewrite the table;
+# the partial index is built CONCURRENTLY on PostgreSQL, as in 0008 and 0009.
+INDEX = models.Index(
+    fields=['orphan_owner', 'id'],
+    condition=models.Q(orphan_owner__isnull=False),
+    name='service_task_orphan_idx',
+)
+
+
+def forwards(apps, schema_editor):
+    model = apps.get_model('service', 'task')
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(INDEX.create_sql(model, schema_editor, concurrently=True))
+    else:
+        schema_editor.add_index(model, INDEX)
+
+
+def backwards(apps, schema_editor):
+    model = apps.get_model('service', 'task')
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(INDEX.remove_sql(model, schema_editor, concurrently=True))
+    else:
+        schema_editor.remove_index(model, INDEX)
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction.
+    atomic = False
+
+    dependencies = [
+        ('service', '0009_sync'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='orphan_owner',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.SeparateDatabaseAndState(
+            database_operations=[migrations.RunPython(forwards, backwards)],
+            state_operations=[migrations.AddIndex(model_name='task', index=INDEX)],
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 
 from users.models import User
 
@@ -11,9 +12,22 @@ class Project(models.Model):
     )
     name = models.CharField(max_length=120)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Maintained incrementally by service.counters; repaired by `repair_counters`.
+    open_count = models.PositiveIntegerField(default=0)
+    done_count = models.PositiveIntegerField(default=0)
+    due_soon_count = models.PositiveIntegerField(default=0)
+    # Last rank handed out by service.ordering.next_priority.
+    priority_seq = models.BigIntegerField(default=0)
+    # Cursor column of the delta sync (service/sync.py); counter updates leave it alone.
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # The dashboard's keyset over a user's projects (PROJECT_ORDERING).
+            models.Index(fields=["owner", "-created_at", "-id"], name="service_project_owner_idx"),
+            models.Index(fields=["owner", "updated_at", "id"], name="service_project_sync_idx"),
+        ]
         constraints = [
             models.UniqueConstraint(
                 fields=["owner", "name"],
@@ -35,16 +49,112 @@ class Task(models.Model):
     )
     name = models.CharField(max_length=255)
     is_done = models.BooleanField(default=False)
-    priority = models.PositiveSmallIntegerField(default=0)
+    priority = models.BigIntegerField(default=0)
     deadline = models.DateField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # When the task was last marked done; archive_tasks moves old ones to TaskArchive.
+    done_at = models.DateTimeField(null=True, blank=True)
+    # Cursor column of the delta sync (service/sync.py). auto_now only covers save();
+    # every QuerySet.update()/bulk_update() of client-visible fields sets it too.
+    updated_at = models.DateTimeField(auto_now=True)
+    # Set when the task's project is deleted in "detach" mode (service/cleanup.py), so
+    # `reap_orphans --rehome-to` only re-homes a user's orphans into their own project.
+    orphan_owner = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="+",
+        db_index=False,
+    )
 
     class Meta:
         ordering = ["is_done", "priority", "-created_at"]
+        # Shaped by `manage.py audit_indexes` (plans in benchmarks/index_audit_*.txt).
         indexes = [
             models.Index(fields=["project", "priority"]),
-            models.Index(fields=["project", "is_done"]),
+            # Exactly Meta.ordering plus the keyset tie-breaker: a card's window and
+            # move/reorder neighbour lookups read the index in order, with no sort.
+            models.Index(
+                fields=["project", "is_done", "priority", "-created_at", "-id"],
+                name="service_task_list_idx",
+            ),
+            # Open tasks with a deadline only, for due-soon counts.
+            models.Index(
+                fields=["project", "deadline"],
+                condition=models.Q(is_done=False, deadline__isnull=False),
+                name="service_task_open_deadline_idx",
+            ),
+            models.Index(
+                fields=["done_at"],
+                condition=models.Q(is_done=True),
+                name="service_task_done_at_idx",
+            ),
+            # A sync reads each project's changed rows in cursor order.
+            models.Index(fields=["project", "updated_at", "id"], name="service_task_sync_idx"),
+            # Orphans only, so the index stays small on a table where the column is null.
+            models.Index(
+                fields=["orphan_owner", "id"],
+                condition=models.Q(orphan_owner__isnull=False),
+                name="service_task_orphan_idx",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return self.name
+
+    def save(self, *args, **kwargs):
+        # done_at follows is_done on every save (QuerySet updates set it themselves).
+        self.done_at = (self.done_at or timezone.now()) if self.is_done else None
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            extra = {"updated_at", "done_at"} if "is_done" in update_fields else {"updated_at"}
+            kwargs["update_fields"] = {*update_fields, *extra}
+        super().save(*args, **kwargs)
+
+
+class TaskArchive(models.Model):
+    # Cold storage for long-done tasks; the id is the original Task id, so a restore
+    # brings the task back under the same id.
+    id = models.BigIntegerField(primary_key=True)
+    project = models.ForeignKey(
+        Project,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="archived_tasks",
+    )
+    name = models.CharField(max_length=255)
+    deadline = models.DateField(null=True, blank=True)
+    created_at = models.DateTimeField()
+    done_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["project", "-done_at", "-id"], name="service_archive_project_idx")
         ]
 
     def __str__(self) -> str:
         return self.name
+
+
+class Tombstone(models.Model):
+    # A deleted (or archived) row, kept so the delta sync can tell clients to drop
+    # it. A project's tombstone also stands for the tasks it took with it.
+    PROJECT = "project"
+    TASK = "task"
+
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+")
+    kind = models.CharField(max_length=10, choices=[(PROJECT, "Project"), (TASK, "Task")])
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["owner", "deleted_at", "id"], name="service_tombstone_sync_idx"),
+            models.Index(fields=["deleted_at"], name="service_tombstone_age_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.kind} {self.object_id}"
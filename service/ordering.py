@@ -0,0 +1,196 @@
+from django.db import connection, transaction
+from django.db.models import BigIntegerField, Case, F, Value, When, Window
+from django.db.models.functions import Greatest, Lag
+from django.utils import timezone
+
+from .models import Project, Task
+from .pagination import TASK_ORDERING, keyset_filter
+
+# Ranks are spaced PRIORITY_GAP apart so a move only rewrites the moved task.
+PRIORITY_GAP = 1024
+
+_BEFORE_ORDERING = tuple(
+    field[1:] if field.startswith("-") else f"-{field}" for field in TASK_ORDERING
+)
+
+
+def next_priority(project_id: int, count: int = 1) -> int:
+    # Reserves `count` rank slots after every task of the project and returns the
+    # first. One UPDATE ... RETURNING on the project's sequence row: concurrent
+    # appends queue on that row, so no two ever get the same rank. The MAX()
+    # subquery keeps it ahead of ranks written elsewhere (moves, imports, seeds).
+    # Inside a transaction, call it after locking task rows: writers lock tasks
+    # before their project row (counters.apply does too), never the other way round.
+    project_table = Project._meta.db_table
+    task_table = Task._meta.db_table
+    greatest = "GREATEST" if connection.vendor == "postgresql" else "MAX"
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            UPDATE {project_table}
+            SET priority_seq = {greatest}(
+                priority_seq,
+                COALESCE((SELECT MAX(priority) FROM {task_table} WHERE project_id = %s), 0)
+            ) + %s
+            WHERE id = %s
+            RETURNING priority_seq
+            """,
+            [project_id, count * PRIORITY_GAP, project_id],
+        )
+        row = cursor.fetchone()
+    if row is None:
+        raise Project.DoesNotExist(f"Project {project_id} does not exist.")
+    return row[0] - (count - 1) * PRIORITY_GAP
+
+
+def move(task: Task, direction: str, steps: int = 1) -> Task | None:
+    # Moves `task` `steps` places up/down (stopping at the edge), locking only it and
+    # the rows it passes. Returns the last neighbour it jumped over, or None if it is
+    # already at the edge.
+    ordering = _BEFORE_ORDERING if direction == "up" else TASK_ORDERING
+
+    def locate(current):
+        neighbours = list(
+            _bucket(current)
+            .select_for_update()
+            .filter(keyset_filter(ordering, current))
+            .order_by(*ordering)[: steps + 1]
+        )
+        if not neighbours:
+            return None
+        index = min(steps, len(neighbours)) - 1
+        beyond = neighbours[index + 1] if len(neighbours) > index + 1 else None
+        return neighbours[index], beyond, direction
+
+    return _place(task, locate)
+
+
+def previous(task: Task) -> Task | None:
+    # The row right above `task` in its project's list (either bucket).
+    return (
+        Task.objects.filter(project_id=task.project_id)
+        .filter(keyset_filter(_BEFORE_ORDERING, task))
+        .order_by(*_BEFORE_ORDERING)
+        .first()
+    )
+
+
+def place_after(task: Task, anchor: Task | None) -> None:
+    # Drops `task` right after `anchor` (or at the top of its bucket when None).
+    def locate(current):
+        others = _bucket(current).exclude(pk=current.pk).select_for_update()
+        if anchor is None:
+            first = others.order_by(*TASK_ORDERING).first()
+            return (first, None, "up") if first else None
+        anchor_row = others.get(pk=anchor.pk)
+        successor = (
+            others.filter(keyset_filter(TASK_ORDERING, anchor_row)).order_by(*TASK_ORDERING).first()
+        )
+        return anchor_row, successor, "down"
+
+    _place(task, locate)
+
+
+def reorder(project_id: int, ids: list[int]) -> bool:
+    # Applies a client-side order in one UPDATE ... CASE: the listed tasks swap
+    # their existing rank slots, so unlisted tasks keep their positions.
+    if len(set(ids)) != len(ids):
+        return False
+    with transaction.atomic():
+        rows = list(
+            Task.objects.select_for_update()
+            .filter(project_id=project_id, id__in=ids)
+            .values_list("is_done", "priority")
+        )
+        buckets = {is_done for is_done, _priority in rows}
+        if len(rows) != len(ids) or len(buckets) != 1:
+            return False
+        slots = sorted(priority for _is_done, priority in rows)
+        if len(set(slots)) != len(slots):
+            rebalance(project_id, buckets.pop())
+            slots = sorted(
+                Task.objects.filter(id__in=ids).values_list("priority", flat=True)
+            )
+        ranks = zip(ids, slots, strict=True)
+        Task.objects.filter(id__in=ids).update(
+            priority=Case(
+                *(When(id=task_id, then=Value(slot)) for task_id, slot in ranks),
+                output_field=BigIntegerField(),
+            ),
+            updated_at=timezone.now(),
+        )
+    return True
+
+
+def rebalance(project_id: int, is_done: bool) -> int:
+    # Respaces a whole bucket; only needed when two neighbours run out of gap.
+    with transaction.atomic():
+        tasks = list(
+            Task.objects.select_for_update()
+            .filter(project_id=project_id, is_done=is_done)
+            .order_by(*TASK_ORDERING)
+            .only("id", "priority")
+        )
+        now = timezone.now()
+        for index, task in enumerate(tasks, start=1):
+            task.priority = index * PRIORITY_GAP
+            task.updated_at = now
+        Task.objects.bulk_update(tasks, ["priority", "updated_at"], batch_size=500)
+        # Respacing can raise the top rank; appends must still land after it.
+        Project.objects.filter(id=project_id).update(
+            priority_seq=Greatest(F("priority_seq"), Value(len(tasks) * PRIORITY_GAP))
+        )
+    return len(tasks)
+
+
+def crowded_buckets(min_gap: int):
+    # (project_id, is_done) pairs where two adjacent ranks are closer than `min_gap`.
+    gaps = Task.objects.filter(project__isnull=False).annotate(
+        gap=F("priority")
+        - Window(Lag("priority"), partition_by=["project_id", "is_done"], order_by="priority")
+    )
+    return (
+        gaps.filter(gap__lt=min_gap)
+        .values_list("project_id", "is_done")
+        .distinct()
+        .order_by("project_id", "is_done")
+    )
+
+
+def _place(task: Task, locate) -> Task | None:
+    # `locate(current)` returns (neighbour, beyond, direction): the task lands on the
+    # `direction` side of `neighbour`, before `beyond`. Rebalances once if out of room.
+    with transaction.atomic():
+        for _attempt in range(2):
+            current = Task.objects.select_for_update().get(pk=task.pk)
+            located = locate(current)
+            if located is None:
+                return None
+            neighbour, beyond, direction = located
+            if beyond is None and direction == "down":
+                # Past the last row: take a fresh slot so a concurrent append cannot tie.
+                priority = next_priority(current.project_id)
+                break
+            priority = _between(neighbour, beyond, direction)
+            if priority is not None:
+                break
+            rebalance(current.project_id, current.is_done)
+        else:
+            raise RuntimeError("Rebalance left no room between neighbours")
+        task.priority = priority
+        task.save(update_fields=["priority"])
+    return neighbour
+
+
+def _bucket(task: Task):
+    return Task.objects.filter(project_id=task.project_id, is_done=task.is_done)
+
+
+def _between(neighbour: Task, beyond: Task | None, direction: str) -> int | None:
+    step = -PRIORITY_GAP if direction == "up" else PRIORITY_GAP
+    if beyond is None:
+        return neighbour.priority + step
+    low, high = sorted((neighbour.priority, beyond.priority))
+    if high - low < 2:
+        return None
+    return (low + high) // 2
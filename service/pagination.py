@@ -0,0 +1,91 @@
+from django.conf import settings
+from django.db.models import Prefetch, Q, prefetch_related_objects
+
+from .counters import due_soon_cutoff
+from .models import Project, Task, TaskArchive
+
+# Keyset orderings; the trailing "-id" makes every position unique.
+PROJECT_ORDERING = ("-created_at", "-id")
+TASK_ORDERING = ("is_done", "priority", "-created_at", "-id")
+ARCHIVE_ORDERING = ("-done_at", "-id")
+DUE_ORDERING = ("deadline", "id")
+
+
+def keyset_filter(ordering, row) -> Q:
+    # Rows that sort strictly after `row` (a model instance or a values() dict).
+    query = Q()
+    equal = Q()
+    for field in ordering:
+        name = field.lstrip("-")
+        value = row[name] if isinstance(row, dict) else getattr(row, name)
+        lookup = "lt" if field.startswith("-") else "gt"
+        query |= equal & Q(**{f"{name}__{lookup}": value})
+        equal &= Q(**{name: value})
+    return query
+
+
+def window(queryset, ordering, size: int, after=None):
+    # One page of `size` rows after the cursor row, plus a "has more" flag.
+    queryset = queryset.order_by(*ordering)
+    if after is not None:
+        queryset = queryset.filter(keyset_filter(ordering, after))
+    rows = list(queryset[: size + 1])
+    return rows[:size], len(rows) > size
+
+
+def project_window(owner, after=None):
+    projects, more = window(
+        Project.objects.filter(owner=owner),
+        PROJECT_ORDERING,
+        settings.DASHBOARD_PROJECT_PAGE_SIZE,
+        after,
+    )
+    attach_task_windows(projects)
+    return projects, more
+
+
+def task_window(project, after=None):
+    return window(
+        Task.objects.filter(project=project),
+        TASK_ORDERING,
+        settings.DASHBOARD_TASK_PAGE_SIZE,
+        after,
+    )
+
+
+def archive_window(project, after=None):
+    return window(
+        TaskArchive.objects.filter(project=project),
+        ARCHIVE_ORDERING,
+        settings.DASHBOARD_TASK_PAGE_SIZE,
+        after,
+    )
+
+
+def due_window(owner, after=None):
+    # Open tasks due by tomorrow (overdue first) across the owner's projects; served
+    # by the partial (project, deadline) index on open tasks.
+    return window(
+        Task.objects.filter(
+            project__owner=owner, is_done=False, deadline__lte=due_soon_cutoff()
+        ).select_related("project"),
+        DUE_ORDERING,
+        settings.DASHBOARD_TASK_PAGE_SIZE,
+        after,
+    )
+
+
+def attach_task_windows(projects) -> None:
+    # Sets `task_window` / `tasks_more` on each project with a single windowed query.
+    size = settings.DASHBOARD_TASK_PAGE_SIZE
+    prefetch_related_objects(
+        projects,
+        Prefetch(
+            "tasks",
+            queryset=Task.objects.order_by(*TASK_ORDERING)[: size + 1],
+            to_attr="task_window",
+        ),
+    )
+    for project in projects:
+        project.tasks_more = len(project.task_window) > size
+        project.task_window = project.task_window[:size]
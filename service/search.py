@@ -0,0 +1,19 @@
+from django.conf import settings
+
+from .models import Task
+from .pagination import window
+
+# Trigrams need three characters before the GIN index (migration 0005) can help.
+SEARCH_MIN_LENGTH = 3
+SEARCH_ORDERING = ("is_done", "-created_at", "-id")
+
+
+def search_tasks(owner, query: str, after=None):
+    # icontains compiles to UPPER(name) LIKE UPPER(%q%) on PostgreSQL, which is
+    # exactly the expression the trigram index covers; SQLite falls back to LIKE.
+    return window(
+        Task.objects.filter(project__owner=owner, name__icontains=query),
+        SEARCH_ORDERING,
+        settings.DASHBOARD_TASK_PAGE_SIZE,
+        after,
+    )
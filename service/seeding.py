@@ -0,0 +1,100 @@
+import random
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from .counters import due_soon_cutoff
+from .models import Project, Task
+from .ordering import PRIORITY_GAP
+
+
+def seed_users(prefix: str, count: int, password: str, batch_size: int = 1000) -> list:
+    # Bulk-inserts `count` users named `<prefix>-<n>` after the highest existing one.
+    # The password is hashed once and shared, hashing per user would dominate the run.
+    User = get_user_model()
+    taken = set(
+        User.objects.filter(username__startswith=f"{prefix}-").values_list("username", flat=True)
+    )
+    names = []
+    index = 0
+    while len(names) < count:
+        index += 1
+        username = f"{prefix}-{index}"
+        if username not in taken:
+            names.append(username)
+    hashed = make_password(password)
+    User.objects.bulk_create(
+        (User(username=username, password=hashed) for username in names),
+        batch_size=batch_size,
+    )
+    return list(User.objects.filter(username__in=names).order_by("id"))
+
+
+def seed_projects(
+    owner,
+    projects: int,
+    tasks: int,
+    done_ratio: float = 0.3,
+    deadline_ratio: float = 0.5,
+    deadline_days: int = 14,
+    batch_size: int = 1000,
+    rng: random.Random | None = None,
+) -> list[Project]:
+    # Bulk-inserts `projects` lists of `tasks` tasks each for `owner`, with counters
+    # and gap ranks already consistent. Names never collide with existing projects.
+    rng = rng or random.Random()
+    taken = set(Project.objects.filter(owner=owner).values_list("name", flat=True))
+    names = []
+    index = 0
+    while len(names) < projects:
+        index += 1
+        name = f"Project {index}"
+        if name not in taken:
+            names.append(name)
+
+    cutoff = due_soon_cutoff()
+    now = timezone.now()
+    today = cutoff - timedelta(days=1)
+    per_batch = max(1, batch_size // max(tasks, 1))
+    created = []
+    for start in range(0, projects, per_batch):
+        with transaction.atomic():
+            batch = [Project(owner=owner, name=name) for name in names[start : start + per_batch]]
+            specs = []
+            for project in batch:
+                rows = []
+                for _ in range(tasks):
+                    is_done = rng.random() < done_ratio
+                    deadline = None
+                    if rng.random() < deadline_ratio:
+                        deadline = today + timedelta(days=rng.randint(-2, deadline_days))
+                    rows.append((is_done, deadline))
+                open_deadlines = [deadline for is_done, deadline in rows if not is_done]
+                project.open_count = len(open_deadlines)
+                project.done_count = tasks - len(open_deadlines)
+                project.due_soon_count = sum(
+                    1 for deadline in open_deadlines if deadline and deadline <= cutoff
+                )
+                project.priority_seq = tasks * PRIORITY_GAP
+                specs.append(rows)
+            Project.objects.bulk_create(batch)
+            Task.objects.bulk_create(
+                (
+                    Task(
+                        project=project,
+                        name=f"Task {number}",
+                        is_done=is_done,
+                        done_at=now if is_done else None,
+                        deadline=deadline,
+                        priority=number * PRIORITY_GAP,
+                    )
+                    for project, rows in zip(batch, specs, strict=True)
+                    for number, (is_done, deadline) in enumerate(rows, start=1)
+                ),
+                batch_size=batch_size,
+            )
+        created.extend(batch)
+    return created
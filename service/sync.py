@@ -0,0 +1,123 @@
+import base64
+import binascii
+import json
+from datetime import UTC, datetime, timedelta
+
+from django.conf import settings
+from django.core.exceptions import BadRequest
+from django.utils import timezone
+
+from .access import user_projects, user_tasks
+from .models import Tombstone
+from .pagination import window
+
+# Delta sync: rows changed (or deleted) since the client's cursor, read in
+# (updated_at, id) order through the *_sync_idx indexes, so a sync costs what
+# changed, not what exists. The cursor holds one keyset position per stream.
+PROJECT_FIELDS = ("id", "name", "created_at", "updated_at")
+TASK_FIELDS = (
+    "id",
+    "project",
+    "name",
+    "is_done",
+    "priority",
+    "deadline",
+    "created_at",
+    "done_at",
+    "updated_at",
+)
+_EPOCH = datetime(1970, 1, 1, tzinfo=UTC)
+
+
+class CursorExpired(Exception):
+    # The cursor is older than the tombstones still kept; the client must resync.
+    pass
+
+
+def bury(kind: str, rows) -> None:
+    # Records deletions; `rows` are (owner_id, object_id) pairs.
+    Tombstone.objects.bulk_create(
+        Tombstone(owner_id=owner_id, kind=kind, object_id=object_id)
+        for owner_id, object_id in rows
+    )
+
+
+def changes(owner, cursor: str | None, size: int | None = None) -> dict:
+    size = size or settings.SYNC_PAGE_SIZE
+    now = timezone.now()
+    # A finished stream resumes `SYNC_GRACE_SECONDS` back from now, so a transaction
+    # that commits late with an older timestamp is still picked up next time.
+    # Clients upsert by id, so rows seen twice are harmless.
+    settled = (now - timedelta(seconds=settings.SYNC_GRACE_SECONDS), 0)
+    positions = decode_cursor(cursor) if cursor else None
+    if positions is None:
+        # First sync: every live row; there is nothing to delete on the client yet.
+        start = (_EPOCH, 0)
+        positions = {"projects": start, "tasks": start, "deleted": settled}
+    elif positions["deleted"][0] < now - timedelta(days=settings.SYNC_TOMBSTONE_DAYS):
+        raise CursorExpired
+
+    projects, projects_more = _delta(
+        user_projects(owner), "updated_at", PROJECT_FIELDS, positions["projects"], size
+    )
+    tasks, tasks_more = _delta(
+        user_tasks(owner), "updated_at", TASK_FIELDS, positions["tasks"], size
+    )
+    deleted, deleted_more = _delta(
+        Tombstone.objects.filter(owner=owner),
+        "deleted_at",
+        ("id", "kind", "object_id", "deleted_at"),
+        positions["deleted"],
+        size,
+    )
+    next_positions = {
+        "projects": _advance(positions["projects"], projects, "updated_at", projects_more, settled),
+        "tasks": _advance(positions["tasks"], tasks, "updated_at", tasks_more, settled),
+        "deleted": _advance(positions["deleted"], deleted, "deleted_at", deleted_more, settled),
+    }
+    return {
+        "projects": projects,
+        "tasks": tasks,
+        # Apply these before the changed rows: a restored task is in both.
+        "deleted": {
+            "projects": [row["object_id"] for row in deleted if row["kind"] == Tombstone.PROJECT],
+            "tasks": [row["object_id"] for row in deleted if row["kind"] == Tombstone.TASK],
+        },
+        "cursor": encode_cursor(next_positions),
+        "more": projects_more or tasks_more or deleted_more,
+    }
+
+
+def prune(before) -> int:
+    return Tombstone.objects.filter(deleted_at__lt=before).delete()[0]
+
+
+def encode_cursor(positions: dict) -> str:
+    state = {name: [moment.isoformat(), pk] for name, (moment, pk) in positions.items()}
+    return base64.urlsafe_b64encode(json.dumps(state, separators=(",", ":")).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> dict:
+    try:
+        state = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        positions = {
+            name: (datetime.fromisoformat(state[name][0]), int(state[name][1]))
+            for name in ("projects", "tasks", "deleted")
+        }
+        if any(moment.tzinfo is None for moment, _pk in positions.values()):
+            raise ValueError("naive timestamp")
+        return positions
+    except (binascii.Error, ValueError, TypeError, KeyError, IndexError):
+        raise BadRequest("Invalid sync cursor.") from None
+
+
+def _delta(queryset, field: str, fields, position, size: int):
+    moment, pk = position
+    return window(queryset.values(*fields), (field, "id"), size, {field: moment, "id": pk})
+
+
+def _advance(position, rows, field: str, more: bool, settled):
+    if more:
+        # Mid-stream: continue right after the last row sent.
+        return rows[-1][field], rows[-1]["id"]
+    return max(position, settled)
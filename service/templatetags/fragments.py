@@ -0,0 +1,16 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from service.caching import render_project_header, render_task_row
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def task_row(context, task, oob=False):
+    return mark_safe(render_task_row(task, context.get("due_soon_cutoff"), oob=oob))
+
+
+@register.simple_tag
+def project_header(project):
+    return mark_safe(render_project_header(project))
@@ -0,0 +1,261 @@
+"""Query-count and wall-time budgets for every HTMX endpoint.
+
+Volumes come from BUDGET_PROJECTS / BUDGET_TASKS (tasks per project); query
+budgets must not depend on them. BUDGET_TIME_FACTOR scales the time budgets for
+slow machines and BUDGET_REPORT=<path> writes the measurements as JSON so runs
+can be diffed between commits.
+"""
+
+import json
+import os
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from main import urls as main_urls
+
+from . import api_urls
+from . import urls as service_urls
+from .archive import archive_done
+from .models import Project, Task, TaskArchive
+from .seeding import seed_projects
+from .sync import encode_cursor
+
+PROJECTS = int(os.getenv("BUDGET_PROJECTS", "30"))
+TASKS = int(os.getenv("BUDGET_TASKS", "40"))
+TIME_FACTOR = float(os.getenv("BUDGET_TIME_FACTOR", "1"))
+REPORT = os.getenv("BUDGET_REPORT")
+
+# "route METHOD": (queries with HX-Request, queries without, milliseconds)
+BUDGETS = {
+    "main:dashboard GET": (5, 5, 500),
+    "main:profiling GET": (2, 2, 50),
+    "service:project_page GET": (5, 2, 300),
+    "service:project_create GET": (2, 2, 50),
+    "service:project_create POST": (4, 4, 100),
+    "service:project_update GET": (3, 2, 50),
+    "service:project_update POST": (5, 5, 100),
+    "service:project_delete POST": (19, 19, 100),  # tasks go in chunks first
+    "service:task_create POST": (9, 8, 100),
+    "service:task_page GET": (5, 2, 100),
+    "service:task_reorder POST": (11, 11, 100),
+    "service:task_bulk POST": (10, 10, 100),
+    "service:task_batch POST": (17, 17, 100),
+    "service:task_search GET": (3, 2, 100),
+    "service:task_archive GET": (5, 2, 100),
+    "service:task_due GET": (4, 2, 100),
+    "service:task_restore POST": (11, 10, 100),
+    "service:task_events GET": (2, 2, 50),
+    "service:task_export GET": (4, 4, 100),
+    "service:task_import POST": (18, 14, 100),
+    "service:task_update GET": (3, 2, 50),
+    "service:task_update POST": (8, 7, 100),
+    "service:task_delete POST": (10, 8, 100),
+    "service:task_toggle_done POST": (9, 8, 100),
+    "service:task_move POST": (8, 8, 100),
+    "api:projects GET": (4, 4, 100),
+    "api:projects POST": (4, 4, 100),
+    "api:project GET": (3, 3, 50),
+    "api:project POST": (5, 5, 100),
+    "api:tasks GET": (5, 5, 100),
+    "api:tasks POST": (8, 8, 100),
+    "api:task GET": (3, 3, 50),
+    "api:task POST": (7, 7, 100),
+    "api:task_toggle POST": (8, 8, 100),
+    "api:task_move POST": (8, 8, 100),
+    "api:task_bulk POST": (10, 10, 100),
+    "api:sync GET": (5, 5, 100),
+}
+
+
+def _route_names():
+    names = set()
+    for module in (main_urls, service_urls, api_urls):
+        names.update(f"{module.app_name}:{pattern.name}" for pattern in module.urlpatterns)
+    return names
+
+
+class EndpointBudgetTests(TestCase):
+    report = {}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
+            username="bench", password="pass12345", is_staff=True
+        )
+        seed_projects(cls.user, PROJECTS, TASKS, rng=random.Random(7))
+        cls.project = Project.objects.filter(owner=cls.user).order_by("-created_at", "-id")[0]
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        if REPORT:
+            with open(REPORT, "w", encoding="utf-8") as report:
+                json.dump(
+                    {"projects": PROJECTS, "tasks": TASKS, "endpoints": cls.report},
+                    report,
+                    indent=2,
+                    sort_keys=True,
+                )
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        self.serial = 0
+
+    def test_every_route_has_a_budget(self):
+        budgeted = {key.split()[0] for key in BUDGETS}
+        self.assertEqual(budgeted, _route_names())
+        self.assertEqual(set(BUDGETS), set(self.cases()))
+
+    def test_endpoint_budgets(self):
+        # Warm the template loaders so the first budget doesn't pay for compilation.
+        self.client.get(reverse("main:dashboard"), HTTP_HX_REQUEST="true")
+        for key, case in self.cases().items():
+            queries_htmx, queries_plain, milliseconds = BUDGETS[key]
+            for htmx, budget in ((True, queries_htmx), (False, queries_plain)):
+                with self.subTest(endpoint=key, htmx=htmx):
+                    method, args, data = case()
+                    headers = {"HTTP_HX_REQUEST": "true"} if htmx else {}
+                    request = getattr(self.client, method)
+                    url = reverse(key.split()[0], args=args)
+                    with CaptureQueriesContext(connection) as queries:
+                        started = time.perf_counter()
+                        response = request(url, data, **headers)
+                        if response.streaming:
+                            # The body's queries run as it is iterated, not in the view.
+                            b"".join(response.streaming_content)
+                        elapsed = (time.perf_counter() - started) * 1000
+                    self.assertLess(response.status_code, 400)
+                    self.report.setdefault(key, {})["htmx" if htmx else "plain"] = {
+                        "queries": len(queries),
+                        "ms": round(elapsed, 2),
+                    }
+                    self.assertLessEqual(len(queries), budget)
+                    self.assertLessEqual(elapsed, milliseconds * TIME_FACTOR)
+
+    def cases(self):
+        return {
+            "main:dashboard GET": lambda: ("get", [], {}),
+            "main:profiling GET": lambda: ("get", [], {}),
+            "service:project_page GET": lambda: ("get", [], {"after": self.project.id}),
+            "service:project_create GET": lambda: ("get", [], {}),
+            "service:project_create POST": lambda: ("post", [], {"name": self.name()}),
+            "service:project_update GET": lambda: ("get", [self.project.id], {}),
+            "service:project_update POST": lambda: (
+                "post",
+                [self.project.id],
+                {"name": self.name()},
+            ),
+            "service:project_delete POST": lambda: ("post", [self.fresh_project().id], {}),
+            "service:task_create POST": lambda: ("post", [self.project.id], {"name": "Budget"}),
+            "service:task_page GET": lambda: (
+                "get",
+                [self.project.id],
+                {"after": self.tasks()[0].id},
+            ),
+            "service:task_reorder POST": lambda: (
+                "post",
+                [self.project.id],
+                {"task": self.tasks()[5].id, "after": self.tasks()[1].id},
+            ),
+            "service:task_bulk POST": lambda: (
+                "post",
+                [],
+                {"action": "done", "ids": [task.id for task in self.tasks()[:3]]},
+            ),
+            "service:task_batch POST": lambda: ("post", [], {"ops": self.batch()}),
+            "service:task_events GET": lambda: ("get", [], {"client": "budget"}),
+            "service:task_search GET": lambda: ("get", [], {"q": "task 1"}),
+            "service:task_due GET": lambda: ("get", [], {"after": self.due().id}),
+            "service:task_archive GET": lambda: (
+                "get",
+                [self.project.id],
+                {"after": self.fresh_archived().id},
+            ),
+            "service:task_restore POST": lambda: ("post", [self.fresh_archived().id], {}),
+            "service:task_export GET": lambda: ("get", [], {"format": "csv"}),
+            "service:task_import POST": lambda: ("post", [], {"file": self.upload()}),
+            "service:task_update GET": lambda: ("get", [self.tasks()[0].id], {}),
+            "service:task_update POST": lambda: (
+                "post",
+                [self.tasks()[0].id],
+                {"name": self.name()},
+            ),
+            "service:task_delete POST": lambda: ("post", [self.fresh_task().id], {}),
+            "service:task_toggle_done POST": lambda: ("post", [self.tasks()[2].id], {}),
+            "service:task_move POST": lambda: ("post", [self.tasks()[3].id, "up"], {}),
+            "api:projects GET": lambda: ("get", [], {"after": self.project.id}),
+            "api:projects POST": lambda: ("post", [], {"name": self.name()}),
+            "api:project GET": lambda: ("get", [self.project.id], {}),
+            "api:project POST": lambda: ("post", [self.project.id], {"name": self.name()}),
+            "api:tasks GET": lambda: (
+                "get",
+                [self.project.id],
+                {"after": self.tasks()[0].id, "fields": "name,is_done"},
+            ),
+            "api:tasks POST": lambda: ("post", [self.project.id], {"name": "Budget"}),
+            "api:task GET": lambda: ("get", [self.tasks()[0].id], {}),
+            "api:task POST": lambda: ("post", [self.tasks()[0].id], {"name": self.name()}),
+            "api:task_toggle POST": lambda: ("post", [self.tasks()[2].id], {}),
+            "api:task_move POST": lambda: ("post", [self.tasks()[3].id], {"direction": "up"}),
+            "api:sync GET": lambda: ("get", [], {"since": self.sync_cursor()}),
+            "api:task_bulk POST": lambda: (
+                "post",
+                [],
+                {"action": "done", "ids": [task.id for task in self.tasks()[:3]]},
+            ),
+        }
+
+    def name(self):
+        self.serial += 1
+        return f"Budget {self.serial}"
+
+    def batch(self):
+        tasks = self.tasks()
+        ops = [{"op": "toggle", "task": tasks[4].id}] * 3
+        ops += [{"op": "move", "task": tasks[6].id, "direction": "up"}] * 2
+        ops += [{"op": "rename", "task": tasks[7].id, "name": self.name()}]
+        return json.dumps(ops)
+
+    def tasks(self):
+        return list(Task.objects.filter(project=self.project, is_done=False).order_by("priority"))
+
+    def fresh_project(self):
+        return seed_projects(self.user, 1, TASKS, rng=random.Random(self.serial))[0]
+
+    def fresh_task(self):
+        return Task.objects.create(project=self.project, name=self.name(), priority=1)
+
+    def due(self):
+        return Task.objects.filter(project__owner=self.user, deadline__isnull=False).first()
+
+    def upload(self):
+        # Two new tasks in an existing project and one in a new project.
+        rows = [
+            "project,name,is_done,deadline",
+            f"{self.project.name},{self.name()},0,",
+            f"{self.project.name},{self.name()},1,",
+            f"{self.name()},{self.name()},0,",
+        ]
+        return SimpleUploadedFile("tasks.csv", "\n".join(rows).encode(), "text/csv")
+
+    def sync_cursor(self):
+        # An hour-old cursor: the delta is every row seeded for this test.
+        start = (timezone.now() - timedelta(hours=1), 0)
+        return encode_cursor({"projects": start, "tasks": start, "deleted": start})
+
+    def fresh_archived(self):
+        done_at = timezone.now() - timedelta(days=2)
+        task = Task.objects.create(
+            project=self.project, name=self.name(), is_done=True, done_at=done_at, priority=1
+        )
+        archive_done(timezone.now() - timedelta(days=1))
+        return TaskArchive.objects.get(id=task.id)
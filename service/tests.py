@@ -1,11 +1,31 @@
-from datetime import timedelta
+import asyncio
+import csv
+import io
+import json
+import tempfile
+import threading
+from datetime import date, timedelta
+from io import StringIO
+from pathlib import Path
 
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection, connections
+from django.http import Http404
+from django.test import AsyncRequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
+from django_htmx.middleware import HtmxDetails
 
-from .models import Project, Task
+from . import async_views, bulk, caching, events, sync, transfer
+from .models import Project, Task, TaskArchive, Tombstone
+from .ordering import PRIORITY_GAP, next_priority
 
 
 class ProjectTaskFlowTests(TestCase):
@@ -88,7 +108,7 @@ class ProjectTaskFlowTests(TestCase):
         )
         self.assertEqual(response.status_code, 200)
         task = Task.objects.get(project=project, name="First task")
-        self.assertEqual(task.priority, 1)
+        self.assertEqual(task.priority, PRIORITY_GAP)
 
     def test_task_create_for_other_owner_forbidden(self):
         project = Project.objects.create(owner=self.other, name="Other")
@@ -144,8 +164,666 @@ class ProjectTaskFlowTests(TestCase):
         self.assertEqual(response.status_code, 200)
         first.refresh_from_db()
         second.refresh_from_db()
-        self.assertEqual(first.priority, 2)
-        self.assertEqual(second.priority, 1)
+        self.assertEqual(first.priority, 1)
+        self.assertLess(second.priority, first.priority)
+        self.assertContains(response, f'hx-swap-oob="beforebegin:#task-{first.id}"')
+
+    def test_task_move_rewrites_only_moved_task(self):
+        project = Project.objects.create(owner=self.user, name="Inbox")
+        tasks = [
+            Task.objects.create(project=project, name=f"Task {i}", priority=i * PRIORITY_GAP)
+            for i in range(1, 5)
+        ]
+        response = self.client.post(
+            reverse("service:task_move", args=[tasks[1].id, "down"]),
+            **self.htmx,
+        )
+        self.assertContains(response, f'hx-swap-oob="afterend:#task-{tasks[2].id}"')
+        priorities = dict(Task.objects.values_list("name", "priority"))
+        self.assertEqual(priorities["Task 1"], PRIORITY_GAP)
+        self.assertEqual(priorities["Task 2"], 3 * PRIORITY_GAP + PRIORITY_GAP // 2)
+        self.assertEqual(priorities["Task 3"], 3 * PRIORITY_GAP)
+        self.assertEqual(priorities["Task 4"], 4 * PRIORITY_GAP)
+
+    def test_task_move_rebalances_exhausted_gap(self):
+        project = Project.objects.create(owner=self.user, name="Inbox")
+        first = Task.objects.create(project=project, name="First", priority=1)
+        second = Task.objects.create(project=project, name="Second", priority=2)
+        third = Task.objects.create(project=project, name="Third", priority=3)
+        self.client.post(reverse("service:task_move", args=[third.id, "up"]), **self.htmx)
+        ordered = list(
+            Task.objects.filter(project=project).order_by("priority").values_list("id", flat=True)
+        )
+        self.assertEqual(ordered, [first.id, third.id, second.id])
+
+    def test_task_move_at_edge_is_noop(self):
+        project = Project.objects.create(owner=self.user, name="Inbox")
+        task = Task.objects.create(project=project, name="Only", priority=PRIORITY_GAP)
+        response = self.client.post(
+            reverse("service:task_move", args=[task.id, "up"]),
+            **self.htmx,
+        )
+        self.assertEqual(response.content, b"")
+        task.refresh_from_db()
+        self.assertEqual(task.priority, PRIORITY_GAP)
+
+    def test_task_reorder_place_after(self):
+        project = Project.objects.create(owner=self.user, name="Inbox")
+        tasks = [
+            Task.objects.create(project=project, name=f"Task {i}", priority=i * PRIORITY_GAP)
+            for i in range(1, 5)
+        ]
+        response = self.client.post(
+            reverse("service:task_reorder", args=[project.id]),
+            {"task": tasks[0].id, "after": tasks[2].id},
+            **self.htmx,
+        )
+        self.assertEqual(response.status_code, 204)
+        ordered = list(
+            Task.objects.filter(project=project).order_by("priority").values_list("name", flat=True)
+        )
+        self.assertEqual(ordered, ["Task 2", "Task 3", "Task 1", "Task 4"])
+
+    def test_task_reorder_full_order_single_update(self):
+        project = Project.objects.create(owner=self.user, name="Inbox")
+        tasks = [
+            Task.objects.create(project=project, name=f"Task {i}", priority=i * PRIORITY_GAP)
+            for i in range(1, 5)
+        ]
+        new_order = [tasks[3].id, tasks[1].id, tasks[0].id, tasks[2].id]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                reverse("service:task_reorder", args=[project.id]),
+                {"order": new_order},
+                **self.htmx,
+            )
+        self.assertEqual(response.status_code, 204)
+        updates = [q["sql"] for q in queries if q["sql"].startswith("UPDATE")]
+        self.assertEqual(len(updates), 1)
+        ordered = list(
+            Task.objects.filter(project=project).order_by("priority").values_list("id", flat=True)
+        )
+        self.assertEqual(ordered, new_order)
+
+    def test_task_reorder_rejects_foreign_or_mixed_tasks(self):
+        project = Project.objects.create(owner=self.user, name="Inbox")
+        open_task = Task.objects.create(project=project, name="Open", priority=1)
+        done_task = Task.objects.create(project=project, name="Done", is_done=True, priority=1)
+        foreign = Task.objects.create(
+            project=Project.objects.create(owner=self.other, name="Other"),
+            name="Foreign",
+        )
+        url = reverse("service:task_reorder", args=[project.id])
+        response = self.client.post(url, {"order": [open_task.id, foreign.id]}, **self.htmx)
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post(
+            url, {"task": open_task.id, "after": done_task.id}, **self.htmx
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_task_bulk_done_appends_to_done_bucket(self):
+        project = Project.objects.create(owner=self.user, name="Inbox")
+        Task.objects.create(project=project, name="Done", is_done=True, priority=PRIORITY_GAP)
+        tasks = [
+            Task.objects.create(project=project, name=f"Task {i}", priority=i * PRIORITY_GAP)
+            for i in range(1, 4)
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                reverse("service:task_bulk"),
+                {"action": "done", "ids": [tasks[0].id, tasks[2].id]},
+                **self.htmx,
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, f'id="task-{tasks[0].id}" hx-swap-oob="true"')
+        self.assertContains(response, f'id="task-{tasks[2].id}" hx-swap-oob="true"')
+        self.assertNotContains(response, f"task-{tasks[1].id}")
+        updates = [q["sql"] for q in queries if q["sql"].startswith('UPDATE "service_task"')]
+        self.assertEqual(len(updates), 1)
+        done = list(
+            Task.objects.filter(project=project, is_done=True)
+            .order_by("priority")
+            .values_list("name", flat=True)
+        )
+        self.assertEqual(done, ["Done", "Task 1", "Task 3"])
+
+    def test_task_bulk_rejects_foreign_ids(self):
+        project = Project.objects.create(owner=self.user, name="Inbox")
+        mine = Task.objects.create(project=project, name="Mine")
+        foreign = Task.objects.create(
+            project=Project.objects.create(owner=self.other, name="Other"),
+            name="Foreign",
+        )
+        response = self.client.post(
+            reverse("service:task_bulk"),
+            {"action": "delete", "ids": [mine.id, foreign.id]},
+            **self.htmx,
+        )
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(Task.objects.count(), 2)
+        reorder_url = reverse("service:task_reorder", args=[project.id])
+        for bad in ("²", "9" * 30):
+            response = self.client.post(
+                reverse("service:task_bulk"), {"action": "delete", "ids": [bad]}, **self.htmx
+            )
+            self.assertEqual(response.status_code, 400)
+            response = self.client.post(reorder_url, {"order": [mine.id, bad]}, **self.htmx)
+            self.assertEqual(response.status_code, 400)
+
+    def test_task_bulk_delete_returns_empty_state(self):
+        project = Project.objects.create(owner=self.user, name="Inbox")
+        tasks = [Task.objects.create(project=project, name=f"Task {i}") for i in range(2)]
+        response = self.client.post(
+            reverse("service:task_bulk"),
+            {"action": "delete", "ids": [task.id for task in tasks]},
+            **self.htmx,
+        )
+        self.assertContains(response, 'hx-swap-oob="delete"', count=2)
+        self.assertContains(response, "No tasks yet.")
+        self.assertFalse(Task.objects.exists())
+
+    def test_task_bulk_move_and_deadline(self):
+        source = Project.objects.create(owner=self.user, name="Inbox")
+        target = Project.objects.create(owner=self.user, name="Later")
+        Task.objects.create(project=target, name="Existing", priority=5 * PRIORITY_GAP)
+        task = Task.objects.create(project=source, name="Task", priority=PRIORITY_GAP)
+        response = self.client.post(
+            reverse("service:task_bulk"),
+            {"action": "move", "ids": [task.id], "project": target.id},
+            **self.htmx,
+        )
+        self.assertContains(response, f'hx-swap-oob="beforeend:#project-{target.id}-tasks"')
+        task.refresh_from_db()
+        self.assertEqual(task.project, target)
+        self.assertEqual(task.priority, 6 * PRIORITY_GAP)
+
+        past = timezone.localdate() - timedelta(days=1)
+        response = self.client.post(
+            reverse("service:task_bulk"),
+            {"action": "deadline", "ids": [task.id], "deadline": past.isoformat()},
+            **self.htmx,
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_task_batch_coalesces_ops_into_one_write(self):
+        project = Project.objects.create(owner=self.user, name="Inbox", open_count=3)
+        first, second, third = (
+            Task.objects.create(project=project, name=name, priority=rank * PRIORITY_GAP)
+            for rank, name in enumerate(("First", "Second", "Third"), start=1)
+        )
+        ops = [{"op": "toggle", "task": first.id}] * 3 + [{"op": "toggle", "task": second.id}] * 2
+        ops += [
+            {"op": "move", "task": third.id, "direction": direction}
+            for direction in ("up", "up", "down")
+        ]
+        ops += [{"op": "rename", "task": second.id, "name": " Renamed "}]
+        response = self.client.post(
+            reverse("service:task_batch"), {"ops": json.dumps(ops)}, **self.htmx
+        )
+        self.assertEqual(response.status_code, 200)
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertTrue(first.is_done)
+        self.assertEqual(
+            (second.is_done, second.priority, second.name), (False, 2 * PRIORITY_GAP, "Renamed")
+        )
+        self.assertEqual(
+            list(project.tasks.filter(is_done=False).order_by("priority")), [third, second]
+        )
+        project.refresh_from_db()
+        self.assertEqual((project.open_count, project.done_count), (2, 1))
+        self.assertContains(response, f'id="task-{first.id}" hx-swap-oob="true"')
+        self.assertContains(response, f"afterbegin:#project-{project.id}-tasks")
+        self.assertContains(response, f'id="project-{project.id}-counts"')
+
+    def test_task_batch_toggle_reopens_done_task(self):
+        project = Project.objects.create(owner=self.user, name="Inbox", open_count=1, done_count=1)
+        done = Task.objects.create(project=project, name="Done", is_done=True)
+        open_task = Task.objects.create(project=project, name="Open")
+        ops = [{"op": "toggle", "task": done.id}, {"op": "toggle", "task": open_task.id}]
+        response = self.client.post(
+            reverse("service:task_batch"), {"ops": json.dumps(ops)}, **self.htmx
+        )
+        self.assertEqual(response.status_code, 200)
+        done.refresh_from_db()
+        open_task.refresh_from_db()
+        self.assertEqual((done.is_done, done.done_at), (False, None))
+        self.assertTrue(open_task.is_done)
+        project.refresh_from_db()
+        self.assertEqual((project.open_count, project.done_count), (1, 1))
+
+    def test_task_batch_rejects_invalid_or_foreign_ops(self):
+        project = Project.objects.create(owner=self.user, name="Inbox")
+        task = Task.objects.create(project=project, name="Task")
+        foreign = Task.objects.create(
+            project=Project.objects.create(owner=self.other, name="Other"), name="Other"
+        )
+        url = reverse("service:task_batch")
+        huge = json.dumps([{"op": "toggle", "task": 10**30}])
+        for ops in ("nope", "[]", json.dumps([{"op": "move", "task": task.id}]), huge):
+            self.assertEqual(self.client.post(url, {"ops": ops}, **self.htmx).status_code, 400)
+        ops = [{"op": "toggle", "task": task.id}, {"op": "toggle", "task": foreign.id}]
+        response = self.client.post(url, {"ops": json.dumps(ops)}, **self.htmx)
+        self.assertEqual(response.status_code, 404)
+        task.refresh_from_db()
+        self.assertFalse(task.is_done)
+
+    def test_counters_follow_task_writes(self):
+        project = Project.objects.create(owner=self.user, name="Inbox")
+        self.client.post(
+            reverse("service:task_create", args=[project.id]),
+            {"name": "Soon", "deadline": timezone.localdate().isoformat()},
+            **self.htmx,
+        )
+        response = self.client.post(
+            reverse("service:task_create", args=[project.id]),
+            {"name": "Later"},
+            **self.htmx,
+        )
+        self.assertContains(response, f'id="project-{project.id}-counts" hx-swap-oob="true"')
+        soon = Task.objects.get(name="Soon")
+        self.client.post(reverse("service:task_toggle_done", args=[soon.id]), **self.htmx)
+        project.refresh_from_db()
+        self.assertEqual(
+            (project.open_count, project.done_count, project.due_soon_count), (1, 1, 0)
+        )
+
+        later = Task.objects.get(name="Later")
+        self.client.post(
+            reverse("service:task_bulk"),
+            {"action": "delete", "ids": [soon.id, later.id]},
+            **self.htmx,
+        )
+        project.refresh_from_db()
+        self.assertEqual(
+            (project.open_count, project.done_count, project.due_soon_count), (0, 0, 0)
+        )
+
+    def test_task_writes_snapshot_the_locked_row(self):
+        project = Project.objects.create(owner=self.user, name="Inbox", open_count=1)
+        task = Task.objects.create(project=project, name="Task")
+        stale = Task.objects.get(id=task.id)
+        bulk.toggle_done(self.user, task.id)
+        # The form was validated against `stale`; the delta must come from the row.
+        bulk.update_task(self.user, stale.id, {"name": "Renamed", "is_done": True})
+        project.refresh_from_db()
+        self.assertEqual((project.open_count, project.done_count), (0, 1))
+        bulk.delete_task(self.user, task.id)
+        project.refresh_from_db()
+        self.assertEqual((project.open_count, project.done_count), (0, 0))
+        with self.assertRaises(Http404):
+            bulk.delete_task(self.other, task.id)
+
+    def test_repair_counters_command(self):
+        project = Project.objects.create(owner=self.user, name="Inbox", open_count=7)
+        Task.objects.create(project=project, name="Open")
+        Task.objects.create(project=project, name="Done", is_done=True)
+        out = StringIO()
+        call_command("repair_counters", batch_size=1, stdout=out)
+        self.assertIn("1 fixed", out.getvalue())
+        project.refresh_from_db()
+        self.assertEqual((project.open_count, project.done_count), (1, 1))
+
+    def test_rebalance_priorities_command(self):
+        project = Project.objects.create(owner=self.user, name="Inbox")
+        for priority in (5, 6, 7):
+            Task.objects.create(project=project, name=f"Task {priority}", priority=priority)
+        call_command("rebalance_priorities", stdout=StringIO())
+        self.assertEqual(
+            sorted(Task.objects.values_list("priority", flat=True)),
+            [PRIORITY_GAP, 2 * PRIORITY_GAP, 3 * PRIORITY_GAP],
+        )
+
+    def test_toggle_tracks_done_at(self):
+        project = Project.objects.create(owner=self.user, name="Inbox", open_count=1)
+        task = Task.objects.create(project=project, name="Task")
+        url = reverse("service:task_toggle_done", args=[task.id])
+        self.client.post(url, **self.htmx)
+        task.refresh_from_db()
+        self.assertIsNotNone(task.done_at)
+        self.client.post(url, **self.htmx)
+        task.refresh_from_db()
+        self.assertIsNone(task.done_at)
+
+    def test_archive_tasks_command_moves_only_old_done_tasks(self):
+        project = Project.objects.create(owner=self.user, name="Inbox", open_count=1, done_count=2)
+        old = timezone.now() - timedelta(days=40)
+        stale = Task.objects.create(project=project, name="Stale", is_done=True, done_at=old)
+        Task.objects.create(project=project, name="Recent", is_done=True)
+        Task.objects.create(project=project, name="Open")
+        out = StringIO()
+        call_command("archive_tasks", days=30, dry_run=True, stdout=out)
+        self.assertIn("1 task(s)", out.getvalue())
+        self.assertEqual(TaskArchive.objects.count(), 0)
+
+        call_command("archive_tasks", days=30, batch_size=1, stdout=out)
+        self.assertIn("1 task(s) archived", out.getvalue())
+        self.assertEqual(
+            sorted(project.tasks.values_list("name", flat=True)), ["Open", "Recent"]
+        )
+        archived = TaskArchive.objects.get()
+        self.assertEqual((archived.id, archived.done_at), (stale.id, old))
+        self.assertEqual(
+            list(Tombstone.objects.values_list("kind", "object_id")), [("task", stale.id)]
+        )
+        project.refresh_from_db()
+        self.assertEqual((project.open_count, project.done_count), (1, 1))
+
+    @override_settings(PROJECT_DELETE_BATCH_SIZE=2)
+    def test_project_delete_removes_tasks_in_chunks(self):
+        project = Project.objects.create(owner=self.user, name="Big")
+        tasks = [Task.objects.create(project=project, name=f"Task {n}") for n in range(5)]
+        TaskArchive.objects.create(
+            id=1000, project=project, name="Old", created_at=timezone.now(), done_at=timezone.now()
+        )
+        self.client.post(reverse("service:project_delete", args=[project.id]), **self.htmx)
+        self.assertFalse(Task.objects.exists())
+        self.assertFalse(TaskArchive.objects.exists())
+        self.assertEqual(
+            list(Tombstone.objects.order_by("id").values_list("kind", "object_id")),
+            [("task", task.id) for task in tasks] + [("project", project.id)],
+        )
+
+    @override_settings(PROJECT_DELETE_MODE="detach")
+    def test_reap_orphans_purges_or_rehomes_detached_tasks(self):
+        doomed = Project.objects.create(owner=self.user, name="Doomed")
+        for name, is_done in (("A", False), ("B", True), ("C", False)):
+            Task.objects.create(project=doomed, name=name, is_done=is_done)
+        TaskArchive.objects.create(
+            id=1000, project=doomed, name="Old", created_at=timezone.now(), done_at=timezone.now()
+        )
+        self.client.post(reverse("service:project_delete", args=[doomed.id]), **self.htmx)
+        self.assertEqual(Task.objects.filter(orphan_owner=self.user).count(), 3)
+        Task.objects.create(name="Theirs", orphan_owner=self.other)
+        out = StringIO()
+        call_command("reap_orphans", dry_run=True, stdout=out)
+        self.assertIn("5 orphaned task(s) would be purged", out.getvalue())
+        with self.assertRaises(CommandError):
+            call_command("reap_orphans", rehome_to=doomed.id, stdout=out)
+
+        target = Project.objects.create(owner=self.user, name="Inbox", open_count=1)
+        Task.objects.create(project=target, name="Kept", priority=PRIORITY_GAP)
+        call_command(
+            "reap_orphans", rehome_to=target.id, batch_size=2, limit=2, sleep=0, stdout=out
+        )
+        self.assertIn("2 task(s) re-homed so far", out.getvalue())
+        self.assertEqual(Task.objects.filter(project__isnull=True).count(), 2)
+        call_command("reap_orphans", rehome_to=target.id, sleep=0, stdout=out)
+        # Another user's orphan is never moved into this user's project.
+        self.assertEqual(Task.objects.get(project__isnull=True).name, "Theirs")
+        self.assertFalse(target.tasks.exclude(orphan_owner=None).exists())
+        open_tasks = target.tasks.filter(is_done=False).order_by("priority")
+        self.assertEqual(list(open_tasks.values_list("name", flat=True)), ["Kept", "A", "C"])
+        target.refresh_from_db()
+        self.assertEqual((target.open_count, target.done_count), (3, 1))
+
+        call_command("reap_orphans", batch_size=1, sleep=0, stdout=out)
+        self.assertIn("2 orphaned task(s) purged", out.getvalue())
+        self.assertFalse(TaskArchive.objects.exists())
+        self.assertFalse(Task.objects.filter(project__isnull=True).exists())
+
+    @override_settings(DASHBOARD_TASK_PAGE_SIZE=2)
+    def test_archived_tasks_page_and_restore(self):
+        project = Project.objects.create(owner=self.user, name="Inbox")
+        old = timezone.now() - timedelta(days=40)
+        for days in range(3):
+            TaskArchive.objects.create(
+                id=1000 + days,
+                project=project,
+                name=f"Archived {days}",
+                created_at=old,
+                done_at=old - timedelta(days=days),
+            )
+        url = reverse("service:task_archive", args=[project.id])
+        response = self.client.get(url, **self.htmx)
+        self.assertContains(response, "Archived 0")
+        self.assertContains(response, "Archived 1")
+        self.assertNotContains(response, "Archived 2")
+        self.assertContains(response, "Show more archived")
+        response = self.client.get(url, {"after": 1001}, **self.htmx)
+        self.assertContains(response, "Archived 2")
+
+        restore = reverse("service:task_restore", args=[1002])
+        self.client.force_login(self.other)
+        self.assertEqual(self.client.post(restore, **self.htmx).status_code, 404)
+        self.client.force_login(self.user)
+        response = self.client.post(restore, **self.htmx)
+        self.assertContains(response, 'id="task-1002"')
+        self.assertContains(response, "0 open · 1 done")
+        task = Task.objects.get(id=1002)
+        self.assertEqual((task.project, task.is_done, task.created_at), (project, True, old))
+        self.assertFalse(TaskArchive.objects.filter(id=1002).exists())
+
+    def test_seed_load_and_replay_load_commands(self):
+        call_command(
+            "seed_load", users=2, projects=3, tasks=4, prefix="bench", seed=1, stdout=StringIO()
+        )
+        owner = get_user_model().objects.get(username="bench-1")
+        self.assertEqual(owner.projects.count(), 3)
+        project = owner.projects.first()
+        self.assertEqual(project.open_count + project.done_count, 4)
+        call_command("seed_load", users=1, projects=1, tasks=1, prefix="bench", stdout=StringIO())
+        self.assertTrue(get_user_model().objects.filter(username="bench-3").exists())
+
+        report = Path(tempfile.mkdtemp()) / "report.json"
+        call_command(
+            "replay_load",
+            requests=30,
+            concurrency=1,
+            prefix="bench",
+            seed=1,
+            json_path=str(report),
+            stdout=StringIO(),
+        )
+        data = json.loads(report.read_text())
+        self.assertEqual(data["requests"], 30)
+        self.assertFalse([status for status in data["statuses"] if int(status) >= 500])
+
+        call_command(
+            "replay_load",
+            str(Path(settings.BASE_DIR) / "benchmarks" / "create_toggle_mix.jsonl"),
+            requests=20,
+            concurrency=2,
+            prefix="bench",
+            asgi=True,
+            json_path=str(report),
+            stdout=StringIO(),
+        )
+        data = json.loads(report.read_text())
+        self.assertEqual((data["handler"], data["requests"]), ("asgi", 20))
+        self.assertEqual(set(data["statuses"]), {"200"})
+
+        call_command(
+            "replay_load",
+            str(Path(settings.BASE_DIR) / "benchmarks" / "toggle_only.jsonl"),
+            requests=5,
+            concurrency=1,
+            prefix="bench",
+            close_connections=True,
+            json_path=str(report),
+            stdout=StringIO(),
+        )
+        data = json.loads(report.read_text())
+        self.assertEqual((data["connections"], set(data["statuses"])), ("per request", {"200"}))
+
+    def test_audit_indexes_explains_and_rolls_back(self):
+        call_command(
+            "seed_load", users=1, projects=2, tasks=5, prefix="audit", seed=1, stdout=StringIO()
+        )
+        tasks = sorted(Task.objects.values_list("id", "is_done", "priority"))
+        output = Path(tempfile.mkdtemp()) / "plans.txt"
+        call_command("audit_indexes", prefix="audit", output=str(output), stdout=StringIO())
+        report = output.read_text()
+        self.assertIn("== dashboard: GET / -> 200", report)
+        self.assertIn("== task_move: POST", report)
+        self.assertIn('-- SELECT "service_project"', report)
+        self.assertEqual(sorted(Task.objects.values_list("id", "is_done", "priority")), tasks)
+
+    @override_settings(DASHBOARD_TASK_PAGE_SIZE=2)
+    def test_task_search_is_scoped_and_paginated(self):
+        project = Project.objects.create(owner=self.user, name="Inbox")
+        for number in range(3):
+            Task.objects.create(project=project, name=f"Write report {number}")
+        Task.objects.create(project=project, name="Call bank")
+        Task.objects.create(
+            project=Project.objects.create(owner=self.other, name="Other"),
+            name="Foreign report",
+        )
+        url = reverse("service:task_search")
+        response = self.client.get(url, {"q": "REPORT"}, **self.htmx)
+        self.assertContains(response, "Write report 2")
+        self.assertContains(response, "Write report 1")
+        self.assertNotContains(response, "Write report 0")
+        self.assertNotContains(response, "Foreign report")
+        self.assertContains(response, "Show more matches")
+
+        last = Task.objects.get(name="Write report 1")
+        response = self.client.get(url, {"q": "report", "after": last.id}, **self.htmx)
+        self.assertContains(response, "Write report 0")
+        self.assertNotContains(response, "Search:")
+
+        self.assertContains(self.client.get(url, {"q": "re"}, **self.htmx), "at least 3")
+        self.assertContains(self.client.get(url, {"q": ""}, **self.htmx), "Inbox")
+
+    @override_settings(DASHBOARD_TASK_PAGE_SIZE=2)
+    def test_due_feed_lists_open_tasks_by_deadline(self):
+        today = timezone.localdate()
+        inbox = Project.objects.create(owner=self.user, name="Inbox")
+        work = Project.objects.create(owner=self.user, name="Work")
+        Task.objects.create(project=work, name="Tomorrow", deadline=today + timedelta(days=1))
+        Task.objects.create(project=inbox, name="Late", deadline=today - timedelta(days=2))
+        Task.objects.create(project=inbox, name="Now", deadline=today)
+        Task.objects.create(project=inbox, name="Later", deadline=today + timedelta(days=5))
+        Task.objects.create(project=inbox, name="Finished", deadline=today, is_done=True)
+        Task.objects.create(
+            project=Project.objects.create(owner=self.other, name="Other"),
+            name="Foreign",
+            deadline=today,
+        )
+        url = reverse("service:task_due")
+        response = self.client.get(url, **self.htmx)
+        content = response.content.decode()
+        self.assertLess(content.index("Late"), content.index("Now"))
+        self.assertContains(response, "Overdue")
+        self.assertNotContains(response, "Tomorrow")
+        self.assertContains(response, "Show more due tasks")
+        for name in ("Later", "Finished", "Foreign"):
+            self.assertNotContains(response, name)
+
+        now = Task.objects.get(name="Now")
+        response = self.client.get(url, {"after": now.id}, **self.htmx)
+        self.assertContains(response, "Tomorrow")
+        self.assertContains(response, "Work")
+        self.assertNotContains(response, "Show more due tasks")
+        self.assertContains(self.client.get(reverse("main:dashboard")), "Due soon")
+
+    def test_task_export_streams_owned_tasks(self):
+        inbox = Project.objects.create(owner=self.user, name="Inbox")
+        Project.objects.create(owner=self.user, name="Empty")
+        Task.objects.create(project=inbox, name="Write, report", deadline=date(2030, 1, 2))
+        Task.objects.create(project=inbox, name="Done", is_done=True)
+        Task.objects.create(
+            project=Project.objects.create(owner=self.other, name="Other"), name="Foreign"
+        )
+        url = reverse("service:task_export")
+        response = self.client.get(url)
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertIn('filename="tasks.csv"', response["Content-Disposition"])
+        rows = list(csv.reader(b"".join(response.streaming_content).decode().splitlines()))
+        self.assertEqual(rows[0], list(transfer.EXPORT_FIELDS))
+        self.assertEqual(rows[1], ["Empty", "", "", "", "", ""])
+        self.assertEqual(rows[2][:4], ["Inbox", "Write, report", "0", "2030-01-02"])
+        self.assertEqual(rows[3][:3], ["Inbox", "Done", "1"])
+        self.assertEqual(len(rows), 4)
+
+        response = self.client.get(url, {"format": "ndjson"})
+        records = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+        self.assertEqual([record["name"] for record in records], [None, "Write, report", "Done"])
+        self.assertIs(records[2]["is_done"], True)
+        self.assertEqual(self.client.get(url, {"format": "xml"}).status_code, 400)
+
+    def test_task_import_validates_and_bulk_inserts(self):
+        inbox = Project.objects.create(owner=self.user, name="Inbox")
+        Task.objects.create(project=inbox, name="Existing", priority=PRIORITY_GAP)
+        Project.objects.create(owner=self.other, name="Work")
+        upload = SimpleUploadedFile(
+            "tasks.csv",
+            "\ufeffproject,name,is_done,deadline\n"
+            "Inbox,First,0,2030-01-02\n"
+            "Inbox,,0,\n"
+            "Work,Second,1,\n"
+            ",No project,0,\n"
+            "Inbox,Bad date,0,tomorrow\n"
+            "Empty,,,\n".encode(),
+        )
+        response = self.client.post(reverse("service:task_import"), {"file": upload}, **self.htmx)
+        self.assertEqual(response["HX-Trigger"], "tasks-imported")
+        self.assertContains(response, "Imported 2 tasks from 6 rows")
+        self.assertContains(response, "Line 5:")
+        self.assertContains(response, "Line 6:")
+
+        first = Task.objects.get(name="First")
+        self.assertEqual((first.project, first.deadline), (inbox, date(2030, 1, 2)))
+        self.assertGreater(first.priority, PRIORITY_GAP)
+        second = Task.objects.get(name="Second")
+        self.assertEqual(second.project.owner, self.user)
+        self.assertIsNotNone(second.done_at)
+        self.assertTrue(Project.objects.filter(owner=self.user, name="Empty").exists())
+        inbox.refresh_from_db()
+        self.assertEqual(inbox.open_count, 1)
+
+        path = Path(tempfile.mkdtemp()) / "tasks.ndjson"
+        path.write_text('{"project": "Inbox", "name": "Third"}\nnot json\n')
+        out, err = StringIO(), StringIO()
+        call_command("import_tasks", str(path), user="owner", stdout=out, stderr=err)
+        self.assertIn("1 task(s) imported from 2 row(s)", out.getvalue())
+        self.assertIn("line 2: Invalid JSON", err.getvalue())
+        self.assertTrue(inbox.tasks.filter(name="Third").exists())
+
+    def test_task_import_reports_bad_values_and_unreadable_files(self):
+        Project.objects.create(owner=self.user, name="Inbox")
+        upload = SimpleUploadedFile(
+            "tasks.ndjson",
+            b'{"project": "Inbox", "name": 5}\n'
+            b'{"project": ["Inbox"], "name": "List"}\n'
+            b'{"project": "Inbox", "name": "Date", "deadline": 5}\n'
+            b'{"project": "Inbox", "name": "Done", "is_done": true}\n',
+        )
+        response = self.client.post(reverse("service:task_import"), {"file": upload}, **self.htmx)
+        self.assertContains(response, "Imported 1 task from 4 rows")
+        self.assertContains(response, "name must be a string.")
+        self.assertContains(response, "project must be a string.")
+        self.assertContains(response, "deadline must be a string.")
+        self.assertTrue(Task.objects.get(name="Done").is_done)
+
+        upload = SimpleUploadedFile(
+            "tasks.csv", b"project,name\nInbox,Good\nInbox,Bad \xff\xfe\n"
+        )
+        response = self.client.post(reverse("service:task_import"), {"file": upload}, **self.htmx)
+        self.assertEqual(response.status_code, 200)
+        # Decoding goes by chunk, so a small file stops before its first row.
+        self.assertContains(response, "Line 1: Not valid UTF-8; import stopped.")
+
+        huge = b"x" * (csv.field_size_limit() + 1)
+        records = transfer.read_records(io.BytesIO(b"project,name\nInbox," + huge), "csv")
+        self.assertIn("Invalid CSV", str(list(records)[-1][1]))
+
+    def test_task_update_form_is_conditional(self):
+        caches["default"].clear()
+        project = Project.objects.create(owner=self.user, name="Inbox")
+        task = Task.objects.create(project=project, name="Task")
+        url = reverse("service:task_update", args=[task.id])
+        self.client.get(reverse("main:dashboard"))
+        etag = self.client.get(url, **self.htmx)["ETag"]
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag, **self.htmx)
+        self.assertEqual(response.status_code, 304)
+        # The full-page variant of the same URL is a different representation.
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 302)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(url, {"name": "Renamed"}, **self.htmx)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag, **self.htmx)
+        self.assertContains(response, "Renamed")
 
     def test_task_delete_last_returns_empty_state(self):
         project = Project.objects.create(owner=self.user, name="Inbox")
@@ -156,3 +834,527 @@ class ProjectTaskFlowTests(TestCase):
         )
         self.assertEqual(response.status_code, 200)
         self.assertContains(response, "No tasks yet.")
+
+    @override_settings(DASHBOARD_TASK_PAGE_SIZE=2)
+    def test_task_page_streams_next_window(self):
+        project = Project.objects.create(owner=self.user, name="Inbox")
+        for priority in range(1, 6):
+            Task.objects.create(project=project, name=f"Task {priority}", priority=priority)
+        third = Task.objects.get(project=project, priority=2)
+        response = self.client.get(
+            reverse("service:task_page", args=[project.id]),
+            {"after": third.id},
+            **self.htmx,
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Task 3")
+        self.assertContains(response, "Task 4")
+        self.assertNotContains(response, "Task 5")
+        self.assertContains(response, "Show more tasks")
+
+    def test_task_page_cursor_must_belong_to_project(self):
+        project = Project.objects.create(owner=self.user, name="Inbox")
+        foreign = Task.objects.create(
+            project=Project.objects.create(owner=self.other, name="Other"),
+            name="Foreign",
+        )
+        response = self.client.get(
+            reverse("service:task_page", args=[project.id]),
+            {"after": foreign.id},
+            **self.htmx,
+        )
+        self.assertEqual(response.status_code, 404)
+        for after in ("²", "9" * 30, "0"):
+            response = self.client.get(
+                reverse("service:task_page", args=[project.id]), {"after": after}, **self.htmx
+            )
+            self.assertEqual(response.status_code, 400)
+
+    @override_settings(DASHBOARD_PROJECT_PAGE_SIZE=2)
+    def test_project_page_keyset(self):
+        projects = [
+            Project.objects.create(owner=self.user, name=f"List {i}") for i in range(3)
+        ]
+        response = self.client.get(
+            reverse("service:project_page"),
+            {"after": projects[1].id},
+            **self.htmx,
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "List 0")
+        self.assertNotContains(response, "List 1")
+        self.assertNotContains(response, "Loading more lists")
+
+
+class PriorityConcurrencyTests(TransactionTestCase):
+    # Real commits, so parallel writers actually contend for the project's rank sequence.
+    def setUp(self):
+        if connection.vendor == "sqlite" and connection.is_in_memory_db():
+            self.skipTest("Writer threads cannot share an in-memory SQLite database.")
+        self.user = get_user_model().objects.create_user(username="owner", password="x")
+        self.project = Project.objects.create(owner=self.user, name="Inbox")
+
+    def test_parallel_creates_and_toggles_get_unique_ranks(self):
+        toggled = [
+            Task.objects.create(
+                project=self.project,
+                name=f"Toggle {number}",
+                priority=next_priority(self.project.id),
+            )
+            for number in range(4)
+        ]
+        workers = 8
+        barrier = threading.Barrier(workers + len(toggled))
+        statuses = []
+
+        def run(requests):
+            try:
+                client = self.client_class()
+                client.force_login(self.user)
+                barrier.wait()
+                for url, data in requests:
+                    response = client.post(url, data, HTTP_HX_REQUEST="true")
+                    statuses.append(response.status_code)
+            finally:
+                connections.close_all()
+
+        create_url = reverse("service:task_create", args=[self.project.id])
+        threads = [
+            threading.Thread(
+                target=run, args=([(create_url, {"name": f"Task {worker}-{n}"}) for n in range(5)],)
+            )
+            for worker in range(workers)
+        ]
+        threads += [
+            threading.Thread(
+                target=run,
+                args=([(reverse("service:task_toggle_done", args=[task.id]), {})] * 3,),
+            )
+            for task in toggled
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(set(statuses), {200})
+        ranks = list(self.project.tasks.values_list("priority", flat=True))
+        self.assertEqual(len(ranks), workers * 5 + len(toggled))
+        self.assertEqual(len(set(ranks)), len(ranks))
+        self.project.refresh_from_db()
+        self.assertGreaterEqual(self.project.priority_seq, max(ranks))
+
+    def test_parallel_toggles_of_one_task_keep_counters_exact(self):
+        self.project.open_count = 1
+        self.project.save(update_fields=["open_count"])
+        task = Task.objects.create(project=self.project, name="Task")
+        toggles = 5
+        barrier = threading.Barrier(toggles)
+        url = reverse("service:task_toggle_done", args=[task.id])
+
+        def run():
+            try:
+                client = self.client_class()
+                client.force_login(self.user)
+                barrier.wait()
+                client.post(url, HTTP_HX_REQUEST="true")
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=run) for _ in range(toggles)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.project.refresh_from_db()
+        self.assertTrue(Task.objects.get(id=task.id).is_done)
+        self.assertEqual((self.project.open_count, self.project.done_count), (0, 1))
+
+
+@override_settings(
+    CACHES={
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": tempfile.mkdtemp(prefix="fragments-"),
+        }
+    }
+)
+class FragmentCacheTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username="owner",
+            password="pass12345",
+        )
+        self.client.force_login(self.user)
+        self.htmx = {"HTTP_HX_REQUEST": "true"}
+        self.project = Project.objects.create(owner=self.user, name="Inbox")
+        self.first = Task.objects.create(project=self.project, name="First", priority=1)
+        self.second = Task.objects.create(project=self.project, name="Second", priority=2)
+        caches["default"].clear()
+        caching.reset_stats()
+
+    def test_unchanged_rows_served_from_cache(self):
+        self.client.get(reverse("main:dashboard"))
+        self.assertEqual(caching.stats(), {"hits": 0, "misses": 3})
+        response = self.client.get(reverse("main:dashboard"))
+        self.assertContains(response, "Second")
+        self.assertEqual(caching.stats(), {"hits": 3, "misses": 3})
+
+    def test_toggle_invalidates_only_that_row(self):
+        self.client.get(reverse("main:dashboard"))
+        caching.reset_stats()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse("service:task_toggle_done", args=[self.first.id]),
+                **self.htmx,
+            )
+        # The toggle response rendered (and stored) the changed row.
+        self.assertEqual(caching.stats(), {"hits": 0, "misses": 1})
+        caching.reset_stats()
+        response = self.client.get(reverse("main:dashboard"))
+        self.assertContains(response, "app-task-done")
+        # Only the header misses: the toggle changed its counters.
+        self.assertEqual(caching.stats(), {"hits": 2, "misses": 1})
+
+    def test_header_cached_before_a_write_is_not_served_after_it(self):
+        stale = Project.objects.get(id=self.project.id)
+        # A write that lands between reading the row and caching its header.
+        Project.objects.filter(id=self.project.id).update(open_count=5)
+        caching.render_project_header(stale)
+        fresh = Project.objects.get(id=self.project.id)
+        self.assertIn("5 open", caching.render_project_header(fresh))
+
+    def test_task_row_links_are_filled_from_patterns(self):
+        html = caching.render_task_row(self.second, None)
+        task_id = self.second.id
+        self.assertIn(f'"{reverse("service:task_toggle_done", args=[task_id])}"', html)
+        self.assertIn(f'"{reverse("service:task_move", args=[task_id, "down"])}"', html)
+        self.assertIn(f'"{reverse("service:task_update", args=[task_id])}"', html)
+        self.assertNotIn(caching._URL_MARK, html)
+        out = StringIO()
+        call_command("bench_render", tasks=[20], repeat=1, stdout=out)
+        self.assertIn("20 rows:", out.getvalue())
+
+    def test_project_rename_refreshes_cached_header(self):
+        self.client.get(reverse("main:dashboard"))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse("service:project_update", args=[self.project.id]),
+                {"name": "Renamed"},
+                **self.htmx,
+            )
+        response = self.client.get(reverse("main:dashboard"))
+        self.assertContains(response, "Renamed")
+
+
+@override_settings(API_PAGE_SIZE=2)
+class ApiTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username="owner", password="pass12345")
+        self.other = get_user_model().objects.create_user(username="other", password="pass12345")
+        self.client.force_login(self.user)
+        self.project = Project.objects.create(owner=self.user, name="Inbox")
+        self.tasks = [
+            Task.objects.create(project=self.project, name=f"Task {number}", priority=number)
+            for number in range(3)
+        ]
+        self.foreign = Project.objects.create(owner=self.other, name="Other")
+
+    def post_json(self, url, data):
+        return self.client.post(url, json.dumps(data), content_type="application/json")
+
+    def test_lists_are_paginated_projected_and_scoped(self):
+        url = reverse("api:tasks", args=[self.project.id])
+        with self.assertNumQueries(4):  # session, user, ownership, one page
+            page = self.client.get(url, {"fields": "name"}).json()
+        self.assertEqual(
+            page["results"], [{"id": task.id, "name": task.name} for task in self.tasks[:2]]
+        )
+        page = self.client.get(url, {"after": page["next"]}).json()
+        self.assertEqual([row["name"] for row in page["results"]], ["Task 2"])
+        self.assertEqual(page["results"][0]["project"], self.project.id)
+        self.assertIsNone(page["next"])
+
+        self.assertEqual(self.client.get(url, {"fields": "owner"}).status_code, 400)
+        for bad in ("²", "9" * 30):
+            self.assertEqual(self.client.get(url, {"after": bad}).status_code, 400)
+            bulk = self.post_json(reverse("api:task_bulk"), {"action": "delete", "ids": [bad]})
+            self.assertEqual(bulk.status_code, 400)
+        foreign = reverse("api:tasks", args=[self.foreign.id])
+        self.assertEqual(self.client.get(foreign).json(), {"error": "Not found."})
+        projects = self.client.get(reverse("api:projects")).json()["results"]
+        self.assertEqual([row["name"] for row in projects], ["Inbox"])
+
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.client.logout()
+        self.assertEqual(self.client.get(url).status_code, 401)
+
+    def test_writes_validate_and_update_counters(self):
+        url = reverse("api:tasks", args=[self.project.id])
+        response = self.post_json(url, {"name": " ", "deadline": "2000-01-01"})
+        self.assertEqual(set(response.json()["errors"]), {"name", "deadline"})
+        response = self.post_json(url, {"name": "New", "deadline": "2099-01-01"})
+        self.assertEqual(response.status_code, 201)
+        created = response.json()
+        self.assertEqual((created["name"], created["deadline"]), ("New", "2099-01-01"))
+
+        task = reverse("api:task", args=[created["id"]])
+        renamed = self.post_json(task, {"name": "Renamed"}).json()
+        self.assertEqual((renamed["name"], renamed["deadline"]), ("Renamed", "2099-01-01"))
+        toggled = self.client.post(reverse("api:task_toggle", args=[created["id"]])).json()
+        self.assertIs(toggled["is_done"], True)
+        self.assertIsNotNone(toggled["done_at"])
+        self.project.refresh_from_db()
+        self.assertEqual((self.project.open_count, self.project.done_count), (0, 1))
+
+        moved = self.post_json(
+            reverse("api:task_move", args=[self.tasks[2].id]), {"direction": "up", "steps": 2}
+        ).json()
+        self.assertLess(moved["priority"], self.tasks[0].priority)
+        self.assertEqual(
+            self.post_json(reverse("api:task_move", args=[self.tasks[0].id]), {}).status_code,
+            400,
+        )
+        url = reverse("api:task_move", args=[self.tasks[0].id])
+        for steps in (10**25, 1001, 0, "²"):
+            response = self.post_json(url, {"direction": "down", "steps": steps})
+            self.assertEqual(response.status_code, 400)
+
+        bulk = self.post_json(
+            reverse("api:task_bulk"),
+            {"action": "move", "ids": [self.tasks[0].id], "project": self.foreign.id},
+        )
+        self.assertIn("project", bulk.json()["errors"])
+        target = Project.objects.create(owner=self.user, name="Work")
+        bulk = self.post_json(
+            reverse("api:task_bulk"),
+            {"action": "move", "ids": [self.tasks[0].id], "project": target.id},
+        ).json()
+        self.assertEqual(bulk["updated"][0]["project"], target.id)
+        self.assertEqual(bulk["removed"], [])
+        self.assertEqual({row["id"] for row in bulk["projects"]}, {self.project.id, target.id})
+        self.assertEqual(
+            self.post_json(reverse("api:task", args=[self.tasks[1].id]), ["x"]).status_code, 400
+        )
+
+    @override_settings(SYNC_GRACE_SECONDS=0, SYNC_PAGE_SIZE=2)
+    def test_sync_returns_only_the_delta(self):
+        url = reverse("api:sync")
+        first = self.client.get(url).json()
+        self.assertEqual([row["name"] for row in first["projects"]], ["Inbox"])
+        ids = [task.id for task in self.tasks]
+        self.assertEqual([row["id"] for row in first["tasks"]], ids[:2])
+        self.assertTrue(first["more"])
+        rest = self.client.get(url, {"since": first["cursor"]}).json()
+        self.assertEqual([row["id"] for row in rest["tasks"]], ids[2:])
+        self.assertFalse(rest["more"])
+        self.assertEqual(self.client.get(url, {"since": rest["cursor"]}).json()["tasks"], [])
+
+        self.client.post(reverse("api:task_toggle", args=[self.tasks[1].id]))
+        self.client.post(reverse("service:task_delete", args=[self.tasks[0].id]))
+        with self.assertNumQueries(5):
+            delta = self.client.get(url, {"since": rest["cursor"]}).json()
+        self.assertEqual([(row["id"], row["is_done"]) for row in delta["tasks"]], [(ids[1], True)])
+        self.assertEqual(delta["projects"], [])
+        self.assertEqual(delta["deleted"], {"projects": [], "tasks": [ids[0]]})
+
+        self.client.post(reverse("service:project_delete", args=[self.project.id]))
+        delta = self.client.get(url, {"since": delta["cursor"]}).json()
+        # Chunked deletion buries the tasks before the project row goes.
+        self.assertEqual(delta["deleted"], {"projects": [], "tasks": ids[1:]})
+        self.assertEqual(delta["tasks"], [])
+        delta = self.client.get(url, {"since": delta["cursor"]}).json()
+        self.assertEqual(delta["deleted"], {"projects": [self.project.id], "tasks": []})
+
+        self.assertEqual(self.client.get(url, {"since": "nope"}).status_code, 400)
+        old = (timezone.now() - timedelta(days=90), 0)
+        expired = sync.encode_cursor({"projects": old, "tasks": old, "deleted": old})
+        self.assertEqual(self.client.get(url, {"since": expired}).status_code, 410)
+        out = StringIO()
+        call_command("prune_tombstones", days=0, stdout=out)
+        self.assertIn("4 tombstone(s) pruned", out.getvalue())
+
+
+@override_settings(
+    EVENTS_BROKER="service.events.InMemoryBroker",
+    EVENTS_HEARTBEAT_SECONDS=1,
+    EVENTS_QUEUE_SIZE=2,
+)
+class LiveEventsTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username="owner",
+            password="pass12345",
+        )
+        self.project = Project.objects.create(owner=self.user, name="Inbox")
+        self.task = Task.objects.create(project=self.project, name="Task")
+
+    async def test_stream_pushes_other_tabs_writes_as_oob_fragments(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(
+            reverse("service:task_events"), {"client": "tab-a"}
+        )
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        stream = response.streaming_content
+        try:
+            self.assertIn(b"retry:", await anext(stream))
+            # tab-a's own toggle is skipped; tab-b's arrives as an OOB row plus counts.
+            await sync_to_async(self.toggle)("tab-a")
+            await sync_to_async(self.toggle)("tab-b")
+            frame = (await asyncio.wait_for(anext(stream), 5)).decode()
+        finally:
+            await stream.aclose()
+        self.assertTrue(frame.startswith("id: "))
+        self.assertIn("event: task", frame)
+        self.assertIn(f'id="task-{self.task.id}" hx-swap-oob="true"', frame)
+        self.assertIn(f'id="project-{self.project.id}-counts"', frame)
+        self.assertNotIn("app-task-done", frame)
+
+    async def test_slow_reader_is_told_to_reload(self):
+        broker = events.broker()
+        async with broker.subscribe(self.user.id) as subscription:
+            for number in range(5):
+                await asyncio.to_thread(
+                    broker.publish,
+                    self.user.id,
+                    {"event": "task", "data": str(number), "origin": ""},
+                )
+            await asyncio.sleep(0)
+            self.assertEqual((await subscription.get())["event"], events.RELOAD)
+            self.assertTrue(subscription.queue.empty())
+        self.assertFalse(broker.listening(self.user.id))
+
+    def test_postgres_broker_skips_users_without_streams(self):
+        caches["default"].clear()
+        broker = events.PostgresBroker()
+        self.assertFalse(broker.listening(self.user.id))
+        broker.touch(self.user.id)
+        self.assertTrue(broker.listening(self.user.id))
+        # Per-worker LocMemCaches cannot see other workers' streams.
+        with override_settings(WEB_CONCURRENCY=4):
+            self.assertTrue(broker.listening(self.user.id + 1))
+
+    async def test_stream_marks_its_user_present(self):
+        broker, touched = events.broker(), []
+        broker.touch = touched.append
+        stream = events.stream(self.user.id, "")
+        try:
+            await anext(stream)
+        finally:
+            await stream.aclose()
+            del broker.touch
+        self.assertEqual(touched, [self.user.id])
+
+    def toggle(self, client_id):
+        # Sync on purpose: the test transaction's on-commit hooks live on this thread.
+        self.client.force_login(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse("service:task_toggle_done", args=[self.task.id]),
+                HTTP_HX_REQUEST="true",
+                HTTP_X_CLIENT_ID=client_id,
+            )
+
+    def test_stale_reconnect_reloads(self):
+        async def first_frames():
+            stream = events.stream(self.user.id, "", last_event_id="1")
+            try:
+                return [await anext(stream), await anext(stream)]
+            finally:
+                await stream.aclose()
+
+        frames = async_to_sync(first_frames)()
+        self.assertIn("event: reload", frames[1])
+
+
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username="owner",
+            password="pass12345",
+        )
+        self.project = Project.objects.create(owner=self.user, name="Inbox")
+
+    async def test_task_writes(self):
+        response = await self.call(
+            async_views.TaskCreateView, project_id=self.project.id, data={"name": "First"}
+        )
+        self.assertContains(response, "First")
+        task = await Task.objects.aget(project=self.project, name="First")
+        self.assertEqual(task.priority, PRIORITY_GAP)
+
+        response = await self.call(async_views.TaskToggleDoneView, task_id=task.id)
+        self.assertEqual(response.status_code, 200)
+        await task.arefresh_from_db()
+        self.assertTrue(task.is_done)
+        await self.project.arefresh_from_db()
+        self.assertEqual((self.project.open_count, self.project.done_count), (0, 1))
+
+        response = await self.call(
+            async_views.TaskUpdateView, task_id=task.id, data={"name": "Renamed"}
+        )
+        self.assertContains(response, "Renamed")
+        response = await self.call(async_views.TaskMoveView, task_id=task.id, direction="up")
+        self.assertEqual(response.content, b"")
+
+        response = await self.call(async_views.TaskDeleteView, task_id=task.id)
+        self.assertContains(response, "No tasks yet.")
+        await self.project.arefresh_from_db()
+        self.assertEqual((self.project.open_count, self.project.done_count), (0, 0))
+
+    async def test_project_writes(self):
+        response = await self.call(async_views.ProjectCreateView, data={"name": "Inbox"})
+        self.assertContains(response, "You already have a project with this name.")
+        response = await self.call(async_views.ProjectCreateView, data={"name": "Work"})
+        self.assertContains(response, "Work")
+        project = await Project.objects.aget(owner=self.user, name="Work")
+        response = await self.call(
+            async_views.ProjectUpdateView, project_id=project.id, data={"name": "Home"}
+        )
+        self.assertContains(response, "Home")
+        await self.call(async_views.ProjectDeleteView, project_id=project.id)
+        response = await self.call(async_views.ProjectDeleteView, project_id=self.project.id)
+        self.assertContains(response, "No projects yet.")
+
+    async def test_scoped_to_owner(self):
+        other = await get_user_model().objects.acreate_user(username="other", password="x")
+        foreign = await Task.objects.acreate(
+            project=await Project.objects.acreate(owner=other, name="Other"), name="Task"
+        )
+        with self.assertRaises(Http404):
+            await self.call(async_views.TaskToggleDoneView, task_id=foreign.id)
+        response = await self.call(
+            async_views.TaskToggleDoneView, user=AnonymousUser(), task_id=foreign.id
+        )
+        self.assertEqual(response.status_code, 302)
+
+    async def test_update_form_is_conditional(self):
+        await sync_to_async(caches["default"].clear)()
+        task = await Task.objects.acreate(project=self.project, name="Task")
+        response = await self.call(async_views.TaskUpdateView, "get", task_id=task.id)
+        response = await self.call(
+            async_views.TaskUpdateView,
+            "get",
+            headers={"If-None-Match": response["ETag"]},
+            task_id=task.id,
+        )
+        self.assertEqual(response.status_code, 304)
+
+    async def call(self, view, method="post", data=None, user=None, headers=None, **kwargs):
+        # Runs an async view directly: the factory skips middleware, so the bits it
+        # would add (request.htmx, request.auser, the CSRF cookie) are set by hand.
+        factory = AsyncRequestFactory()
+        request = getattr(factory, method)(
+            "/", data or {}, headers={"HX-Request": "true", **(headers or {})}
+        )
+        request.htmx = HtmxDetails(request)
+        request.META["CSRF_COOKIE"] = "test"
+        user = self.user if user is None else user
+
+        async def auser():
+            return user
+
+        request.auser = auser
+        return await view.as_view()(request, **kwargs)
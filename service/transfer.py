@@ -0,0 +1,253 @@
+import csv
+import io
+import json
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import date
+
+from django import forms
+from django.db import transaction
+from django.utils import timezone
+
+from . import counters
+from .caching import bump_user_version
+from .forms import validate_deadline, validate_project_name, validate_task_name
+from .models import Project, Task
+from .ordering import PRIORITY_GAP, next_priority
+from .pagination import TASK_ORDERING
+
+EXPORT_FIELDS = ("project", "name", "is_done", "deadline", "created_at", "done_at")
+EXPORT_CHUNK_SIZE = 2000
+IMPORT_BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 100
+FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+
+@dataclass
+class ImportResult:
+    rows: int = 0
+    tasks: int = 0
+    projects: int = 0  # newly created
+    skipped: int = 0
+    errors: list = field(default_factory=list)  # (line, message), first MAX_REPORTED_ERRORS
+    seconds: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+# Export: one row per task, plus one with an empty name per project without tasks.
+# Rows come from a server-side cursor, so memory stays flat however many there are.
+
+
+def export_rows(owner):
+    yield from _empty_projects(owner).values_list("name").iterator()
+    yield from _task_rows(owner).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+async def aexport_rows(owner):
+    async for row in _empty_projects(owner).values_list("name").aiterator():
+        yield row
+    async for row in _task_rows(owner).aiterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield row
+
+
+def encode(rows, fmt: str):
+    # Lines are joined per chunk so the server writes a few large pieces, not 1M tiny ones.
+    line = _line_encoder(fmt)
+    chunk = [line(EXPORT_FIELDS)] if fmt == "csv" else []
+    for row in rows:
+        chunk.append(line(_pad(row)))
+        if len(chunk) >= EXPORT_CHUNK_SIZE:
+            yield "".join(chunk)
+            chunk = []
+    if chunk:
+        yield "".join(chunk)
+
+
+async def aencode(rows, fmt: str):
+    line = _line_encoder(fmt)
+    chunk = [line(EXPORT_FIELDS)] if fmt == "csv" else []
+    async for row in rows:
+        chunk.append(line(_pad(row)))
+        if len(chunk) >= EXPORT_CHUNK_SIZE:
+            yield "".join(chunk)
+            chunk = []
+    if chunk:
+        yield "".join(chunk)
+
+
+# Import: records are parsed one at a time from a binary stream and validated with
+# the form rules; valid tasks are inserted with bulk_create, one transaction per batch.
+
+
+def guess_format(filename: str) -> str:
+    return "ndjson" if filename.lower().endswith((".ndjson", ".jsonl")) else "csv"
+
+
+def read_records(stream, fmt: str):
+    # Yields (line number, dict) pairs; a line that cannot be parsed yields its error.
+    # Input that cannot be read on (bad UTF-8, broken CSV quoting) ends the import
+    # with one error for the line after the last good one.
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    number = 0
+    try:
+        for number, record in _csv_records(text) if fmt == "csv" else _ndjson_records(text):
+            yield number, record
+    except UnicodeDecodeError:
+        yield number + 1, forms.ValidationError("Not valid UTF-8; import stopped.")
+    except csv.Error as error:
+        yield number + 1, forms.ValidationError(f"Invalid CSV ({error}); import stopped.")
+
+
+def import_records(owner, records, batch_size: int = IMPORT_BATCH_SIZE) -> ImportResult:
+    started = time.perf_counter()
+    result = ImportResult()
+    projects = dict(Project.objects.filter(owner=owner).values_list("name", "id"))
+    batch = []
+    for number, record in records:
+        result.rows += 1
+        try:
+            if isinstance(record, forms.ValidationError):
+                raise record
+            project_name, task = _clean(record)
+            project_id = projects.get(project_name)
+            if project_id is None:
+                project_id = projects[project_name] = _create_project(owner, project_name)
+                result.projects += 1
+        except forms.ValidationError as error:
+            result.skipped += 1
+            if len(result.errors) < MAX_REPORTED_ERRORS:
+                result.errors.append((number, " ".join(error.messages)))
+            continue
+        if task is not None:
+            task.project_id = project_id
+            batch.append(task)
+        if len(batch) >= batch_size:
+            result.tasks += _insert(owner, batch)
+            batch = []
+    if batch:
+        result.tasks += _insert(owner, batch)
+    result.seconds = time.perf_counter() - started
+    return result
+
+
+def _csv_records(text):
+    reader = csv.DictReader(text)
+    for record in reader:
+        yield reader.line_num, record
+
+
+def _ndjson_records(text):
+    for number, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as error:
+            yield number, forms.ValidationError(f"Invalid JSON: {error.msg}")
+            continue
+        if not isinstance(record, dict):
+            record = forms.ValidationError("Expected a JSON object.")
+        yield number, record
+
+
+def _empty_projects(owner):
+    return Project.objects.filter(owner=owner, tasks__isnull=True).order_by("name")
+
+
+def _task_rows(owner):
+    return (
+        Task.objects.filter(project__owner=owner)
+        .order_by("project_id", *TASK_ORDERING)
+        .values_list("project__name", *EXPORT_FIELDS[1:])
+    )
+
+
+def _pad(row):
+    return tuple(row) + (None,) * (len(EXPORT_FIELDS) - len(row))
+
+
+def _line_encoder(fmt: str):
+    if fmt == "csv":
+        writer = csv.writer(_Echo())
+        return lambda row: writer.writerow(
+            ["" if value is None else _text(value) for value in row]
+        )
+    return lambda row: (
+        json.dumps(dict(zip(EXPORT_FIELDS, row, strict=True)), default=_text, ensure_ascii=False)
+        + "\n"
+    )
+
+
+def _text(value):
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(value)
+
+
+def _clean(record):
+    # (project name, unsaved Task or None for a project-only row)
+    project_name = validate_project_name(_string(record, "project"))
+    name = _string(record, "name")
+    if not name.strip():
+        return project_name, None
+    is_done = record.get("is_done")
+    if isinstance(is_done, int):
+        # NDJSON true/false or 0/1 (bool is an int).
+        is_done = bool(is_done)
+    else:
+        is_done = _string(record, "is_done").strip().lower() in {"1", "true", "yes"}
+    deadline = None
+    if _string(record, "deadline"):
+        deadline = validate_deadline(forms.DateField().clean(record["deadline"]))
+    return project_name, Task(
+        name=validate_task_name(name),
+        is_done=is_done,
+        deadline=deadline,
+    )
+
+
+def _string(record, name: str) -> str:
+    # NDJSON values can be any JSON type; only strings (or null) are accepted.
+    value = record.get(name)
+    if value is None:
+        return ""
+    if not isinstance(value, str):
+        raise forms.ValidationError(f"{name} must be a string.")
+    if "\x00" in value:
+        # PostgreSQL text cannot hold NUL.
+        raise forms.ValidationError(f"{name} contains a NUL character.")
+    return value
+
+
+def _create_project(owner, name: str) -> int:
+    project, _ = Project.objects.get_or_create(owner=owner, name=name)
+    return project.id
+
+
+def _insert(owner, tasks) -> int:
+    now = timezone.now()
+    with transaction.atomic():
+        slots = {
+            project_id: next_priority(project_id, count)
+            for project_id, count in Counter(task.project_id for task in tasks).items()
+        }
+        for task in tasks:
+            task.priority = slots[task.project_id]
+            slots[task.project_id] += PRIORITY_GAP
+            task.done_at = now if task.is_done else None
+        Task.objects.bulk_create(tasks)
+        counters.apply(*((None, counters.snapshot(task)) for task in tasks))
+        bump_user_version(owner.id)
+    return len(tasks)
+
+
+class _Echo:
+    # File-like sink for csv.writer: writerow() returns the formatted line.
+    def write(self, value):
+        return value
@@ -1,26 +1,63 @@
+from django.conf import settings
 from django.urls import path
 
+from . import async_views, views
 from .views import (
-    ProjectCreateView,
-    ProjectDeleteView,
-    ProjectUpdateView,
-    TaskCreateView,
-    TaskDeleteView,
-    TaskMoveView,
-    TaskToggleDoneView,
-    TaskUpdateView,
+    ProjectPageView,
+    TaskArchiveView,
+    TaskBatchView,
+    TaskBulkView,
+    TaskDueView,
+    TaskEventsView,
+    TaskExportView,
+    TaskImportView,
+    TaskPageView,
+    TaskReorderView,
+    TaskRestoreView,
+    TaskSearchView,
 )
 
+# The single-row write views have async twins with the same names and templates.
+_writes = async_views if settings.SERVICE_ASYNC_VIEWS else views
+ProjectCreateView = _writes.ProjectCreateView
+ProjectDeleteView = _writes.ProjectDeleteView
+ProjectUpdateView = _writes.ProjectUpdateView
+TaskCreateView = _writes.TaskCreateView
+TaskDeleteView = _writes.TaskDeleteView
+TaskMoveView = _writes.TaskMoveView
+TaskToggleDoneView = _writes.TaskToggleDoneView
+TaskUpdateView = _writes.TaskUpdateView
+
 app_name = "service"
 
 urlpatterns = [
     # projects
+    path("projects/page/", ProjectPageView.as_view(), name="project_page"),
     path("projects/create/", ProjectCreateView.as_view(), name="project_create"),
     path("projects/<int:project_id>/update/", ProjectUpdateView.as_view(), name="project_update"),
     path("projects/<int:project_id>/delete/", ProjectDeleteView.as_view(), name="project_delete"),
 
     # tasks
     path("projects/<int:project_id>/tasks/create/", TaskCreateView.as_view(), name="task_create"),
+    path("projects/<int:project_id>/tasks/page/", TaskPageView.as_view(), name="task_page"),
+    path(
+        "projects/<int:project_id>/tasks/reorder/",
+        TaskReorderView.as_view(),
+        name="task_reorder",
+    ),
+    path(
+        "projects/<int:project_id>/tasks/archive/",
+        TaskArchiveView.as_view(),
+        name="task_archive",
+    ),
+    path("tasks/bulk/", TaskBulkView.as_view(), name="task_bulk"),
+    path("tasks/batch/", TaskBatchView.as_view(), name="task_batch"),
+    path("tasks/due/", TaskDueView.as_view(), name="task_due"),
+    path("tasks/search/", TaskSearchView.as_view(), name="task_search"),
+    path("tasks/export/", TaskExportView.as_view(), name="task_export"),
+    path("tasks/import/", TaskImportView.as_view(), name="task_import"),
+    path("tasks/events/", TaskEventsView.as_view(), name="task_events"),
+    path("tasks/<int:task_id>/restore/", TaskRestoreView.as_view(), name="task_restore"),
     path("tasks/<int:task_id>/update/", TaskUpdateView.as_view(), name="task_update"),
     path("tasks/<int:task_id>/delete/", TaskDeleteView.as_view(), name="task_delete"),
     path("tasks/<int:task_id>/toggle-done/", TaskToggleDoneView.as_view(), name="task_toggle_done"),
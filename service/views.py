@@ -1,17 +1,28 @@
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.contrib.auth.views import redirect_to_login
+from django.core.handlers.asgi import ASGIRequest
 from django.db import transaction
-from django.db.models import Max
-from django.http import HttpResponse, HttpResponseBadRequest
+from django.http import HttpResponse, HttpResponseBadRequest, StreamingHttpResponse
 from django.shortcuts import redirect
 from django.shortcuts import get_object_or_404, render
 from django.utils import timezone
+from django.utils.decorators import method_decorator
 from django.views import View
 
-from .forms import ProjectForm, TaskForm
-from .models import Project, Task
+from . import archive, batch, cleanup, counters, events, transfer
+from .access import parse_id, user_projects, user_tasks
+from .bulk import apply as apply_bulk
+from .bulk import delete_task, toggle_done, update_task
+from .conditional import DataVersionMixin, conditional_get
+from .counters import due_soon_cutoff
+from .forms import ProjectForm, TaskBulkForm, TaskForm
+from .models import Project
+from .ordering import move, next_priority, place_after, reorder
+from .pagination import archive_window, due_window, project_window, task_window
+from .search import SEARCH_MIN_LENGTH, search_tasks
 
 
-class ProjectCreateView(LoginRequiredMixin, View):
+class ProjectCreateView(LoginRequiredMixin, DataVersionMixin, View):
     def get(self, request):
         if not getattr(request, "htmx", False):
             return redirect("main:dashboard")
@@ -24,6 +35,7 @@ class ProjectCreateView(LoginRequiredMixin, View):
             project = form.save(commit=False)
             project.owner = request.user
             project.save()
+            events.publish(request)
             task_form = TaskForm()
             if not getattr(request, "htmx", False):
                 return redirect("main:dashboard")
@@ -33,7 +45,7 @@ class ProjectCreateView(LoginRequiredMixin, View):
                 {
                     "project": project,
                     "task_form": task_form,
-                    "due_soon_cutoff": _due_soon_cutoff(),
+                    "due_soon_cutoff": due_soon_cutoff(),
                 },
             )
 
@@ -42,11 +54,31 @@ class ProjectCreateView(LoginRequiredMixin, View):
         return render(request, "partials/project_form.html", {"form": form})
 
 
-class ProjectUpdateView(LoginRequiredMixin, View):
+@method_decorator(conditional_get, name="get")
+class ProjectPageView(LoginRequiredMixin, View):
+    def get(self, request):
+        if not getattr(request, "htmx", False):
+            return redirect("main:dashboard")
+        after = _cursor(request, user_projects(request.user))
+        projects, projects_more = project_window(request.user, after)
+        return render(
+            request,
+            "partials/project_page.html",
+            {
+                "projects": projects,
+                "projects_more": projects_more,
+                "task_form": TaskForm(),
+                "due_soon_cutoff": due_soon_cutoff(),
+            },
+        )
+
+
+@method_decorator(conditional_get, name="get")
+class ProjectUpdateView(LoginRequiredMixin, DataVersionMixin, View):
     def get(self, request, project_id: int):
         if not getattr(request, "htmx", False):
             return redirect("main:dashboard")
-        project = get_object_or_404(Project, id=project_id, owner=request.user)
+        project = get_object_or_404(user_projects(request.user), id=project_id)
         if request.GET.get("mode") == "view":
             return render(request, "partials/project_header.html", {"project": project})
         form = ProjectForm(instance=project, owner=request.user)
@@ -57,10 +89,11 @@ class ProjectUpdateView(LoginRequiredMixin, View):
         )
 
     def post(self, request, project_id: int):
-        project = get_object_or_404(Project, id=project_id, owner=request.user)
+        project = get_object_or_404(user_projects(request.user), id=project_id)
         form = ProjectForm(request.POST, instance=project, owner=request.user)
         if form.is_valid():
             project = form.save()
+            events.publish(request)
             if not getattr(request, "htmx", False):
                 return redirect("main:dashboard")
             return render(
@@ -77,11 +110,12 @@ class ProjectUpdateView(LoginRequiredMixin, View):
         )
 
 
-class ProjectDeleteView(LoginRequiredMixin, View):
+class ProjectDeleteView(LoginRequiredMixin, DataVersionMixin, View):
     def post(self, request, project_id: int):
-        project = get_object_or_404(Project, id=project_id, owner=request.user)
-        project.delete()
-        if not Project.objects.filter(owner=request.user).exists():
+        project = get_object_or_404(user_projects(request.user), id=project_id)
+        cleanup.delete_project(project)
+        events.publish(request)
+        if not user_projects(request.user).exists():
             if not getattr(request, "htmx", False):
                 return redirect("main:dashboard")
             return render(request, "partials/project_empty.html")
@@ -90,132 +124,366 @@ class ProjectDeleteView(LoginRequiredMixin, View):
         return HttpResponse("")
 
 
-class TaskCreateView(LoginRequiredMixin, View):
+class TaskCreateView(LoginRequiredMixin, DataVersionMixin, View):
     def post(self, request, project_id: int):
-        project = get_object_or_404(Project, id=project_id, owner=request.user)
+        project = get_object_or_404(user_projects(request.user), id=project_id)
         form = TaskForm(request.POST or None)
         if form.is_valid():
             task = form.save(commit=False)
             task.project = project
-            max_priority = (
-                Task.objects.filter(project=project, is_done=False).aggregate(Max("priority"))[
-                    "priority__max"
-                ]
-                or 0
-            )
-            task.priority = max_priority + 1
-            task.save()
+            task.priority = next_priority(project.id)
+            with transaction.atomic():
+                task.save()
+                counters.apply((None, counters.snapshot(task)))
             if not getattr(request, "htmx", False):
+                events.publish(request)
                 return redirect("main:dashboard")
-            return render(
-                request,
-                "partials/task_row.html",
-                {"task": task, "due_soon_cutoff": _due_soon_cutoff()},
-            )
+            context = {
+                "task": task,
+                "counts": _counts(project.id),
+                "due_soon_cutoff": due_soon_cutoff(),
+            }
+            events.publish(request, "partials/task_event.html", {**context, "kind": "created"})
+            return render(request, "partials/task_created.html", context)
 
         if not getattr(request, "htmx", False):
             return redirect("main:dashboard")
         return render(request, "partials/task_form.html", {"form": form, "project": project})
 
 
-class TaskUpdateView(LoginRequiredMixin, View):
+@method_decorator(conditional_get, name="get")
+class TaskPageView(LoginRequiredMixin, View):
+    def get(self, request, project_id: int):
+        if not getattr(request, "htmx", False):
+            return redirect("main:dashboard")
+        project = get_object_or_404(user_projects(request.user), id=project_id)
+        after = _cursor(request, project.tasks.all())
+        tasks, tasks_more = task_window(project, after)
+        return render(
+            request,
+            "partials/task_page.html",
+            {
+                "project": project,
+                "tasks": tasks,
+                "tasks_more": tasks_more,
+                "due_soon_cutoff": due_soon_cutoff(),
+            },
+        )
+
+
+@method_decorator(conditional_get, name="get")
+class TaskArchiveView(LoginRequiredMixin, View):
+    def get(self, request, project_id: int):
+        if not getattr(request, "htmx", False):
+            return redirect("main:dashboard")
+        project = get_object_or_404(user_projects(request.user), id=project_id)
+        after = _cursor(request, project.archived_tasks.all())
+        tasks, tasks_more = archive_window(project, after)
+        return render(
+            request,
+            "partials/task_archive_page.html",
+            {"project": project, "tasks": tasks, "tasks_more": tasks_more, "after": after},
+        )
+
+
+class TaskRestoreView(LoginRequiredMixin, DataVersionMixin, View):
+    def post(self, request, task_id: int):
+        task = archive.restore(request.user, task_id)
+        if not getattr(request, "htmx", False):
+            events.publish(request)
+            return redirect("main:dashboard")
+        context = {
+            "task": task,
+            "counts": _counts(task.project_id),
+            "due_soon_cutoff": due_soon_cutoff(),
+        }
+        events.publish(request, "partials/task_restored.html", context)
+        return render(request, "partials/task_restored.html", context)
+
+
+@method_decorator(conditional_get, name="get")
+class TaskDueView(LoginRequiredMixin, View):
+    def get(self, request):
+        if not getattr(request, "htmx", False):
+            return redirect("main:dashboard")
+        after = _cursor(
+            request, user_tasks(request.user).filter(deadline__isnull=False)
+        )
+        tasks, tasks_more = due_window(request.user, after)
+        template = "partials/task_due_page.html" if after else "partials/task_due.html"
+        return render(
+            request,
+            template,
+            {
+                "tasks": tasks,
+                "tasks_more": tasks_more,
+                "after": after,
+                "today": timezone.localdate(),
+            },
+        )
+
+
+@method_decorator(conditional_get, name="get")
+class TaskSearchView(LoginRequiredMixin, View):
+    def get(self, request):
+        if not getattr(request, "htmx", False):
+            return redirect("main:dashboard")
+        query = request.GET.get("q", "").strip()
+        if not query:
+            # Cleared search: put the first window of project cards back.
+            projects, projects_more = project_window(request.user)
+            return render(
+                request,
+                "partials/project_page.html",
+                {
+                    "projects": projects,
+                    "projects_more": projects_more,
+                    "task_form": TaskForm(),
+                    "due_soon_cutoff": due_soon_cutoff(),
+                },
+            )
+
+        context = {
+            "query": query,
+            "min_length": SEARCH_MIN_LENGTH,
+            "too_short": len(query) < SEARCH_MIN_LENGTH,
+            "due_soon_cutoff": due_soon_cutoff(),
+        }
+        after = _cursor(request, user_tasks(request.user))
+        if not context["too_short"]:
+            context["tasks"], context["tasks_more"] = search_tasks(request.user, query, after)
+        if after is not None:
+            return render(request, "partials/task_search_page.html", {**context, "after": after})
+        return render(request, "partials/task_search.html", context)
+
+
+@method_decorator(conditional_get, name="get")
+class TaskUpdateView(LoginRequiredMixin, DataVersionMixin, View):
     def get(self, request, task_id: int):
         if not getattr(request, "htmx", False):
             return redirect("main:dashboard")
-        task = get_object_or_404(Task, id=task_id, project__owner=request.user)
+        task = get_object_or_404(user_tasks(request.user), id=task_id)
         form = TaskForm(instance=task)
         return render(request, "partials/task_form.html", {"form": form, "task": task})
 
     def post(self, request, task_id: int):
-        task = get_object_or_404(Task, id=task_id, project__owner=request.user)
+        task = get_object_or_404(user_tasks(request.user), id=task_id)
         form = TaskForm(request.POST, instance=task)
         if form.is_valid():
-            task = form.save()
+            task = update_task(request.user, task_id, form.cleaned_data)
             if not getattr(request, "htmx", False):
+                events.publish(request)
                 return redirect("main:dashboard")
-            return render(
-                request,
-                "partials/task_row.html",
-                {"task": task, "due_soon_cutoff": _due_soon_cutoff()},
-            )
+            context = {
+                "task": task,
+                "counts": _counts(task.project_id),
+                "due_soon_cutoff": due_soon_cutoff(),
+            }
+            events.publish(request, "partials/task_event.html", {**context, "kind": "updated"})
+            return render(request, "partials/task_updated.html", context)
         if not getattr(request, "htmx", False):
             return redirect("main:dashboard")
         return render(request, "partials/task_form.html", {"form": form, "task": task})
 
 
-class TaskDeleteView(LoginRequiredMixin, View):
+class TaskDeleteView(LoginRequiredMixin, DataVersionMixin, View):
     def post(self, request, task_id: int):
-        task = get_object_or_404(Task, id=task_id, project__owner=request.user)
-        project = task.project
-        task.delete()
-        if project and not project.tasks.exists():
-            if not getattr(request, "htmx", False):
-                return redirect("main:dashboard")
-            return render(request, "partials/task_empty.html", {"project": project})
+        project = delete_task(request.user, task_id).project
+        deleted_id = task_id
         if not getattr(request, "htmx", False):
+            events.publish(request)
             return redirect("main:dashboard")
-        return HttpResponse("")
+        context = {
+            "project": project,
+            "empty": not project.tasks.exists(),
+            "counts": _counts(project.id),
+        }
+        events.publish(
+            request,
+            "partials/task_event.html",
+            {**context, "kind": "deleted", "task_id": deleted_id},
+        )
+        return render(request, "partials/task_deleted.html", context)
 
 
-class TaskToggleDoneView(LoginRequiredMixin, View):
+class TaskToggleDoneView(LoginRequiredMixin, DataVersionMixin, View):
     def post(self, request, task_id: int):
-        task = get_object_or_404(Task, id=task_id, project__owner=request.user)
-        task.is_done = not task.is_done
-        max_priority = (
-            Task.objects.filter(project=task.project, is_done=task.is_done).aggregate(Max("priority"))[
-                "priority__max"
-            ]
-            or 0
-        )
-        task.priority = max_priority + 1
-        task.save(update_fields=["is_done", "priority"])
+        task = toggle_done(request.user, task_id)
         if not getattr(request, "htmx", False):
+            events.publish(request)
             return redirect("main:dashboard")
-        return render(
-            request,
-            "partials/task_row.html",
-            {"task": task, "due_soon_cutoff": _due_soon_cutoff()},
-        )
+        context = {
+            "task": task,
+            "counts": _counts(task.project_id),
+            "due_soon_cutoff": due_soon_cutoff(),
+        }
+        events.publish(request, "partials/task_event.html", {**context, "kind": "updated"})
+        return render(request, "partials/task_updated.html", context)
 
 
-class TaskMoveView(LoginRequiredMixin, View):
+class TaskMoveView(LoginRequiredMixin, DataVersionMixin, View):
     def post(self, request, task_id: int, direction: str):
         if direction not in {"up", "down"}:
             return HttpResponseBadRequest("Invalid direction")
 
-        task = get_object_or_404(Task, id=task_id, project__owner=request.user)
+        task = get_object_or_404(user_tasks(request.user), id=task_id)
+        neighbour = move(task, direction)
+
+        if not getattr(request, "htmx", False):
+            if neighbour is not None:
+                events.publish(request)
+            return redirect("main:dashboard")
+        if neighbour is None:
+            return HttpResponse("")
+        # Only the moved row travels back; it is re-inserted next to its neighbour.
+        context = {
+            "task": task,
+            "neighbour": neighbour,
+            "direction": direction,
+            "due_soon_cutoff": due_soon_cutoff(),
+        }
+        events.publish(request, "partials/task_moved.html", context)
+        return render(request, "partials/task_moved.html", context)
 
-        with transaction.atomic():
-            tasks = list(
-                Task.objects.select_for_update()
-                .filter(project=task.project, is_done=task.is_done)
-                .order_by("priority", "created_at", "id")
-            )
-            try:
-                index = next(i for i, item in enumerate(tasks) if item.id == task.id)
-            except StopIteration:
-                return HttpResponseBadRequest("Task not found")
 
-            if direction == "up" and index > 0:
-                prev_task = tasks[index - 1]
-                task.priority, prev_task.priority = prev_task.priority, task.priority
-                task.save(update_fields=["priority"])
-                prev_task.save(update_fields=["priority"])
-            elif direction == "down" and index < len(tasks) - 1:
-                next_task = tasks[index + 1]
-                task.priority, next_task.priority = next_task.priority, task.priority
-                task.save(update_fields=["priority"])
-                next_task.save(update_fields=["priority"])
+class TaskReorderView(LoginRequiredMixin, DataVersionMixin, View):
+    def post(self, request, project_id: int):
+        project = get_object_or_404(user_projects(request.user), id=project_id)
+        order = request.POST.getlist("order")
+        if order:
+            # Complete (or partial) new order in a single UPDATE ... CASE.
+            if not reorder(project.id, _ids(order)):
+                return HttpResponseBadRequest("Invalid order")
+            events.publish(request)
+        else:
+            # "Place task after anchor"; an empty anchor means the top of the list.
+            task = get_object_or_404(project.tasks, id=_ids([request.POST.get("task", "")])[0])
+            after = request.POST.get("after")
+            anchor = get_object_or_404(project.tasks, id=_ids([after])[0]) if after else None
+            if anchor is not None and anchor.is_done != task.is_done:
+                return HttpResponseBadRequest("Tasks belong to different lists")
+            if anchor != task:
+                place_after(task, anchor)
+                if anchor is None:
+                    events.publish(request)
+                else:
+                    events.publish(
+                        request,
+                        "partials/task_event.html",
+                        {
+                            "kind": "placed",
+                            "task": task,
+                            "anchor": anchor,
+                            "due_soon_cutoff": due_soon_cutoff(),
+                        },
+                    )
 
         if not getattr(request, "htmx", False):
             return redirect("main:dashboard")
-        return render(
-            request,
-            "partials/task_list.html",
-            {"project": task.project, "due_soon_cutoff": _due_soon_cutoff()},
+        return HttpResponse(status=204)
+
+
+class TaskBulkView(LoginRequiredMixin, DataVersionMixin, View):
+    def post(self, request):
+        ids = _ids(request.POST.getlist("ids"))
+        form = TaskBulkForm(request.POST, owner=request.user)
+        if not ids or not form.is_valid():
+            return HttpResponseBadRequest("Invalid bulk operation")
+        result = apply_bulk(
+            request.user,
+            ids,
+            form.cleaned_data["action"],
+            deadline=form.cleaned_data["deadline"],
+            target=form.cleaned_data["project"],
+        )
+        if not getattr(request, "htmx", False):
+            events.publish(request)
+            return redirect("main:dashboard")
+        # OOB swaps for the affected rows only.
+        context = {"result": result, "due_soon_cutoff": due_soon_cutoff()}
+        events.publish(request, "partials/task_bulk.html", context)
+        return render(request, "partials/task_bulk.html", context)
+
+
+class TaskBatchView(LoginRequiredMixin, DataVersionMixin, View):
+    def post(self, request):
+        # Queued toggles/moves/renames from app.js, applied in one transaction.
+        plan = batch.coalesce(batch.parse(request.POST.get("ops")))
+        result = batch.apply(request.user, plan)
+        if not getattr(request, "htmx", False):
+            events.publish(request)
+            return redirect("main:dashboard")
+        context = {"result": result, "due_soon_cutoff": due_soon_cutoff()}
+        events.publish(request, "partials/task_batch.html", context)
+        return render(request, "partials/task_batch.html", context)
+
+
+class TaskExportView(LoginRequiredMixin, View):
+    def get(self, request):
+        fmt = request.GET.get("format", "csv")
+        if fmt not in transfer.FORMATS:
+            return HttpResponseBadRequest("Unknown export format")
+        # Under ASGI the rows are read with an async cursor; a sync iterator would be
+        # buffered whole before the first byte goes out.
+        if isinstance(request, ASGIRequest):
+            content = transfer.aencode(transfer.aexport_rows(request.user), fmt)
+        else:
+            content = transfer.encode(transfer.export_rows(request.user), fmt)
+        response = StreamingHttpResponse(content, content_type=transfer.FORMATS[fmt])
+        response["Content-Disposition"] = f'attachment; filename="tasks.{fmt}"'
+        return response
+
+
+class TaskImportView(LoginRequiredMixin, DataVersionMixin, View):
+    def post(self, request):
+        upload = request.FILES.get("file")
+        if upload is None:
+            return HttpResponseBadRequest("Choose a file to import")
+        records = transfer.read_records(upload.file, transfer.guess_format(upload.name))
+        result = transfer.import_records(request.user, records)
+        events.publish(request)
+        if not getattr(request, "htmx", False):
+            return redirect("main:dashboard")
+        response = render(request, "partials/task_import_result.html", {"result": result})
+        # Tells the dashboard to refetch the grid (see the resync element in dashboard.html).
+        response["HX-Trigger"] = "tasks-imported"
+        return response
+
+
+class TaskEventsView(View):
+    # Async, so an open stream does not hold a worker thread under ASGI.
+    async def get(self, request):
+        user = await request.auser()
+        if not user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        if not isinstance(request, ASGIRequest):
+            # WSGI would buffer the whole stream; 204 tells EventSource not to retry.
+            return HttpResponse(status=204)
+        response = StreamingHttpResponse(
+            events.stream(
+                user.id,
+                request.GET.get("client", ""),
+                request.headers.get("Last-Event-ID"),
+            ),
+            content_type="text/event-stream",
         )
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+
+def _ids(values) -> list[int]:
+    return [parse_id(value, "Invalid task id") for value in values]
+
+
+def _cursor(request, queryset):
+    # Keyset cursor: `?after=<id>` names the last row the client already has.
+    after = request.GET.get("after")
+    if after is None:
+        return None
+    return get_object_or_404(queryset, id=parse_id(after, "Invalid cursor"))
 
 
-def _due_soon_cutoff():
-    # Date threshold for "due soon" (today + 1 day).
-    return timezone.localdate() + timezone.timedelta(days=1)
+def _counts(project_id: int) -> Project:
+    # Fresh counters for the OOB header badge after a task write.
+    return Project.objects.only("id", *counters.COUNTER_FIELDS).get(id=project_id)
@@ -60,54 +60,170 @@
   }
 })();
 
-// Highlight tasks due "today/tomorrow".
+// Live sync: tag every request with a per-tab id so the SSE stream skips our own writes.
 (() => {
-  const dueSoonClass = "app-task-due-soon";
+  const clientId =
+    window.crypto?.randomUUID?.() || `${Date.now()}-${Math.random().toString(16).slice(2)}`;
 
-  // Parse YYYY-MM-DD into a Date or return null.
-  const parseDate = (value) => {
-    if (!value) {
-      return null;
-    }
-    const parts = value.split("-");
-    if (parts.length !== 3) {
-      return null;
-    }
-    const year = Number(parts[0]);
-    const month = Number(parts[1]);
-    const day = Number(parts[2]);
-    if (!Number.isFinite(year) || !Number.isFinite(month) || !Number.isFinite(day)) {
-      return null;
+  document.body.addEventListener("htmx:configRequest", (event) => {
+    event.detail.headers["X-Client-Id"] = clientId;
+  });
+
+  // Set before htmx processes the page on DOMContentLoaded, so the sse extension connects once.
+  const sink = document.getElementById("live-events");
+  if (sink) {
+    sink.setAttribute("sse-connect", `${sink.dataset.sseUrl}?client=${encodeURIComponent(clientId)}`);
+  }
+})();
+
+// Write coalescing: rapid toggles and move clicks are queued and sent as one batch
+// (one transaction server-side, redundant toggles collapsed) instead of a request each.
+(() => {
+  const flushDelay = 250;
+  let queue = [];
+  let timer = null;
+  let inFlight = false;
+
+  const grid = () => document.getElementById("projects-grid");
+
+  const schedule = () => {
+    if (!timer) {
+      timer = setTimeout(flush, flushDelay);
     }
-    return new Date(year, month - 1, day);
   };
 
-  // Check if the deadline is not later than tomorrow.
-  const isDueSoon = (deadline) => {
-    if (!deadline) {
-      return false;
+  // One batch in flight at a time; clicks made meanwhile go out with the next one.
+  const flush = () => {
+    timer = null;
+    if (inFlight || !queue.length) {
+      return;
     }
-    const today = new Date();
-    const todayStart = new Date(today.getFullYear(), today.getMonth(), today.getDate());
-    const cutoff = new Date(todayStart);
-    cutoff.setDate(todayStart.getDate() + 1);
-    return deadline <= cutoff;
+    const ops = queue;
+    queue = [];
+    inFlight = true;
+    window.htmx.ajax("POST", grid().dataset.batchUrl, {
+      source: grid(),
+      swap: "none",
+      values: { ops: JSON.stringify(ops) },
+    }).finally(() => {
+      inFlight = false;
+      if (queue.length) {
+        schedule();
+      }
+    });
   };
 
-  // Update due-soon highlighting within the given root.
-  const updateDueSoon = (root = document) => {
-    const rows = root.querySelectorAll(".app-task-row[data-deadline]");
-    rows.forEach((row) => {
-      const done = row.dataset.done === "1";
-      const deadline = parseDate(row.dataset.deadline);
-      const shouldHighlight = !done && isDueSoon(deadline);
-      row.classList.toggle(dueSoonClass, shouldHighlight);
-    });
+  document.body.addEventListener("htmx:beforeRequest", (event) => {
+    const source = event.detail.elt;
+    const op = source?.dataset?.batchOp;
+    const row = source?.closest?.(".app-task-row[data-task-id]");
+    if (!op || !row || !grid()?.dataset.batchUrl) {
+      return;
+    }
+    event.preventDefault();
+    const entry = { op, task: Number(row.dataset.taskId) };
+    if (op === "move") {
+      entry.direction = source.dataset.direction;
+    }
+    queue.push(entry);
+    schedule();
+  });
+})();
+
+// Due-soon feed: the highlight is rendered server-side; after a task write in the
+// grid the feed re-fetches itself (one conditional GET, debounced in hx-trigger).
+(() => {
+  // Noted before the request, since the row that sent it may be swapped away by the end.
+  const writes = new WeakSet();
+
+  document.body.addEventListener("htmx:beforeRequest", (event) => {
+    const { elt, requestConfig, xhr } = event.detail;
+    if (requestConfig?.verb !== "get" && elt?.closest?.("#projects-grid")) {
+      writes.add(xhr);
+    }
+  });
+
+  document.body.addEventListener("htmx:afterRequest", (event) => {
+    const feed = document.getElementById("due-soon");
+    if (feed && event.detail.successful && writes.has(event.detail.xhr)) {
+      window.htmx.trigger(feed, "refresh");
+    }
+  });
+})();
+
+// Drag-and-drop reordering: one "place after" request per drop.
+(() => {
+  let dragged = null;
+  let origin = null;
+
+  // Row the dragged task should land after, or null for the top of its list.
+  // The open and done groups share one container, so a row from the other group
+  // (the last open task above the first done one) also means "top".
+  const previousRow = (row) => {
+    let prev = row.previousElementSibling;
+    while (prev && !prev.matches(".app-task-row[data-task-id]")) {
+      prev = prev.previousElementSibling;
+    }
+    return prev && prev.dataset.done === row.dataset.done ? prev : null;
   };
 
-  document.addEventListener("DOMContentLoaded", () => updateDueSoon());
-  document.body.addEventListener("htmx:afterSwap", (event) => {
-    updateDueSoon(event.target);
+  document.body.addEventListener("dragstart", (event) => {
+    const row = event.target.closest?.(".app-task-row[data-task-id]");
+    if (!row || !row.dataset.taskId) {
+      return;
+    }
+    dragged = row;
+    origin = { parent: row.parentElement, next: row.nextElementSibling };
+    event.dataTransfer.effectAllowed = "move";
+    row.classList.add("app-task-dragging");
+  });
+
+  document.body.addEventListener("dragover", (event) => {
+    if (!dragged) {
+      return;
+    }
+    const row = event.target.closest?.(".app-task-row[data-task-id]");
+    // Only within the same list and the same open/done group.
+    if (!row || row === dragged || row.parentElement !== origin.parent
+      || row.dataset.done !== dragged.dataset.done) {
+      return;
+    }
+    event.preventDefault();
+    const box = row.getBoundingClientRect();
+    const after = event.clientY > box.top + box.height / 2;
+    row.parentElement.insertBefore(dragged, after ? row.nextElementSibling : row);
+  });
+
+  document.body.addEventListener("drop", (event) => {
+    if (dragged) {
+      event.preventDefault();
+    }
+  });
+
+  document.body.addEventListener("dragend", () => {
+    if (!dragged) {
+      return;
+    }
+    const row = dragged;
+    const { parent, next } = origin;
+    dragged = null;
+    origin = null;
+    row.classList.remove("app-task-dragging");
+    if (row.nextElementSibling === next) {
+      return;
+    }
+    const prev = previousRow(row);
+    // Roll back the optimistic move if the server rejects it.
+    row.addEventListener("htmx:afterRequest", (event) => {
+      if (!event.detail.successful) {
+        parent.insertBefore(row, next);
+      }
+    }, { once: true });
+    window.htmx.ajax("POST", parent.dataset.reorderUrl, {
+      source: row,
+      swap: "none",
+      values: { task: row.dataset.taskId, after: prev ? prev.dataset.taskId : "" },
+    });
   });
 })();
 